@@ -0,0 +1,58 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+from app.core.metrics import CACHE_REQUESTS
+
+
+class TTLCache:
+    """
+    Cache em memória com expiração por tempo e limite de entradas (LRU).
+
+    Entradas expiradas continuam disponíveis via get_stale até serem
+    removidas pelo limite de tamanho, o que permite comparar a versão nova
+    de um conteúdo com a anterior.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024, name: str = "default"):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                CACHE_REQUESTS.labels(self.name, "miss").inc()
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+        CACHE_REQUESTS.labels(self.name, "hit").inc()
+        return entry[1]
+
+    def get_stale(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            return entry[1] if entry is not None else None
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,231 @@
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Codecs opcionais: usados apenas se os pacotes estiverem instalados
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+
+class _GzipEncoder:
+    def __init__(self, level: int):
+        # wbits=31: formato gzip (cabeçalho + CRC)
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliEncoder:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdEncoder:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+def available_encodings(
+    gzip_level: int = 4, brotli_quality: int = 4, zstd_level: int = 3
+) -> Dict[str, Callable[[], object]]:
+    """
+    Fábricas de compressores disponíveis, em ordem de preferência do servidor
+    """
+    encodings: Dict[str, Callable[[], object]] = {}
+    if zstandard is not None:
+        encodings["zstd"] = lambda: _ZstdEncoder(zstd_level)
+    if brotli is not None:
+        encodings["br"] = lambda: _BrotliEncoder(brotli_quality)
+    encodings["gzip"] = lambda: _GzipEncoder(gzip_level)
+    return encodings
+
+
+def _parse_accept_encoding(header: str) -> Dict[str, float]:
+    accepted: Dict[str, float] = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
+    return accepted
+
+
+def negotiate_encoding(header: str, encodings: List[str]) -> Optional[str]:
+    """
+    Escolhe o codec com maior q-value aceito pelo cliente; empates seguem a
+    ordem de preferência do servidor
+    """
+    accepted = _parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+    best: Optional[Tuple[float, int, str]] = None
+    for position, name in enumerate(encodings):
+        quality = accepted.get(name, wildcard)
+        if quality <= 0:
+            continue
+        candidate = (quality, -position, name)
+        if best is None or candidate > best:
+            best = candidate
+    return best[2] if best else None
+
+
+class CompressionMiddleware:
+    """
+    Compressão negociada (zstd, br, gzip) das respostas HTTP.
+
+    Respostas com corpo único abaixo de minimum_size seguem sem compressão.
+    Respostas em streaming (StreamingResponse) são comprimidas de forma
+    incremental: cada bloco é comprimido e enviado com flush, sem bufferizar
+    o corpo inteiro.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 4,
+        brotli_quality: int = 4,
+        zstd_level: int = 3,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = available_encodings(gzip_level, brotli_quality, zstd_level)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        encoding = negotiate_encoding(accept_encoding, list(self.encodings))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressionResponder(
+            self.app, send, encoding, self.encodings[encoding], self.minimum_size
+        )
+        await responder(scope, receive)
+
+
+class _CompressionResponder:
+    def __init__(
+        self,
+        app: ASGIApp,
+        send: Send,
+        encoding: str,
+        encoder_factory: Callable[[], object],
+        minimum_size: int,
+    ):
+        self.app = app
+        self.send = send
+        self.encoding = encoding
+        self.encoder_factory = encoder_factory
+        self.minimum_size = minimum_size
+        self.start_message: Optional[Message] = None
+        self.encoder = None
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive) -> None:
+        await self.app(scope, receive, self.send_wrapper)
+
+    def _is_compressible(self, message: Message) -> bool:
+        if message["status"] < 200 or message["status"] in (204, 304):
+            return False
+        headers = Headers(raw=message["headers"])
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return False
+        content_length = headers.get("content-length")
+        if content_length is not None and int(content_length) < self.minimum_size:
+            return False
+        return True
+
+    async def send_wrapper(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            # Aguardar o primeiro bloco do corpo para decidir
+            self.start_message = message
+            self.passthrough = not self._is_compressible(message)
+            return
+        if message_type != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            start_message, self.start_message = self.start_message, None
+            if self.passthrough or (not more_body and len(body) < self.minimum_size):
+                self.passthrough = True
+                await self.send(start_message)
+                await self.send(message)
+                return
+            headers = MutableHeaders(raw=start_message["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            self.encoder = self.encoder_factory()
+            if more_body:
+                # Streaming: o tamanho final não é conhecido
+                del headers["Content-Length"]
+            else:
+                body = self.encoder.compress(body) + self.encoder.finish()
+                headers["Content-Length"] = str(len(body))
+                await self.send(start_message)
+                await self.send({"type": "http.response.body", "body": body})
+                return
+            await self.send(start_message)
+
+        if self.passthrough:
+            await self.send(message)
+            return
+
+        if more_body:
+            chunk = self.encoder.compress(body) + self.encoder.flush()
+        else:
+            chunk = self.encoder.compress(body) + self.encoder.finish()
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
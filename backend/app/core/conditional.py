@@ -0,0 +1,123 @@
+import hashlib
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Hashable, List
+
+from fastapi import Request, Response
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedPayload:
+    body: bytes
+    etag: str
+    last_modified: datetime
+
+
+# Respostas já serializadas dos endpoints de dashboard, por chave de recurso
+payload_cache = TTLCache(
+    ttl_seconds=settings.DASHBOARD_CACHE_TTL_SECONDS,
+    max_entries=settings.DASHBOARD_CACHE_MAX_ENTRIES,
+    name="dashboard_payload",
+)
+
+
+PayloadListener = Callable[[Hashable, bytes, bytes], None]
+_change_listeners: List[PayloadListener] = []
+
+
+def on_payload_change(listener: PayloadListener) -> PayloadListener:
+    """
+    Registra uma função chamada quando um recurso é produzido de novo com
+    conteúdo diferente do que estava em cache: (chave, corpo anterior, corpo novo)
+    """
+    _change_listeners.append(listener)
+    return listener
+
+
+def compute_etag(body: bytes) -> str:
+    # ETag fraco: o mesmo conteúdo pode ser enviado com Content-Encoding diferente
+    return 'W/"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Comparação fraca: ignorar o prefixo W/
+    opaque_tag = etag.removeprefix("W/")
+    return any(tag.removeprefix("W/") == opaque_tag for tag in candidates)
+
+
+def _not_modified(request: Request, payload: CachedPayload) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, payload.etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return payload.last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def _headers(payload: CachedPayload) -> dict:
+    return {
+        "ETag": payload.etag,
+        "Last-Modified": format_datetime(payload.last_modified, usegmt=True),
+        # Os clientes sempre revalidam; o custo da revalidação é um 304 vazio
+        "Cache-Control": "private, no-cache",
+    }
+
+
+def get_payload(key: Hashable, producer: Callable[[], Any]) -> CachedPayload:
+    """
+    Retorna o payload serializado em cache ou produz um novo.
+
+    Last-Modified só avança quando o conteúdo realmente muda, mesmo que a
+    entrada tenha expirado e sido buscada novamente.
+    """
+    payload = payload_cache.get(key)
+    if payload is not None:
+        return payload
+    body = dumps(producer())
+    etag = compute_etag(body)
+    previous = payload_cache.get_stale(key)
+    if previous is not None and previous.etag == etag:
+        last_modified = previous.last_modified
+    else:
+        last_modified = datetime.now(timezone.utc)
+        if previous is not None:
+            for listener in _change_listeners:
+                try:
+                    listener(key, previous.body, body)
+                except Exception:
+                    # Um listener com falha não impede a resposta
+                    logger.exception(f"Erro ao notificar a mudança do recurso {key}")
+    payload = CachedPayload(body=body, etag=etag, last_modified=last_modified)
+    payload_cache.set(key, payload)
+    return payload
+
+
+def conditional_response(
+    request: Request, key: Hashable, producer: Callable[[], Any]
+) -> Response:
+    """
+    Responde com 304 quando o cliente já possui a versão atual do recurso.
+
+    Enquanto a entrada estiver em cache, a revalidação não serializa nada
+    nem chama a API externa.
+    """
+    payload = get_payload(key, producer)
+    if _not_modified(request, payload):
+        return Response(status_code=304, headers=_headers(payload))
+    return Response(content=payload.body, media_type="application/json", headers=_headers(payload))
@@ -12,6 +12,27 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str = "postgres"
     POSTGRES_DB: str = "dashboard_ads"
     SQLALCHEMY_DATABASE_URI: Optional[str] = None
+
+    # Pool de conexões (por worker: o total é workers * (size + overflow))
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE: int = 1800  # segundos
+    DB_POOL_TIMEOUT: int = 30  # segundos de espera por uma conexão livre
+    # Pre-ping custa um round-trip a cada checkout; o recycle já descarta
+    # conexões antigas e erros de desconexão invalidam o pool
+    DB_POOL_PRE_PING: bool = False
+    # Compatível com PgBouncer em transaction pooling (sem prepared statements)
+    DB_PGBOUNCER_MODE: bool = False
+    # Sem pool no processo (recomendado junto com DB_PGBOUNCER_MODE)
+    DB_USE_NULLPOOL: bool = False
+
+    # Réplicas de leitura (lista JSON de URIs) usadas pelos endpoints de leitura
+    SQLALCHEMY_REPLICA_URIS: List[str] = []
+    # Acima deste atraso a réplica deixa de receber leituras
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    DB_REPLICA_LAG_CHECK_SECONDS: float = 2.0
+    # Após uma escrita, o mesmo cliente lê do primário por este tempo (cookie last_write)
+    DB_READ_YOUR_WRITES_SECONDS: float = 10.0
     
     # Configurações de segurança
     SECRET_KEY: str = "sua_chave_secreta_aqui"
@@ -22,12 +43,138 @@ class Settings(BaseSettings):
     GOOGLE_ADS_CLIENT_SECRET: Optional[str] = None
     GOOGLE_ADS_DEVELOPER_TOKEN: Optional[str] = None
     GOOGLE_ADS_REFRESH_TOKEN: Optional[str] = None
+    # Contas de administrador (MCC): cache da hierarquia de contas clientes e
+    # consultas simultâneas às contas clientes no worker (somando todas as
+    # requisições)
+    GOOGLE_ADS_HIERARCHY_CACHE_SECONDS: int = 3600
+    GOOGLE_ADS_MCC_CONCURRENCY: int = 16
+
+    # Access tokens OAuth do Google Ads compartilhados entre workers e processos
+    # (app/services/oauth_tokens.py): "sqlite" (arquivo local), "memory"
+    # (apenas o processo) ou "none" (cada cliente obtém o seu)
+    OAUTH_TOKEN_STORE: str = "sqlite"
+    OAUTH_TOKEN_STORE_PATH: str = "/tmp/dashboard-oauth-tokens.sqlite3"
+    # Renovar quando faltar menos que isso para expirar; deve ficar acima dos
+    # 225 s antes da expiração em que o google-auth já trata o token como vencido
+    OAUTH_TOKEN_REFRESH_MARGIN_SECONDS: int = 300
     
     # Configurações do Meta Ads (Facebook)
     META_APP_ID: Optional[str] = None
     META_APP_SECRET: Optional[str] = None
     META_ACCESS_TOKEN: Optional[str] = None
-    
+
+    # URLs alternativas das APIs dos provedores, para testes de carga e
+    # benchmarks sem consumir cota (benchmarks/fake_ads_server.py). Com
+    # GOOGLE_ADS_API_URL o Google Ads é acessado via REST/JSON, sem OAuth.
+    GOOGLE_ADS_API_URL: Optional[str] = None
+    META_GRAPH_API_URL: Optional[str] = None
+
+    # Pré-carregar os SDKs dos provedores ao iniciar o worker (por padrão são
+    # importados apenas no primeiro uso)
+    PROVIDER_SDK_WARMUP: bool = False
+
+    # Cache das respostas de campanhas e anúncios (ETag / GET condicional)
+    DASHBOARD_CACHE_TTL_SECONDS: int = 300
+    DASHBOARD_CACHE_MAX_ENTRIES: int = 1024
+
+    # Proxy das miniaturas dos anúncios (app/services/thumbnails.py): as URLs
+    # thumbnail_url das respostas de anúncios passam a apontar para o proxy,
+    # que busca a imagem uma vez e serve variantes reduzidas do disco
+    THUMBNAILS_PROXY_ENABLED: bool = True
+    THUMBNAILS_DIR: str = "/tmp/dashboard-thumbnails"
+    THUMBNAILS_MAX_BYTES: int = 512 * 1024 * 1024  # LRU: os arquivos menos usados saem primeiro
+    # Larguras das variantes (px); a primeira é a usada nas respostas de anúncios
+    THUMBNAILS_SIZES: List[int] = [128, 64, 256]
+    # Prefixo das URLs reescritas quando o frontend está em outra origem (ex.: https://api.exemplo.com)
+    THUMBNAILS_BASE_URL: str = ""
+    THUMBNAILS_FETCH_TIMEOUT_SECONDS: float = 10.0
+    THUMBNAILS_MAX_SOURCE_BYTES: int = 10 * 1024 * 1024
+    # Pixels da imagem original: um PNG pequeno pode declarar dimensões enormes
+    THUMBNAILS_MAX_PIXELS: int = 40_000_000
+
+    # Compressão das respostas (zstd e brotli apenas se instalados)
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 4
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+
+    # Profiling sob demanda (header X-Profile ou ?profile=, apenas administradores)
+    PROFILING_ENABLED: bool = True
+    PROFILING_INTERVAL_MS: float = 5.0
+    # Guardar os perfis das N requisições mais lentas de cada minuto (0 desativa;
+    # com o modo ativo todas as requisições são amostradas)
+    PROFILING_SLOWEST_PER_MINUTE: int = 0
+    PROFILING_DEFAULT_FORMAT: str = "speedscope"  # ou "collapsed"
+    PROFILING_DIR: str = "/tmp/dashboard-profiles"
+    PROFILING_MAX_FILES: int = 200
+
+    # Tracing das chamadas aos provedores (spans com linhas, páginas, bytes e retries)
+    TRACING_ENABLED: bool = False
+    TRACING_EXPORTER: str = "jsonl"  # ou "otlp" (OTLP/HTTP JSON)
+    TRACING_FILE: str = "/tmp/dashboard-traces.jsonl"
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318"
+    TRACING_SERVICE_NAME: str = "dashboard-ads-backend"
+
+    # Novas tentativas quando o provedor limita as requisições (throttling)
+    UPSTREAM_THROTTLE_RETRIES: int = 3
+    UPSTREAM_THROTTLE_BACKOFF_SECONDS: float = 1.0
+
+    # Insights do Meta no nível de anúncio via job assíncrono (AdReportRun) a
+    # partir deste número de anúncios (0 desativa)
+    META_ASYNC_INSIGHTS_MIN_ADS: int = 2000
+    # Quanto a requisição espera o job antes de responder 202 com o id do job
+    META_ASYNC_INSIGHTS_WAIT_SECONDS: float = 10.0
+    # Intervalo entre consultas ao status do job: dobra a cada consulta até o máximo
+    META_ASYNC_POLL_INITIAL_SECONDS: float = 1.0
+    META_ASYNC_POLL_MAX_SECONDS: float = 8.0
+    META_ASYNC_RESULT_PAGE_SIZE: int = 500
+    META_AD_COUNT_CACHE_SECONDS: int = 3600
+
+    # Push de linhas atualizadas via SSE (app/core/events.py): "auto" usa
+    # LISTEN/NOTIFY com PostgreSQL e entrega local (só o processo) nos demais
+    EVENTS_BACKEND: str = "auto"  # ou "postgres", "local"
+    # Conexão direta para o LISTEN quando o banco é acessado via PgBouncer
+    EVENTS_DATABASE_URI: Optional[str] = None
+    EVENTS_KEEPALIVE_SECONDS: float = 15.0
+    EVENTS_QUEUE_SIZE: int = 1000
+
+    # Cache diário de métricas das consultas por período (start_date/end_date).
+    # Os últimos METRICS_OPEN_DAYS dias (incluindo hoje) ainda mudam pela
+    # atribuição de conversões e são rebuscados depois do TTL; os demais são permanentes
+    METRICS_OPEN_DAYS: int = 3
+    METRICS_OPEN_DAY_TTL_SECONDS: int = 900
+    METRICS_MAX_RANGE_DAYS: int = 400
+    # Compactação do cache diário (app/services/metrics_retention.py): depois de
+    # after_days, as linhas diárias do nível viram agregados semanais ("week") ou
+    # mensais ("month"), usados pelas consultas nesses dias
+    METRICS_RETENTION_POLICIES: List[Dict[str, Any]] = [{"level": "ad", "after_days": 90, "grain": "month"}]
+    # Linhas diárias movidas por transação, para não segurar locks longos
+    METRICS_COMPACTION_BATCH_SIZE: int = 5000
+    # Diretório onde arquivar as linhas compactadas (JSON colunar com gzip);
+    # sem ele, são descartadas
+    METRICS_ARCHIVE_DIR: Optional[str] = None
+
+    # Catálogo de campanhas e anúncios (tabelas campaigns e ads), atualizado a
+    # cada sincronização de conta (app/services/catalog_sync.py): só as linhas
+    # cujo hash do conteúdo mudou são gravadas, em lotes
+    CATALOG_SYNC_ENABLED: bool = True
+    CATALOG_SYNC_BATCH_SIZE: int = 500
+    # Espera pelo job assíncrono de insights dos anúncios nas contas grandes do Meta
+    CATALOG_META_WAIT_SECONDS: float = 120.0
+
+    # Detecção incremental de anomalias nas séries diárias de gasto e CTR
+    # (app/services/anomaly_detection.py), a cada dia ingerido no cache de métricas
+    ANOMALY_DETECTION_ENABLED: bool = True
+    # Peso do dia novo na média/variância exponenciais e no ajuste do dia da semana
+    ANOMALY_EWMA_ALPHA: float = 0.1
+    ANOMALY_SEASONAL_GAMMA: float = 0.1
+    # Desvios-padrão a partir dos quais o dia é registrado como anomalia
+    ANOMALY_Z_THRESHOLD: float = 4.0
+    # Dias fechados aprendidos antes de a série começar a ser avaliada
+    ANOMALY_WARMUP_POINTS: int = 14
+    # O CTR só é avaliado em dias com pelo menos estas impressões
+    ANOMALY_MIN_IMPRESSIONS: int = 1000
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1,242 @@
+"""
+Pub/sub de eventos entre os workers, para o push via SSE (app/routes/events.py)
+
+Um evento publicado em qualquer worker (ou num processo de sincronização)
+chega às conexões SSE de todos os workers:
+
+- "postgres": NOTIFY no canal dashboard_events; cada worker com assinantes
+  mantém uma conexão dedicada em LISTEN (EVENTS_DATABASE_URI permite uma
+  conexão direta quando o banco é acessado via PgBouncer em transaction
+  pooling, que não suporta LISTEN). Eventos acima do limite de 8000 bytes
+  do NOTIFY são divididos em partes com menos linhas.
+- "local": apenas dentro do processo (SQLite, desenvolvimento, um worker).
+
+EVENTS_BACKEND="auto" escolhe "postgres" quando o banco é PostgreSQL.
+"""
+import abc
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+from app.core.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "dashboard_events"
+# Limite do payload do NOTIFY é 8000 bytes; margem para o envelope
+NOTIFY_MAX_BYTES = 7800
+# Enviado aos assinantes quando eventos podem ter sido perdidos (fila cheia,
+# reconexão do LISTEN): o cliente deve recarregar os dados
+RESYNC_EVENT: Dict[str, Any] = {"type": "resync"}
+
+EventFilter = Callable[[Dict[str, Any]], bool]
+
+
+class Subscription:
+    """
+    Fila de eventos de uma conexão SSE, no event loop que a criou
+    """
+
+    def __init__(self, matches: EventFilter, maxsize: int):
+        self.loop = asyncio.get_running_loop()
+        self.matches = matches
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def _put(self, event: Dict[str, Any]) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Cliente lento: descartar e pedir que recarregue
+            self.overflowed = True
+
+    async def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Próximo evento, ou None se nada chegar dentro do timeout
+        """
+        if self.overflowed:
+            self.overflowed = False
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            return RESYNC_EVENT
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBroker(abc.ABC):
+    """
+    Entrega local (dispatch) comum aos backends; publish distribui o evento
+    """
+
+    def __init__(self):
+        self._subscriptions: Set[Subscription] = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, matches: EventFilter) -> Subscription:
+        subscription = Subscription(matches, settings.EVENTS_QUEUE_SIZE)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def dispatch(self, event: Dict[str, Any]) -> None:
+        """
+        Entrega o evento às assinaturas deste processo (de qualquer thread)
+        """
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            if event is not RESYNC_EVENT and not subscription.matches(event):
+                continue
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._put, event)
+            except RuntimeError:
+                # Event loop encerrado (worker finalizando)
+                self.unsubscribe(subscription)
+
+    @abc.abstractmethod
+    def publish(self, event: Dict[str, Any]) -> None:
+        ...
+
+
+class LocalEventBroker(EventBroker):
+    def publish(self, event: Dict[str, Any]) -> None:
+        self.dispatch(event)
+
+
+def _notify_payloads(event: Dict[str, Any]) -> List[str]:
+    """
+    Divide um evento com muitas linhas em partes que caibam no NOTIFY
+    """
+    payload = dumps(event).decode()
+    rows = event.get("rows")
+    if len(payload.encode()) <= NOTIFY_MAX_BYTES or not rows:
+        return [payload]
+    payloads: List[str] = []
+    part: List[Any] = []
+    envelope = {**event, "rows": [], "removed": event.get("removed", [])}
+    size = len(dumps(envelope))
+    for row in rows:
+        row_size = len(dumps(row)) + 1
+        if part and size + row_size > NOTIFY_MAX_BYTES:
+            payloads.append(dumps({**envelope, "rows": part}).decode())
+            # As remoções vão só na primeira parte
+            envelope["removed"] = []
+            part, size = [], len(dumps(envelope))
+        if size + row_size > NOTIFY_MAX_BYTES:
+            # Linha maior que o limite: o cliente recarrega o recurso
+            payloads.append(dumps({**envelope, "rows": [], "truncated": True}).decode())
+            continue
+        part.append(row)
+        size += row_size
+    if part:
+        payloads.append(dumps({**envelope, "rows": part}).decode())
+    return payloads
+
+
+class PostgresEventBroker(EventBroker):
+    def __init__(self, database_uri: str):
+        super().__init__()
+        url = make_url(database_uri)
+        # O listener usa o psycopg2 diretamente, sem o pool do SQLAlchemy
+        self.dsn = url.set(drivername="postgresql").render_as_string(hide_password=False)
+        self._listener: Optional[threading.Thread] = None
+
+    def subscribe(self, matches: EventFilter) -> Subscription:
+        # A conexão em LISTEN só é aberta quando há assinantes no worker
+        if self._listener is None:
+            with self._lock:
+                if self._listener is None:
+                    self._listener = threading.Thread(target=self._listen, name="events-listen", daemon=True)
+                    self._listener.start()
+        return super().subscribe(matches)
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        from app.db.session import engine
+
+        with engine.connect() as connection:
+            for payload in _notify_payloads(event):
+                connection.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANNEL, "payload": payload})
+            connection.commit()
+
+    def _listen(self) -> None:
+        import psycopg2
+        import psycopg2.extensions
+
+        delay = 1.0
+        reconnecting = False
+        while True:
+            connection = None
+            try:
+                connection = psycopg2.connect(self.dsn)
+                connection.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with connection.cursor() as cursor:
+                    cursor.execute(f"LISTEN {CHANNEL}")
+                if reconnecting:
+                    # Eventos publicados durante a queda se perderam
+                    self.dispatch(RESYNC_EVENT)
+                delay, reconnecting = 1.0, False
+                while True:
+                    if select.select([connection], [], [], settings.EVENTS_KEEPALIVE_SECONDS) == ([], [], []):
+                        # Sem notificações: verificar se a conexão continua viva
+                        with connection.cursor() as cursor:
+                            cursor.execute("SELECT 1")
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        notify = connection.notifies.pop(0)
+                        self.dispatch(json.loads(notify.payload))
+            except Exception as e:
+                logger.warning(f"Conexão LISTEN de eventos perdida, reconectando em {delay:.0f}s: {e}")
+                reconnecting = True
+                time.sleep(delay)
+                delay = min(delay * 2, 30.0)
+            finally:
+                if connection is not None:
+                    connection.close()
+
+
+_broker: Optional[EventBroker] = None
+_broker_lock = threading.Lock()
+
+
+def get_broker() -> EventBroker:
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                database_uri = settings.EVENTS_DATABASE_URI or settings.SQLALCHEMY_DATABASE_URI
+                backend = settings.EVENTS_BACKEND
+                if backend == "auto":
+                    backend = "postgres" if make_url(database_uri).get_backend_name() == "postgresql" else "local"
+                if backend == "postgres":
+                    _broker = PostgresEventBroker(database_uri)
+                elif backend == "local":
+                    _broker = LocalEventBroker()
+                else:
+                    raise ValueError(f"EVENTS_BACKEND inválido: {settings.EVENTS_BACKEND}")
+    return _broker
+
+
+def publish(event: Dict[str, Any]) -> None:
+    """
+    Publica um evento para as conexões SSE de todos os workers. Falhas são
+    registradas e ignoradas: o push é um complemento às consultas normais
+    """
+    try:
+        get_broker().publish(event)
+    except Exception as e:
+        logger.warning(f"Erro ao publicar evento {event.get('type')}: {e}")
@@ -0,0 +1,18 @@
+from app.core.conditional import payload_cache
+from app.db.pool import engine_pool_stats
+from app.db.session import engine, replica_engines
+
+
+def reset_after_fork() -> None:
+    """
+    Recria no worker os recursos herdados do master no fork.
+
+    As conexões do pool herdadas não podem ser usadas por dois processos;
+    dispose(close=False) descarta o pool sem fechar os sockets do master.
+    Os clientes dos SDKs são criados por requisição, então basta garantir
+    que nenhum estado em cache foi herdado.
+    """
+    for worker_engine in [engine, *replica_engines]:
+        worker_engine.dispose(close=False)
+        engine_pool_stats(worker_engine).reset()
+    payload_cache.clear()
@@ -0,0 +1,196 @@
+import contextvars
+import functools
+import os
+import time
+from typing import Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Com PROMETHEUS_MULTIPROC_DIR definido (gunicorn), cada worker grava suas
+# métricas em arquivos nesse diretório e o endpoint /metrics agrega todos
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Latência das requisições HTTP por rota",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requisições HTTP em andamento",
+    multiprocess_mode="livesum",
+)
+UPSTREAM_LATENCY = Histogram(
+    "upstream_request_duration_seconds",
+    "Latência das chamadas às APIs dos provedores",
+    ["provider", "method"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+UPSTREAM_ERRORS = Counter(
+    "upstream_request_errors_total",
+    "Erros nas chamadas às APIs dos provedores",
+    ["provider", "method"],
+)
+DB_QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds",
+    "Latência das consultas ao banco de dados",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request",
+    "Quantidade de consultas ao banco por requisição HTTP",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 500),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_time_per_request_seconds",
+    "Tempo total em consultas ao banco por requisição HTTP",
+    ["route"],
+)
+# role: pool do banco principal (writer) ou de uma réplica (replica-0, replica-1...)
+DB_POOL_IN_USE = Gauge(
+    "db_pool_connections_in_use",
+    "Conexões do pool em uso",
+    ["role"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Espera por uma conexão do pool",
+    ["role"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+DB_POOL_CHECKOUT_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts_total",
+    "Esperas por conexão do pool que estouraram o timeout",
+    ["role"],
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Consultas aos caches da aplicação",
+    ["cache", "result"],
+)
+
+
+class _RequestDbStats:
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+_request_db_stats: contextvars.ContextVar[Optional[_RequestDbStats]] = contextvars.ContextVar(
+    "request_db_stats", default=None
+)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_start"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info.pop("query_start")
+    DB_QUERY_LATENCY.observe(elapsed)
+    stats = _request_db_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.seconds += elapsed
+
+
+class observe_upstream:
+    """
+    Mede latência e erros de uma chamada à API de um provedor.
+
+    Pode ser usado como decorator de método ou como bloco with.
+    """
+
+    def __init__(self, provider: str, method: str):
+        self.provider = provider
+        self.method = method
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        UPSTREAM_LATENCY.labels(self.provider, self.method).observe(time.perf_counter() - self._start)
+        if exc_type is not None:
+            UPSTREAM_ERRORS.labels(self.provider, self.method).inc()
+        return False
+
+    def __call__(self, func):
+        # Uma instância nova por chamada: o início da medição não é compartilhado entre threads
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with observe_upstream(self.provider, self.method):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+class MetricsMiddleware:
+    """
+    Registra latência por template de rota, requisições em andamento e
+    consultas ao banco por requisição
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        db_stats = _RequestDbStats()
+        token = _request_db_stats.set(db_stats)
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            REQUESTS_IN_FLIGHT.dec()
+            _request_db_stats.reset(token)
+            # Template da rota (ex.: /api/v1/google-ads/campaigns/{account_id}),
+            # evitando uma série por id
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            REQUEST_LATENCY.labels(scope["method"], route_path, str(status_code)).observe(elapsed)
+            DB_QUERIES_PER_REQUEST.labels(route_path).observe(db_stats.queries)
+            DB_TIME_PER_REQUEST.labels(route_path).observe(db_stats.seconds)
+
+
+def metrics_endpoint(request: Request) -> Response:
+    """
+    Exposição no formato texto do Prometheus, agregando todos os workers
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
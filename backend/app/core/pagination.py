@@ -0,0 +1,75 @@
+import base64
+import json
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy.orm import Query
+
+
+class InvalidCursor(ValueError):
+    """
+    Cursor de paginação malformado ou adulterado
+    """
+
+
+def encode_cursor(last_id: int) -> str:
+    """
+    Gera um cursor opaco a partir do último id retornado na página
+    """
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Recupera o último id a partir de um cursor opaco
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        last_id = data["id"]
+    except (ValueError, TypeError, KeyError) as e:
+        raise InvalidCursor(f"Cursor inválido: {cursor}") from e
+    if not isinstance(last_id, int):
+        raise InvalidCursor(f"Cursor inválido: {cursor}")
+    return last_id
+
+
+def keyset_page(
+    query: Query, id_column: Any, cursor: Optional[str], limit: int
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Retorna uma página ordenada pelo id usando paginação por chave (keyset).
+
+    Ao contrário de OFFSET/LIMIT, o custo de cada página é o mesmo
+    independentemente da profundidade, pois a consulta parte direto do
+    índice da chave primária.
+    """
+    if cursor:
+        query = query.filter(id_column > decode_cursor(cursor))
+    # Buscar um item a mais para saber se existe próxima página
+    rows = query.order_by(id_column).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].id)
+
+
+def stream_by_id(query: Query, id_column: Any, batch_size: int = 500) -> Iterator[Any]:
+    """
+    Itera sobre todos os registros em lotes, sem carregar tudo em memória
+    """
+    return query.order_by(id_column).yield_per(batch_size)
+
+
+def stream_json_array(items: Iterable[Any], serialize: Callable[[Any], str]) -> Iterator[str]:
+    """
+    Serializa um iterável como um array JSON, item a item, para StreamingResponse
+    """
+    yield "["
+    first = True
+    for item in items:
+        if not first:
+            yield ","
+        yield serialize(item)
+        first = False
+    yield "]"
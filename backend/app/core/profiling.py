@@ -0,0 +1,472 @@
+import heapq
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs
+
+from fastapi.dependencies.utils import is_coroutine_callable
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("speedscope", "collapsed")
+_EXTENSIONS = {"speedscope": ".speedscope.json", "collapsed": ".collapsed.txt"}
+_PROFILE_ID = re.compile(r"^[a-z]+-[0-9a-f]{32}$")
+
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_PROJECT_ROOT = os.path.dirname(_APP_ROOT)
+
+# Funções onde threads ociosas ficam bloqueadas (loop de eventos esperando
+# I/O, threads do threadpool esperando trabalho)
+_IDLE_FUNCTIONS = {"select", "poll", "control", "wait"}
+
+# Acima disso o cache de frames é descartado (código gerado dinamicamente
+# criaria entradas sem fim)
+_MAX_CACHED_FRAMES = 10000
+
+Frame = Tuple[str, str, int]
+Stack = Tuple[Frame, ...]
+
+
+def _short_path(filename: str) -> str:
+    if filename.startswith(_PROJECT_ROOT):
+        return os.path.relpath(filename, _PROJECT_ROOT)
+    _, marker, rest = filename.rpartition("site-packages" + os.sep)
+    if marker:
+        return rest
+    return os.path.basename(filename)
+
+
+class _Collector:
+    """
+    Amostras de pilha coletadas durante uma requisição, com o tempo (ms)
+    atribuído a cada pilha
+    """
+
+    def __init__(self):
+        self.samples: Counter = Counter()
+        self.started = time.perf_counter()
+        # Threads que executam a requisição: a do loop de eventos e as do
+        # threadpool enquanto rodam o endpoint (ProfiledRoute)
+        self.threads: Set[int] = {threading.get_ident()}
+
+
+# Coletor da requisição perfilada, visto também nas threads do threadpool
+# (o contexto é copiado para elas)
+_current_collector: ContextVar[Optional[_Collector]] = ContextVar("profiling_collector", default=None)
+
+
+def _registering_thread(call: Callable) -> Callable:
+    @wraps(call)
+    def wrapper(*args, **kwargs):
+        collector = _current_collector.get()
+        if collector is None:
+            return call(*args, **kwargs)
+        thread_id = threading.get_ident()
+        collector.threads.add(thread_id)
+        try:
+            return call(*args, **kwargs)
+        finally:
+            collector.threads.discard(thread_id)
+
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """
+    Rota cujo endpoint síncrono registra a thread do threadpool no coletor
+    da requisição perfilada enquanto executa; fora do profiling custa só a
+    leitura de um ContextVar
+    """
+
+    def get_route_handler(self) -> Callable:
+        call = self.dependant.call
+        if call is not None and not is_coroutine_callable(call):
+            self.dependant.call = _registering_thread(call)
+        return super().get_route_handler()
+
+
+class _StackSampler:
+    """
+    Profiler por amostragem: uma única thread lê, a cada intervalo, a pilha
+    das threads registradas nos coletores ativos e entrega a cada coletor
+    só as pilhas das suas threads.
+
+    A thread do loop de eventos é compartilhada: o código assíncrono de
+    requisições simultâneas aparece no perfil, o código síncrono delas não.
+    Dependências síncronas (get_db etc.) rodam em outras threads do
+    threadpool e ficam fora do perfil. Threads ociosas (sem código do app
+    na pilha) são ignoradas.
+    """
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self._collectors: List[_Collector] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._frames: Dict[object, Frame] = {}
+
+    def start(self) -> _Collector:
+        collector = _Collector()
+        with self._lock:
+            self._collectors.append(collector)
+            # Após o fork do gunicorn a thread do master não existe no worker
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+        return collector
+
+    def stop(self, collector: _Collector) -> None:
+        with self._lock:
+            self._collectors.remove(collector)
+
+    def _frame(self, frame) -> Frame:
+        code = frame.f_code
+        cached = self._frames.get(code)
+        if cached is None:
+            if len(self._frames) >= _MAX_CACHED_FRAMES:
+                self._frames.clear()
+            cached = (code.co_name, _short_path(code.co_filename), code.co_firstlineno)
+            self._frames[code] = cached
+        return cached
+
+    def _sample(self, thread_ids: Set[int]) -> Dict[int, Stack]:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        stacks = {}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id not in thread_ids:
+                continue
+            leaf_name = frame.f_code.co_name
+            stack = []
+            in_app = False
+            while frame is not None:
+                if frame.f_code.co_filename.startswith(_APP_ROOT):
+                    in_app = True
+                stack.append(self._frame(frame))
+                frame = frame.f_back
+            if not in_app and leaf_name in _IDLE_FUNCTIONS:
+                continue
+            stack.append((f"thread:{names.get(thread_id, thread_id)}", "", 0))
+            stack.reverse()
+            stacks[thread_id] = tuple(stack)
+        return stacks
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while True:
+            with self._lock:
+                if not self._collectors:
+                    self._thread = None
+                    self._frames.clear()
+                    return
+                thread_ids = set().union(*(collector.threads for collector in self._collectors))
+            stacks = self._sample(thread_ids)
+            # Cada amostra vale o tempo real desde a anterior: com o GIL
+            # disputado o intervalo efetivo fica maior que o configurado
+            now = time.perf_counter()
+            elapsed_ms = (now - last) * 1000
+            last = now
+            with self._lock:
+                for collector in self._collectors:
+                    for thread_id in tuple(collector.threads):
+                        stack = stacks.get(thread_id)
+                        if stack is not None:
+                            collector.samples[stack] += elapsed_ms
+            time.sleep(self.interval_seconds)
+
+
+def _frame_label(frame: Frame) -> str:
+    name, filename, line = frame
+    return f"{name} ({filename}:{line})" if filename else name
+
+
+def to_collapsed(samples: Counter) -> str:
+    """
+    Formato "collapsed stacks" (flamegraph.pl, inferno, speedscope), com o
+    peso de cada pilha em milissegundos
+    """
+    lines = [
+        ";".join(_frame_label(frame) for frame in stack) + f" {max(1, round(weight))}"
+        for stack, weight in samples.most_common()
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def to_speedscope(samples: Counter, name: str) -> dict:
+    """
+    Perfil "sampled" no formato de arquivo do speedscope
+    """
+    frame_index: Dict[Frame, int] = {}
+    frames = []
+    profile_samples = []
+    weights = []
+    for stack, weight in samples.items():
+        indexes = []
+        for frame in stack:
+            index = frame_index.get(frame)
+            if index is None:
+                index = frame_index[frame] = len(frames)
+                frame_name, filename, line = frame
+                frame_info = {"name": frame_name}
+                if filename:
+                    frame_info.update(file=filename, line=line)
+                frames.append(frame_info)
+            indexes.append(index)
+        profile_samples.append(indexes)
+        weights.append(weight)
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": profile_samples,
+                "weights": weights,
+            }
+        ],
+        "name": name,
+        "exporter": "dashboard-ads-backend",
+    }
+
+
+class ProfileStore:
+    """
+    Perfis gravados em disco, compartilhados entre os workers; mantém apenas
+    os max_files mais recentes
+    """
+
+    def __init__(self, directory: str, max_files: int = 200):
+        self.directory = directory
+        self.max_files = max_files
+
+    def _path(self, profile_id: str, fmt: str) -> str:
+        return os.path.join(self.directory, profile_id + _EXTENSIONS[fmt])
+
+    def save(self, profile_id: str, fmt: str, content: bytes) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(profile_id, fmt)
+        with open(path, "wb") as f:
+            f.write(content)
+        self._prune()
+        return path
+
+    def find(self, profile_id: str) -> Optional[Tuple[str, str]]:
+        """
+        Caminho e formato do perfil, ou None
+        """
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        for fmt in FORMATS:
+            path = self._path(profile_id, fmt)
+            if os.path.exists(path):
+                return path, fmt
+        return None
+
+    def delete(self, profile_id: str) -> None:
+        found = self.find(profile_id)
+        if found is not None:
+            try:
+                os.remove(found[0])
+            except FileNotFoundError:
+                pass
+
+    def list(self) -> List[dict]:
+        if not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for entry in os.scandir(self.directory):
+            for fmt, extension in _EXTENSIONS.items():
+                if entry.name.endswith(extension):
+                    stat = entry.stat()
+                    profiles.append({
+                        "id": entry.name[: -len(extension)],
+                        "format": fmt,
+                        "size": stat.st_size,
+                        "created_at": stat.st_mtime,
+                    })
+        profiles.sort(key=lambda profile: profile["created_at"], reverse=True)
+        return profiles
+
+    def _prune(self) -> None:
+        for profile in self.list()[self.max_files:]:
+            self.delete(profile["id"])
+
+
+profile_store = ProfileStore(settings.PROFILING_DIR, settings.PROFILING_MAX_FILES)
+
+
+class _SlowestPerMinute:
+    """
+    Mantém os N perfis das requisições mais lentas do minuto corrente
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._minute: Optional[int] = None
+        self._heap: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+
+    def offer(self, duration: float, profile_id: str) -> Tuple[bool, Optional[str]]:
+        """
+        Retorna se o perfil deve ser guardado e o id do perfil que ele substitui
+        """
+        minute = int(time.time() // 60)
+        with self._lock:
+            if minute != self._minute:
+                self._minute = minute
+                self._heap = []
+            if len(self._heap) < self.size:
+                heapq.heappush(self._heap, (duration, profile_id))
+                return True, None
+            if duration > self._heap[0][0]:
+                _, evicted = heapq.heapreplace(self._heap, (duration, profile_id))
+                return True, evicted
+            return False, None
+
+
+def _requested_format(scope: Scope) -> Optional[str]:
+    """
+    Formato pedido via header X-Profile ou parâmetro ?profile=, ou None
+    """
+    value = None
+    for name, header_value in scope["headers"]:
+        if name == b"x-profile":
+            value = header_value.decode("latin-1")
+            break
+    if value is None:
+        query_string = scope.get("query_string", b"")
+        if b"profile=" not in query_string:
+            return None
+        values = parse_qs(query_string.decode("latin-1")).get("profile")
+        if not values:
+            return None
+        value = values[0]
+    value = value.strip().lower()
+    if value in ("0", "false", "no", "off", ""):
+        return None
+    return value if value in FORMATS else ""
+
+
+class ProfilingMiddleware:
+    """
+    Profiling sob demanda de requisições individuais.
+
+    Administradores pedem o perfil de uma requisição com o header
+    "X-Profile: speedscope|collapsed|1" ou ?profile=...; a resposta traz o
+    header X-Profile-Id e o perfil fica disponível em /system/profiles.
+    Com slowest_per_minute > 0, todas as requisições são amostradas e os
+    perfis das N mais lentas de cada minuto são guardados.
+
+    Sem pedido de profiling e sem o modo amostrado, a requisição passa
+    direto para o app (apenas a verificação do header).
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        authorize: Callable[[Optional[str]], bool],
+        store: ProfileStore,
+        interval_seconds: float = 0.005,
+        slowest_per_minute: int = 0,
+        default_format: str = "speedscope",
+    ):
+        self.app = app
+        self.authorize = authorize
+        self.store = store
+        self.default_format = default_format
+        self.sampler = _StackSampler(interval_seconds)
+        self.slowest = _SlowestPerMinute(slowest_per_minute) if slowest_per_minute > 0 else None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        fmt = _requested_format(scope)
+        if fmt is None:
+            if self.slowest is None:
+                await self.app(scope, receive, send)
+            else:
+                await self._profile_sampled(scope, receive, send)
+            return
+
+        authorization = Headers(scope=scope).get("authorization", "")
+        scheme, _, token = authorization.partition(" ")
+        allowed = scheme.lower() == "bearer" and await run_in_threadpool(self.authorize, token)
+        if not allowed:
+            response = JSONResponse(
+                {"detail": "O usuário não tem permissões suficientes"}, status_code=403
+            )
+            await response(scope, receive, send)
+            return
+        await self._profile_requested(scope, receive, send, fmt or self.default_format)
+
+    async def _profile_requested(self, scope: Scope, receive: Receive, send: Send, fmt: str) -> None:
+        profile_id = "req-" + uuid.uuid4().hex
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-Profile-Id"] = profile_id
+            await send(message)
+
+        collector = self.sampler.start()
+        token = _current_collector.set(collector)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_collector.reset(token)
+            self.sampler.stop(collector)
+            await self._save(scope, collector, profile_id, fmt)
+
+    async def _profile_sampled(self, scope: Scope, receive: Receive, send: Send) -> None:
+        collector = self.sampler.start()
+        token = _current_collector.set(collector)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_collector.reset(token)
+            self.sampler.stop(collector)
+            duration = time.perf_counter() - collector.started
+            profile_id = "slow-" + uuid.uuid4().hex
+            keep, evicted = self.slowest.offer(duration, profile_id)
+            if keep and collector.samples:
+                if evicted is not None:
+                    await run_in_threadpool(self.store.delete, evicted)
+                await self._save(scope, collector, profile_id, self.default_format)
+
+    async def _save(self, scope: Scope, collector: _Collector, profile_id: str, fmt: str) -> None:
+        duration = time.perf_counter() - collector.started
+        name = f"{scope['method']} {scope['path']} ({duration * 1000:.0f} ms)"
+
+        def render_and_save() -> None:
+            if fmt == "collapsed":
+                content = to_collapsed(collector.samples).encode()
+            else:
+                content = dumps(to_speedscope(collector.samples, name))
+            self.store.save(profile_id, fmt, content)
+
+        try:
+            await run_in_threadpool(render_and_save)
+        except OSError as e:
+            logger.warning(f"Não foi possível gravar o perfil {profile_id}: {e}")
+            return
+        logger.info(f"Perfil {profile_id} gravado: {name}")
@@ -0,0 +1,36 @@
+from typing import Any
+
+import orjson
+from fastapi import Response
+
+
+def _default(value: Any) -> Any:
+    # Tipos que o orjson não serializa nativamente (ex.: Decimal, enums do proto)
+    return str(value)
+
+
+def dumps(data: Any) -> bytes:
+    """
+    Serializa listas de linhas (dicts ou dataclasses) direto para JSON.
+
+    Evita o jsonable_encoder do FastAPI, que percorre cada elemento em Python
+    e domina o tempo de resposta em payloads com milhares de linhas.
+    """
+    return orjson.dumps(data, default=_default)
+
+
+class FastJSONResponse(Response):
+    """
+    Resposta JSON serializada com orjson.
+
+    Como default_response_class do app, só substitui o json.dumps final:
+    rotas com response_model continuam validando e convertendo o retorno
+    com o pydantic, e as demais com o jsonable_encoder. Para pular essa
+    etapa a rota retorna a própria resposta (FastJSONResponse(dados) ou os
+    bytes prontos de conditional_response)
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
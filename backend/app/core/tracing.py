@@ -0,0 +1,287 @@
+import contextvars
+import logging
+import queue
+import re
+import secrets
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+class Span:
+    """
+    Operação com duração e atributos (linhas, páginas, bytes, retries...)
+    """
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def incr(self, key: str, amount: int = 1) -> None:
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """
+    Usado quando o tracing está desativado: mesma interface, sem custo
+    """
+
+    trace_id = None
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+    def incr(self, key: str, amount: int = 1) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class JsonlSpanExporter:
+    """
+    Uma linha JSON por span. Escritas em modo append são atômicas para
+    linhas pequenas, então vários workers podem usar o mesmo arquivo.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = dumps(span.to_dict()) + b"\n"
+        with self._lock:
+            with open(self.path, "ab") as f:
+                f.write(line)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OtlpHttpSpanExporter:
+    """
+    Envia spans em lotes para um coletor OTLP/HTTP (JSON) em segundo plano.
+
+    Se o coletor não acompanhar, spans são descartados em vez de acumular
+    memória ou bloquear as requisições.
+    """
+
+    def __init__(self, endpoint: str, service_name: str, batch_size: int = 512, flush_seconds: float = 1.0):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.dropped = 0
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=10000)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        # A thread é criada no primeiro span de cada processo (não sobrevive ao fork)
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="otlp-exporter", daemon=True)
+                    self._thread.start()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_seconds
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._post(batch)
+            except Exception as e:
+                logger.warning(f"Falha ao enviar {len(batch)} spans para {self.url}: {e}")
+
+    def _payload(self, spans: List[Span]) -> Dict[str, Any]:
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+                "scopeSpans": [{
+                    "scope": {"name": "app.core.tracing"},
+                    "spans": [
+                        {
+                            "traceId": span.trace_id,
+                            "spanId": span.span_id,
+                            "parentSpanId": span.parent_id or "",
+                            "name": span.name,
+                            # 2 = SERVER (requisição), 3 = CLIENT (chamadas aos provedores)
+                            "kind": 2 if span.parent_id is None or span.attributes.get("http.method") else 3,
+                            "startTimeUnixNano": str(span.start_ns),
+                            "endTimeUnixNano": str(span.end_ns),
+                            "attributes": [
+                                {"key": key, "value": _otlp_value(value)}
+                                for key, value in span.attributes.items()
+                                if value is not None
+                            ],
+                            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+                        }
+                        for span in spans
+                    ],
+                }],
+            }]
+        }
+
+    def _post(self, spans: List[Span]) -> None:
+        request = urllib.request.Request(
+            self.url,
+            data=dumps(self._payload(spans)),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=5) as response:
+            response.read()
+
+
+def _create_exporter():
+    if not settings.TRACING_ENABLED:
+        return None
+    if settings.TRACING_EXPORTER == "otlp":
+        return OtlpHttpSpanExporter(settings.TRACING_OTLP_ENDPOINT, settings.TRACING_SERVICE_NAME)
+    return JsonlSpanExporter(settings.TRACING_FILE)
+
+
+exporter = _create_exporter()
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+def tracing_enabled() -> bool:
+    return exporter is not None
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def start_span(name: str, remote_parent: Optional[Tuple[str, str]] = None, **attributes: Any) -> Iterator[Span]:
+    """
+    Abre um span filho do span atual (ou de remote_parent, vindo de um
+    header traceparent). Como o contexto é copiado para o threadpool, spans
+    abertos em endpoints síncronos ficam sob o span da requisição.
+    """
+    if exporter is None:
+        yield NOOP_SPAN
+        return
+    parent = _current_span.get()
+    if parent is not None:
+        trace_id, parent_id = parent.trace_id, parent.span_id
+    elif remote_parent is not None:
+        trace_id, parent_id = remote_parent
+    else:
+        trace_id, parent_id = secrets.token_hex(16), None
+    span = Span(name, trace_id, parent_id, attributes)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.error = f"{type(e).__name__}: {e}"[:500]
+        raise
+    finally:
+        span.end_ns = time.time_ns()
+        _current_span.reset(token)
+        exporter.export(span)
+
+
+def _parse_traceparent(scope: Scope) -> Optional[Tuple[str, str]]:
+    for name, value in scope["headers"]:
+        if name == b"traceparent":
+            match = _TRACEPARENT.match(value.decode("latin-1").strip())
+            return (match.group(1), match.group(2)) if match else None
+    return None
+
+
+class TracingMiddleware:
+    """
+    Abre o span raiz de cada requisição HTTP e devolve o trace id no header
+    X-Trace-Id. Respeita um traceparent (W3C) recebido do cliente/proxy.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with start_span(
+            f"{scope['method']} {scope['path']}",
+            remote_parent=_parse_traceparent(scope),
+            **{"http.method": scope["method"], "http.target": scope["path"]},
+        ) as span:
+
+            async def send_wrapper(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    span.set(**{"http.status_code": message["status"]})
+                    MutableHeaders(scope=message)["X-Trace-Id"] = span.trace_id
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get("route")
+                route_path = getattr(route, "path", None)
+                if route_path:
+                    # Template da rota: agrupa spans da mesma rota com ids diferentes
+                    span.name = f"{scope['method']} {route_path}"
+                    span.set(**{"http.route": route_path})
@@ -0,0 +1 @@
+from app.crud import crud_user, crud_google_ads, crud_meta_ads, crud_campaigns
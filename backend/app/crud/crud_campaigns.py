@@ -0,0 +1,76 @@
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, literal, or_, select, union_all
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from app.models.models import Ad, AdMetric, Campaign, CampaignMetric, GoogleAdsAccount, MetaAdsAccount
+
+# (nível, id da entidade) -> (impressões, cliques, conversões, investimento, valor de conversão)
+MetricTotals = Dict[Tuple[str, int], Tuple[int, int, float, float, float]]
+
+
+def campaign_filter(
+    user_id: int, google_ads_account_id: Optional[int] = None, meta_ads_account_id: Optional[int] = None
+):
+    """
+    Campanhas das contas informadas ou, sem contas, todas as do usuário
+    """
+    if google_ads_account_id is None and meta_ads_account_id is None:
+        return Campaign.user_id == user_id
+    accounts = []
+    if google_ads_account_id is not None:
+        accounts.append(Campaign.google_ads_account_id == google_ads_account_id)
+    if meta_ads_account_id is not None:
+        accounts.append(Campaign.meta_ads_account_id == meta_ads_account_id)
+    return or_(*accounts)
+
+
+def get_campaign_tree(db: Session, criterion) -> List[Campaign]:
+    """
+    Campanhas com a conta e os anúncios carregados, em duas consultas
+    independentemente do número de anúncios (o selectinload busca os
+    anúncios em lotes de 500 campanhas)
+    """
+    return db.query(Campaign).filter(criterion).options(
+        # Muitos-para-um: a conta vem no JOIN da própria consulta das campanhas
+        joinedload(Campaign.google_ads_account).load_only(GoogleAdsAccount.account_id, GoogleAdsAccount.name),
+        joinedload(Campaign.meta_ads_account).load_only(MetaAdsAccount.account_id, MetaAdsAccount.name),
+        # Um-para-muitos: um SELECT ... WHERE campaign_id IN (...) sem repetir
+        # as colunas da campanha em cada anúncio
+        selectinload(Campaign.ads),
+    ).order_by(Campaign.id).all()
+
+
+def _totals(model, entity_column, level: str, entity_filter, date_range: Optional[Tuple[date, date]]):
+    query = select(
+        literal(level).label("level"),
+        entity_column.label("entity_id"),
+        func.coalesce(func.sum(model.impressions), 0),
+        func.coalesce(func.sum(model.clicks), 0),
+        func.coalesce(func.sum(model.conversions), 0),
+        func.coalesce(func.sum(model.spend), 0.0),
+        # O ROAS é gravado por dia: o valor de conversão é ROAS × investimento
+        func.coalesce(func.sum(model.roas * model.spend), 0.0),
+    ).where(entity_filter).group_by(entity_column)
+    if date_range is not None:
+        start, end = date_range
+        query = query.where(
+            model.date >= datetime.combine(start, time.min),
+            model.date < datetime.combine(end + timedelta(days=1), time.min),
+        )
+    return query
+
+
+def get_metric_totals(db: Session, criterion, date_range: Optional[Tuple[date, date]] = None) -> MetricTotals:
+    """
+    Métricas somadas no período por campanha e por anúncio das campanhas do
+    critério, numa única consulta agrupada
+    """
+    campaign_ids = select(Campaign.id).where(criterion)
+    ad_ids = select(Ad.id).where(Ad.campaign_id.in_(campaign_ids))
+    query = union_all(
+        _totals(CampaignMetric, CampaignMetric.campaign_id, "campaign", CampaignMetric.campaign_id.in_(campaign_ids), date_range),
+        _totals(AdMetric, AdMetric.ad_id, "ad", AdMetric.ad_id.in_(ad_ids), date_range),
+    )
+    return {(level, entity_id): tuple(values) for level, entity_id, *values in db.execute(query)}
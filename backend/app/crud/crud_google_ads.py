@@ -1,7 +1,8 @@
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 
 from sqlalchemy.orm import Session
 
+from app.core.pagination import keyset_page, stream_by_id
 from app.models.models import GoogleAdsAccount
 from app.schemas.google_ads import GoogleAdsAccountCreate, GoogleAdsAccountUpdate
 
@@ -14,6 +15,16 @@ def get_google_ads_accounts_by_user(db: Session, user_id: int) -> List[GoogleAds
     return db.query(GoogleAdsAccount).filter(GoogleAdsAccount.user_id == user_id).all()
 
 
+def get_google_ads_accounts_page(
+    db: Session, *, cursor: Optional[str] = None, limit: int = 100
+) -> Tuple[List[GoogleAdsAccount], Optional[str]]:
+    return keyset_page(db.query(GoogleAdsAccount), GoogleAdsAccount.id, cursor, limit)
+
+
+def iter_google_ads_accounts(db: Session, batch_size: int = 500) -> Iterator[GoogleAdsAccount]:
+    return stream_by_id(db.query(GoogleAdsAccount), GoogleAdsAccount.id, batch_size)
+
+
 def create_google_ads_account(db: Session, account_in: GoogleAdsAccountCreate) -> GoogleAdsAccount:
     db_account = GoogleAdsAccount(
         account_id=account_in.account_id,
@@ -30,7 +41,7 @@ def create_google_ads_account(db: Session, account_in: GoogleAdsAccountCreate) -
 def update_google_ads_account(
     db: Session, *, db_account: GoogleAdsAccount, account_in: GoogleAdsAccountUpdate
 ) -> GoogleAdsAccount:
-    update_data = account_in.dict(exclude_unset=True)
+    update_data = account_in.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_account, field, value)
     db.add(db_account)
@@ -1,7 +1,8 @@
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 
 from sqlalchemy.orm import Session
 
+from app.core.pagination import keyset_page, stream_by_id
 from app.models.models import MetaAdsAccount
 from app.schemas.meta_ads import MetaAdsAccountCreate, MetaAdsAccountUpdate
 
@@ -14,6 +15,16 @@ def get_meta_ads_accounts_by_user(db: Session, user_id: int) -> List[MetaAdsAcco
     return db.query(MetaAdsAccount).filter(MetaAdsAccount.user_id == user_id).all()
 
 
+def get_meta_ads_accounts_page(
+    db: Session, *, cursor: Optional[str] = None, limit: int = 100
+) -> Tuple[List[MetaAdsAccount], Optional[str]]:
+    return keyset_page(db.query(MetaAdsAccount), MetaAdsAccount.id, cursor, limit)
+
+
+def iter_meta_ads_accounts(db: Session, batch_size: int = 500) -> Iterator[MetaAdsAccount]:
+    return stream_by_id(db.query(MetaAdsAccount), MetaAdsAccount.id, batch_size)
+
+
 def create_meta_ads_account(db: Session, account_in: MetaAdsAccountCreate) -> MetaAdsAccount:
     db_account = MetaAdsAccount(
         account_id=account_in.account_id,
@@ -30,7 +41,7 @@ def create_meta_ads_account(db: Session, account_in: MetaAdsAccountCreate) -> Me
 def update_meta_ads_account(
     db: Session, *, db_account: MetaAdsAccount, account_in: MetaAdsAccountUpdate
 ) -> MetaAdsAccount:
-    update_data = account_in.dict(exclude_unset=True)
+    update_data = account_in.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_account, field, value)
     db.add(db_account)
@@ -1,7 +1,8 @@
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from sqlalchemy.orm import Session
 
+from app.core.pagination import keyset_page
 from app.core.security import get_password_hash, verify_password
 from app.models.models import User
 from app.schemas.user import UserCreate, UserUpdate
@@ -15,8 +16,10 @@ def get_user_by_email(db: Session, email: str) -> Optional[User]:
     return db.query(User).filter(User.email == email).first()
 
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(User).offset(skip).limit(limit).all()
+def get_users(
+    db: Session, *, cursor: Optional[str] = None, limit: int = 100
+) -> Tuple[List[User], Optional[str]]:
+    return keyset_page(db.query(User), User.id, cursor, limit)
 
 
 def create_user(db: Session, user_in: UserCreate) -> User:
@@ -39,7 +42,7 @@ def update_user(
     if isinstance(user_in, dict):
         update_data = user_in
     else:
-        update_data = user_in.dict(exclude_unset=True)
+        update_data = user_in.model_dump(exclude_unset=True)
     if update_data.get("password"):
         hashed_password = get_password_hash(update_data["password"])
         del update_data["password"]
@@ -0,0 +1,190 @@
+import threading
+import time
+import weakref
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import NullPool, QueuePool
+
+from app.core.metrics import DB_POOL_CHECKOUT_TIMEOUTS, DB_POOL_CHECKOUT_WAIT, DB_POOL_IN_USE
+
+
+class PoolStats:
+    """
+    Métricas de um pool de conexões (writer ou réplica) no processo (worker)
+    atual, ligadas ao próprio pool: cada engine tem as suas
+    """
+
+    def __init__(self, role: str):
+        self.role = role
+        self._lock = threading.Lock()
+        self._in_use_gauge = DB_POOL_IN_USE.labels(role)
+        self._wait_histogram = DB_POOL_CHECKOUT_WAIT.labels(role)
+        self._timeouts_counter = DB_POOL_CHECKOUT_TIMEOUTS.labels(role)
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.checkout_timeouts = 0
+            self.wait_seconds_total = 0.0
+            self.wait_seconds_max = 0.0
+            self.in_use = 0
+            # O gauge acompanha in_use: após o fork as conexões herdadas do
+            # master não estão em uso no worker
+            self._in_use_gauge.set(0)
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        if timed_out:
+            self._timeouts_counter.inc()
+        else:
+            self._wait_histogram.observe(seconds)
+        with self._lock:
+            if timed_out:
+                self.checkout_timeouts += 1
+                return
+            self.checkouts += 1
+            self.wait_seconds_total += seconds
+            if seconds > self.wait_seconds_max:
+                self.wait_seconds_max = seconds
+
+    def add_in_use(self, delta: int) -> None:
+        self._in_use_gauge.inc(delta)
+        with self._lock:
+            self.in_use += delta
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "role": self.role,
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.checkout_timeouts,
+                "wait_seconds_total": self.wait_seconds_total,
+                "wait_seconds_max": self.wait_seconds_max,
+                "wait_seconds_avg": self.wait_seconds_total / self.checkouts if self.checkouts else 0.0,
+                "in_use": self.in_use,
+            }
+
+
+# Engine -> papel do pool (writer, replica-0...), definido por instrument_engine
+_engine_roles: "weakref.WeakKeyDictionary[Engine, str]" = weakref.WeakKeyDictionary()
+
+
+class _CheckoutTimingMixin:
+    # Atribuído por instrument_engine; None num pool criado fora de app.db.session
+    stats: Optional[PoolStats] = None
+
+    # _do_get é onde o pool espera por uma conexão livre (ou abre uma nova)
+    def _do_get(self):
+        if self.stats is None:
+            return super()._do_get()
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self.stats.record_wait(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() troca o pool: as métricas continuam no novo
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class InstrumentedQueuePool(_CheckoutTimingMixin, QueuePool):
+    pass
+
+
+class InstrumentedNullPool(_CheckoutTimingMixin, NullPool):
+    pass
+
+
+def _pgbouncer_connect_args(drivername: str) -> Dict[str, Any]:
+    """
+    Desativa prepared statements no servidor, incompatíveis com o modo
+    transaction pooling do PgBouncer (o backend muda a cada transação)
+    """
+    if drivername.endswith("+psycopg"):
+        return {"prepare_threshold": None}
+    if drivername.endswith("+asyncpg"):
+        return {"statement_cache_size": 0, "prepared_statement_cache_size": 0}
+    # psycopg2 não usa prepared statements no servidor
+    return {}
+
+
+def engine_options(settings: Any, database_uri: str) -> Dict[str, Any]:
+    """
+    Monta os argumentos do create_engine a partir das configurações de pool
+    """
+    url = make_url(database_uri)
+    if url.get_backend_name() == "sqlite":
+        # SQLite (desenvolvimento/testes) mantém o pool padrão do SQLAlchemy
+        return {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+
+    options: Dict[str, Any] = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if settings.DB_PGBOUNCER_MODE:
+        options["connect_args"] = _pgbouncer_connect_args(url.drivername)
+    if settings.DB_USE_NULLPOOL:
+        # Sem pool no processo: o PgBouncer faz o pooling
+        options["poolclass"] = InstrumentedNullPool
+    else:
+        options.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_use_lifo=True,
+        )
+    return options
+
+
+def engine_pool_stats(engine: Engine) -> PoolStats:
+    """
+    Métricas do pool atual do engine. Pools sem o mixin (ex.: SQLite) não
+    levam as métricas no recreate: um novo PoolStats é criado com o mesmo papel
+    """
+    pool = engine.pool
+    stats = getattr(pool, "stats", None)
+    if stats is None:
+        stats = pool.stats = PoolStats(_engine_roles.get(engine, "writer"))
+    return stats
+
+
+def instrument_engine(engine: Engine, role: str) -> None:
+    """
+    Liga ao pool do engine as métricas do papel (writer, replica-0...) e
+    registra os eventos que mantêm a contagem de conexões em uso
+    """
+    _engine_roles[engine] = role
+    engine.pool.stats = PoolStats(role)
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        engine_pool_stats(engine).add_in_use(1)
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        engine_pool_stats(engine).add_in_use(-1)
+
+
+def pool_status(engine: Engine) -> Dict[str, Any]:
+    """
+    Estado atual do pool do engine combinado com as métricas acumuladas dele
+    """
+    status = engine_pool_stats(engine).snapshot()
+    pool = engine.pool
+    status["pool_class"] = type(pool).__name__
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            idle=pool.checkedin(),
+        )
+    return status
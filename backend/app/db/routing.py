@@ -0,0 +1,222 @@
+import contextvars
+import itertools
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import Delete, Insert, Update, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from starlette.datastructures import MutableHeaders
+from starlette.requests import cookie_parser
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# Atraso de replicação no Postgres (0 quando a réplica aplicou todo o WAL recebido)
+_PG_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class ReplicaSet:
+    """
+    Réplicas de leitura com verificação periódica de atraso.
+
+    Réplicas com atraso acima de max_lag_seconds (ou inacessíveis) deixam de
+    receber leituras até a próxima verificação; sem réplica saudável a
+    leitura volta para o primário.
+    """
+
+    def __init__(self, engines: List[Engine], max_lag_seconds: float, check_interval_seconds: float):
+        self.engines = engines
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self._lag: Dict[int, float] = {}
+        self._checked_at: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._round_robin = itertools.cycle(range(len(engines))) if engines else None
+
+    def _measure_lag(self, engine: Engine) -> float:
+        if engine.dialect.name != "postgresql":
+            # Ex.: arquivos SQLite em testes locais não têm replicação
+            return 0.0
+        try:
+            with engine.connect() as connection:
+                return float(connection.execute(_PG_LAG_QUERY).scalar() or 0.0)
+        except Exception as e:
+            logger.warning(f"Réplica {engine.url.host} indisponível: {e}")
+            return float("inf")
+
+    def lag(self, index: int) -> float:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at.get(index, float("-inf")) < self.check_interval_seconds:
+                return self._lag[index]
+            # Marcar antes de medir para que só uma thread faça a consulta
+            self._checked_at[index] = now
+            self._lag.setdefault(index, 0.0)
+        lag = self._measure_lag(self.engines[index])
+        with self._lock:
+            self._lag[index] = lag
+        return lag
+
+    def pick(self) -> Optional[Engine]:
+        """
+        Escolhe a próxima réplica saudável (round-robin) ou None
+        """
+        if not self.engines:
+            return None
+        for _ in range(len(self.engines)):
+            index = next(self._round_robin)
+            if self.lag(index) <= self.max_lag_seconds:
+                return self.engines[index]
+        return None
+
+
+class RequestWrites:
+    """
+    Escritas vistas pela requisição atual, para leitura após escrita.
+
+    A última escrita do cliente vem no cookie READ_YOUR_WRITES_COOKIE (a
+    próxima requisição pode cair em outro worker ou outro servidor); as
+    escritas da própria requisição renovam o cookie na resposta.
+    """
+
+    __slots__ = ("window_seconds", "last_write", "wrote_at")
+
+    def __init__(self, window_seconds: float, last_write: Optional[float]):
+        self.window_seconds = window_seconds
+        self.last_write = last_write
+        self.wrote_at: Optional[float] = None
+
+    def wrote_recently(self) -> bool:
+        last_write = self.wrote_at or self.last_write
+        return last_write is not None and time.time() - last_write < self.window_seconds
+
+
+READ_YOUR_WRITES_COOKIE = "last_write"
+_request_writes: contextvars.ContextVar[Optional[RequestWrites]] = contextvars.ContextVar(
+    "request_writes", default=None
+)
+
+
+def _cookie_timestamp(scope: Scope) -> Optional[float]:
+    for name, value in scope["headers"]:
+        if name == b"cookie":
+            timestamp = cookie_parser(value.decode("latin-1")).get(READ_YOUR_WRITES_COOKIE)
+            try:
+                return float(timestamp) if timestamp else None
+            except ValueError:
+                return None
+    return None
+
+
+class ReadYourWritesMiddleware:
+    """
+    Disponibiliza a última escrita do cliente para use_replica e, se a
+    requisição escreveu no banco, devolve o cookie com o momento da escrita
+    (válido por window_seconds)
+    """
+
+    def __init__(self, app: ASGIApp, window_seconds: float):
+        self.app = app
+        self.window_seconds = window_seconds
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        writes = RequestWrites(self.window_seconds, _cookie_timestamp(scope))
+        token = _request_writes.set(writes)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and writes.wrote_at is not None:
+                MutableHeaders(scope=message).append(
+                    "set-cookie",
+                    f"{READ_YOUR_WRITES_COOKIE}={writes.wrote_at:.3f}; Max-Age={math.ceil(self.window_seconds)}; "
+                    "Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_writes.reset(token)
+
+
+class RoutingSession(Session):
+    """
+    Sessão que envia escritas ao primário e, quando marcada com
+    info["use_replica"], leituras a uma réplica escolhida uma vez por sessão
+    """
+
+    writer: Engine = None
+    replicas: ReplicaSet = None
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or isinstance(clause, (Insert, Update, Delete)):
+            return self.writer
+        # SELECT ... FOR UPDATE trava linhas: só o primário aceita
+        if getattr(clause, "_for_update_arg", None) is not None:
+            return self.writer
+        if not self.info.get("use_replica") or self.replicas is None:
+            return self.writer
+        if "replica" not in self.info:
+            self.info["replica"] = self.replicas.pick() or self.writer
+        return self.info["replica"]
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _remember_write(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _remember_dml(orm_execute_state):
+    # INSERT/UPDATE/DELETE via session.execute não passam pelo flush. Escritas
+    # com read_your_writes=False (ex.: o cache diário de métricas, que já é
+    # lido no primário) não mandam as leituras seguintes do cliente ao primário
+    if not orm_execute_state.execution_options.get("read_your_writes", True):
+        return
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _track_write(session):
+    if session.info.pop("wrote", False):
+        writes = _request_writes.get()
+        if writes is not None:
+            writes.wrote_at = time.time()
+
+
+def use_replica(session: Session) -> Session:
+    """
+    Marca a sessão para ler de uma réplica, exceto se o cliente escreveu
+    há pouco tempo (leitura após escrita no primário)
+    """
+    writes = _request_writes.get()
+    if writes is not None and writes.wrote_recently():
+        return session
+    session.info["use_replica"] = True
+    return session
+
+
+@contextmanager
+def on_primary(session: Session) -> Iterator[Session]:
+    """
+    Leituras do bloco no primário, mesmo numa sessão marcada com use_replica:
+    para leituras que decidem uma escrita e não podem ver dados atrasados
+    """
+    use_replica = session.info.pop("use_replica", False)
+    try:
+        yield session
+    finally:
+        if use_replica:
+            session.info["use_replica"] = True
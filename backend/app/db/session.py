@@ -2,6 +2,29 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.db.pool import engine_options, instrument_engine
+from app.db.routing import ReplicaSet, RoutingSession
 
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def _create_engine(database_uri: str, role: str):
+    new_engine = create_engine(database_uri, **engine_options(settings, database_uri))
+    instrument_engine(new_engine, role)
+    return new_engine
+
+
+engine = _create_engine(settings.SQLALCHEMY_DATABASE_URI, "writer")
+replica_engines = [
+    _create_engine(uri, f"replica-{index}") for index, uri in enumerate(settings.SQLALCHEMY_REPLICA_URIS)
+]
+
+
+class AppSession(RoutingSession):
+    writer = engine
+    replicas = ReplicaSet(
+        replica_engines,
+        max_lag_seconds=settings.DB_REPLICA_MAX_LAG_SECONDS,
+        check_interval_seconds=settings.DB_REPLICA_LAG_CHECK_SECONDS,
+    ) if replica_engines else None
+
+
+SessionLocal = sessionmaker(class_=AppSession, autocommit=False, autoflush=False)
@@ -1,20 +1,68 @@
+import threading
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.metrics import MetricsMiddleware, metrics_endpoint
+from app.core.profiling import ProfilingMiddleware, profile_store
+from app.core.serialization import FastJSONResponse
+from app.core.tracing import TracingMiddleware
+from app.db.routing import ReadYourWritesMiddleware
 # Importar rotas aqui quando forem criadas
-from app.routes import users, auth, google_ads, meta_ads #, campaigns
+from app.routes import users, auth, google_ads, meta_ads, dashboard, events, thumbnails, system, campaigns
+from app.services.warmup import warm_up_provider_sdks
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.PROVIDER_SDK_WARMUP:
+        # Em segundo plano, para não atrasar o boot do worker
+        threading.Thread(target=warm_up_provider_sdks, name="sdk-warmup", daemon=True).start()
+    yield
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan
+)
+
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    zstd_level=settings.COMPRESSION_ZSTD_LEVEL,
 )
+if settings.PROFILING_ENABLED:
+    app.add_middleware(
+        ProfilingMiddleware,
+        authorize=auth.is_admin_token,
+        store=profile_store,
+        interval_seconds=settings.PROFILING_INTERVAL_MS / 1000,
+        slowest_per_minute=settings.PROFILING_SLOWEST_PER_MINUTE,
+        default_format=settings.PROFILING_DEFAULT_FORMAT,
+    )
+if settings.TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware)
+app.add_middleware(ReadYourWritesMiddleware, window_seconds=settings.DB_READ_YOUR_WRITES_SECONDS)
+# Adicionado por último para ser o mais externo e medir a requisição inteira
+app.add_middleware(MetricsMiddleware)
+app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
 
 # Incluir roteadores aqui
 app.include_router(auth.router, prefix=f"{settings.API_V1_STR}/auth", tags=["auth"])
 app.include_router(users.router, prefix=f"{settings.API_V1_STR}/users", tags=["users"])
 app.include_router(google_ads.router, prefix=f"{settings.API_V1_STR}/google-ads", tags=["google-ads"])
 app.include_router(meta_ads.router, prefix=f"{settings.API_V1_STR}/meta-ads", tags=["meta-ads"])
-# app.include_router(campaigns.router, prefix=f"{settings.API_V1_STR}/campaigns", tags=["campaigns"])
+app.include_router(dashboard.router, prefix=f"{settings.API_V1_STR}/dashboard", tags=["dashboard"])
+app.include_router(events.router, prefix=f"{settings.API_V1_STR}/events", tags=["events"])
+app.include_router(thumbnails.router, prefix=f"{settings.API_V1_STR}/thumbnails", tags=["thumbnails"])
+app.include_router(system.router, prefix=f"{settings.API_V1_STR}/system", tags=["system"])
+app.include_router(campaigns.router, prefix=f"{settings.API_V1_STR}/campaigns", tags=["campaigns"])
 
 @app.get("/")
 async def root():
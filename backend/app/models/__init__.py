@@ -0,0 +1,13 @@
+from app.models.models import (
+    Base,
+    User,
+    GoogleAdsAccount,
+    MetaAdsAccount,
+    Campaign,
+    Ad,
+    CampaignMetric,
+    AdMetric,
+    CachedMetricDay,
+    CachedDailyMetric,
+    DashboardSnapshot,
+)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Float, DateTime, Text
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Float, DateTime, Text, Date, JSON, Index, LargeBinary, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -18,7 +18,7 @@ class User(Base):
     # Relacionamentos
     google_ads_accounts = relationship("GoogleAdsAccount", back_populates="user")
     meta_ads_accounts = relationship("MetaAdsAccount", back_populates="user")
-    campaigns = relationship("Campaign", back_populates="user")
+    campaigns = relationship("Campaign", back_populates="user", lazy="raise")
 
 class GoogleAdsAccount(Base):
     __tablename__ = "google_ads_accounts"
@@ -31,7 +31,7 @@ class GoogleAdsAccount(Base):
     
     # Relacionamentos
     user = relationship("User", back_populates="google_ads_accounts")
-    campaigns = relationship("Campaign", back_populates="google_ads_account")
+    campaigns = relationship("Campaign", back_populates="google_ads_account", lazy="raise")
 
 class MetaAdsAccount(Base):
     __tablename__ = "meta_ads_accounts"
@@ -44,10 +44,14 @@ class MetaAdsAccount(Base):
     
     # Relacionamentos
     user = relationship("User", back_populates="meta_ads_accounts")
-    campaigns = relationship("Campaign", back_populates="meta_ads_account")
+    campaigns = relationship("Campaign", back_populates="meta_ads_account", lazy="raise")
 
 class Campaign(Base):
     __tablename__ = "campaigns"
+    __table_args__ = (
+        Index("ix_campaigns_google_account_campaign", "google_ads_account_id", "campaign_id"),
+        Index("ix_campaigns_meta_account_campaign", "meta_ads_account_id", "campaign_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     campaign_id = Column(String, index=True)
@@ -60,13 +64,18 @@ class Campaign(Base):
     user_id = Column(Integer, ForeignKey("users.id"))
     google_ads_account_id = Column(Integer, ForeignKey("google_ads_accounts.id"), nullable=True)
     meta_ads_account_id = Column(Integer, ForeignKey("meta_ads_accounts.id"), nullable=True)
+    # Hash dos campos vindos do provedor (app/services/catalog_sync.py): a
+    # sincronização só regrava a linha quando ele muda
+    content_hash = Column(String(32), nullable=True)
     
-    # Relacionamentos
-    user = relationship("User", back_populates="campaigns")
-    google_ads_account = relationship("GoogleAdsAccount", back_populates="campaigns")
-    meta_ads_account = relationship("MetaAdsAccount", back_populates="campaigns")
-    ads = relationship("Ad", back_populates="campaign")
-    metrics = relationship("CampaignMetric", back_populates="campaign")
+    # Relacionamentos da árvore campanha → anúncio → métricas: lazy="raise"
+    # para que um N+1 acidental falhe; carregar com selectinload/joinedload
+    # (ex.: app/crud/crud_campaigns.py)
+    user = relationship("User", back_populates="campaigns", lazy="raise")
+    google_ads_account = relationship("GoogleAdsAccount", back_populates="campaigns", lazy="raise")
+    meta_ads_account = relationship("MetaAdsAccount", back_populates="campaigns", lazy="raise")
+    ads = relationship("Ad", back_populates="campaign", lazy="raise")
+    metrics = relationship("CampaignMetric", back_populates="campaign", lazy="raise")
 
 class Ad(Base):
     __tablename__ = "ads"
@@ -77,14 +86,18 @@ class Ad(Base):
     ad_group = Column(String, nullable=True)
     thumbnail_url = Column(String, nullable=True)
     ad_link = Column(String, nullable=True)
-    campaign_id = Column(Integer, ForeignKey("campaigns.id"))
+    campaign_id = Column(Integer, ForeignKey("campaigns.id"), index=True)
+    content_hash = Column(String(32), nullable=True)
     
     # Relacionamentos
-    campaign = relationship("Campaign", back_populates="ads")
-    metrics = relationship("AdMetric", back_populates="ad")
+    campaign = relationship("Campaign", back_populates="ads", lazy="raise")
+    metrics = relationship("AdMetric", back_populates="ad", lazy="raise")
 
 class CampaignMetric(Base):
     __tablename__ = "campaign_metrics"
+    __table_args__ = (
+        Index("ix_campaign_metrics_campaign_date", "campaign_id", "date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     date = Column(DateTime, default=datetime.utcnow)
@@ -100,10 +113,13 @@ class CampaignMetric(Base):
     campaign_id = Column(Integer, ForeignKey("campaigns.id"))
     
     # Relacionamentos
-    campaign = relationship("Campaign", back_populates="metrics")
+    campaign = relationship("Campaign", back_populates="metrics", lazy="raise")
 
 class AdMetric(Base):
     __tablename__ = "ad_metrics"
+    __table_args__ = (
+        Index("ix_ad_metrics_ad_date", "ad_id", "date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     date = Column(DateTime, default=datetime.utcnow)
@@ -119,4 +135,130 @@ class AdMetric(Base):
     ad_id = Column(Integer, ForeignKey("ads.id"))
     
     # Relacionamentos
-    ad = relationship("Ad", back_populates="metrics")
+    ad = relationship("Ad", back_populates="metrics", lazy="raise")
+
+# Cache diário de métricas (app/services/metrics_cache.py): dias já buscados no
+# provedor para cada escopo (provedor, conta, nível e filtro), inclusive dias sem linhas
+class CachedMetricDay(Base):
+    __tablename__ = "cached_metric_days"
+    __table_args__ = (
+        UniqueConstraint("provider", "account_id", "level", "scope", "date", name="uq_cached_metric_days_scope_date"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    provider = Column(String, nullable=False)  # google, meta
+    account_id = Column(String, nullable=False)
+    level = Column(String, nullable=False)  # campaign, ad
+    scope = Column(String, nullable=False, default="")  # ex.: id da campanha dos anúncios
+    date = Column(Date, nullable=False)
+    # Dia já fechado (fora da janela de atribuição) quando foi buscado: não muda mais
+    closed = Column(Boolean, default=False, nullable=False)
+    fetched_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Dia compactado (app/services/metrics_retention.py): as linhas diárias foram
+    # substituídas pelos agregados desta granularidade (week, month) em cached_metric_rollups
+    rollup_grain = Column(String, nullable=True)
+
+# Métricas de um dia de uma campanha ou anúncio no cache diário
+class CachedDailyMetric(Base):
+    __tablename__ = "cached_daily_metrics"
+    __table_args__ = (
+        UniqueConstraint("provider", "account_id", "level", "scope", "entity_id", "date", name="uq_cached_daily_metrics_entity_date"),
+        Index("ix_cached_daily_metrics_scope_date", "provider", "account_id", "level", "scope", "date"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    provider = Column(String, nullable=False)
+    account_id = Column(String, nullable=False)
+    level = Column(String, nullable=False)
+    scope = Column(String, nullable=False, default="")
+    entity_id = Column(String, nullable=False)
+    date = Column(Date, nullable=False)
+    impressions = Column(Integer, default=0)
+    clicks = Column(Integer, default=0)
+    conversions = Column(Float, default=0.0)
+    spend = Column(Float, default=0.0)
+    conversion_value = Column(Float, default=0.0)
+    # Nome, status, URLs etc. vistos naquele dia
+    attributes = Column(JSON, default=dict)
+
+# Agregados semanais ou mensais das linhas diárias antigas de um escopo do
+# cache diário, gerados pela compactação (app/services/metrics_retention.py)
+class CachedMetricRollup(Base):
+    __tablename__ = "cached_metric_rollups"
+    __table_args__ = (
+        UniqueConstraint("provider", "account_id", "level", "scope", "grain", "period_start", "entity_id", name="uq_cached_metric_rollups_entity_period"),
+        Index("ix_cached_metric_rollups_scope_period", "provider", "account_id", "level", "scope", "period_start"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    provider = Column(String, nullable=False)
+    account_id = Column(String, nullable=False)
+    level = Column(String, nullable=False)
+    scope = Column(String, nullable=False, default="")
+    entity_id = Column(String, nullable=False)
+    grain = Column(String, nullable=False)  # week, month
+    period_start = Column(Date, nullable=False)
+    period_end = Column(Date, nullable=False)
+    # Dias do período já compactados no escopo (base do rateio em consultas parciais)
+    days = Column(Integer, default=0, nullable=False)
+    impressions = Column(Integer, default=0)
+    clicks = Column(Integer, default=0)
+    conversions = Column(Float, default=0.0)
+    spend = Column(Float, default=0.0)
+    conversion_value = Column(Float, default=0.0)
+    # Atributos do dia mais recente compactado (last_date)
+    attributes = Column(JSON, default=dict)
+    last_date = Column(Date, nullable=True)
+
+# Dashboard inicial pré-calculado de cada usuário por período
+# (app/services/dashboard_snapshots.py): o JSON já serializado, regenerado ao
+# fim da sincronização das contas e servido por uma leitura pela chave primária
+class DashboardSnapshot(Base):
+    __tablename__ = "dashboard_snapshots"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    preset = Column(String, primary_key=True)  # today, yesterday, last_7_days, last_30_days
+    payload = Column(LargeBinary, nullable=False)
+    etag = Column(String, nullable=False)
+    generated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+# Estado de tamanho fixo de cada série diária monitorada pelo detector de
+# anomalias (app/services/anomaly_detection.py): média e variância
+# exponenciais e ajuste por dia da semana, atualizados a cada dia ingerido
+class MetricSeriesState(Base):
+    __tablename__ = "metric_series_state"
+    
+    provider = Column(String, primary_key=True)
+    account_id = Column(String, primary_key=True)
+    level = Column(String, primary_key=True)  # campaign, ad
+    entity_id = Column(String, primary_key=True)
+    metric = Column(String, primary_key=True)  # spend, ctr
+    points = Column(Integer, default=0, nullable=False)
+    mean = Column(Float, default=0.0, nullable=False)
+    variance = Column(Float, default=0.0, nullable=False)
+    # Desvio de cada dia da semana (segunda a domingo) em relação à média
+    seasonal = Column(JSON, nullable=False)
+    # Último dia fechado aprendido: dias anteriores não atualizam mais o estado
+    last_date = Column(Date, nullable=True)
+
+# Pontos de uma série que desviaram do esperado (alta do gasto, queda do CTR);
+# dias ainda abertos são reavaliados e o registro substituído a cada busca
+class MetricAnomaly(Base):
+    __tablename__ = "metric_anomalies"
+    __table_args__ = (
+        UniqueConstraint("provider", "account_id", "level", "entity_id", "metric", "date", name="uq_metric_anomalies_series_date"),
+        Index("ix_metric_anomalies_account_date", "provider", "account_id", "date"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    provider = Column(String, nullable=False)
+    account_id = Column(String, nullable=False)
+    level = Column(String, nullable=False)
+    entity_id = Column(String, nullable=False)
+    metric = Column(String, nullable=False)
+    date = Column(Date, nullable=False)
+    kind = Column(String, nullable=False)  # spike, drop
+    value = Column(Float, nullable=False)
+    expected = Column(Float, nullable=False)
+    score = Column(Float, nullable=False)  # desvios-padrão em relação ao esperado
+    detected_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -5,12 +5,14 @@ from datetime import timedelta
 from typing import Any
 
 from app.core.config import settings
+from app.core.profiling import ProfiledRoute
 from app.core.security import create_access_token
+from app.db.routing import use_replica
 from app.db.session import SessionLocal
 from app.crud import crud_user
 from app.schemas.user import Token, User
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
@@ -46,6 +48,13 @@ def get_current_user(
         raise credentials_exception
     return user
 
+def get_read_db(db: Session = Depends(get_db)) -> Session:
+    """
+    Sessão para endpoints somente leitura: as consultas vão para uma réplica,
+    salvo logo após uma escrita do mesmo cliente ou se as réplicas atrasarem
+    """
+    return use_replica(db)
+
 def get_current_active_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
@@ -62,6 +71,20 @@ def get_current_active_admin(
         )
     return current_user
 
+def is_admin_token(token: str) -> bool:
+    """
+    Valida um token de administrador fora da injeção de dependências
+    (ex.: em middlewares)
+    """
+    db = SessionLocal()
+    try:
+        get_current_active_admin(get_current_active_user(get_current_user(db, token)))
+    except HTTPException:
+        return False
+    finally:
+        db.close()
+    return True
+
 @router.post("/login", response_model=Token)
 def login_access_token(
     db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()
@@ -0,0 +1,93 @@
+from datetime import date
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app import crud, models, schemas
+from app.core.profiling import ProfiledRoute
+from app.core.serialization import FastJSONResponse
+from app.crud.crud_campaigns import MetricTotals
+from app.routes import auth
+from app.services import metrics_cache, thumbnails
+from app.services.dashboard_snapshots import derived_metrics
+from app.services.metrics_cache import InvalidDateRange
+
+router = APIRouter(route_class=ProfiledRoute)
+
+_NO_METRICS = (0, 0, 0.0, 0.0, 0.0)
+
+
+def _check_account(account, current_user: models.User, name: str) -> None:
+    if not account:
+        raise HTTPException(status_code=404, detail=f"Conta {name} não encontrada")
+    if account.user_id != current_user.id and not crud.crud_user.is_admin(current_user):
+        raise HTTPException(status_code=403, detail="Sem permissão para acessar esta conta")
+
+
+def _campaign_node(campaign: models.Campaign, totals: MetricTotals) -> dict:
+    account = campaign.google_ads_account or campaign.meta_ads_account
+    return {
+        "id": campaign.id,
+        "campaign_id": campaign.campaign_id,
+        "name": campaign.name,
+        "status": campaign.status,
+        "channel": campaign.channel,
+        "start_date": campaign.start_date,
+        "end_date": campaign.end_date,
+        "account_id": account.account_id if account else None,
+        "account_name": account.name if account else None,
+        **derived_metrics(*totals.get(("campaign", campaign.id), _NO_METRICS)),
+        "ads": [
+            {
+                "id": ad.id,
+                "ad_id": ad.ad_id,
+                "name": ad.name,
+                "ad_group": ad.ad_group,
+                "thumbnail_url": thumbnails.proxy_url(ad.thumbnail_url),
+                "ad_link": ad.ad_link,
+                **derived_metrics(*totals.get(("ad", ad.id), _NO_METRICS)),
+            }
+            for ad in campaign.ads
+        ],
+    }
+
+
+@router.get("/tree", response_model=schemas.campaigns.CampaignTree)
+def read_campaign_tree(
+    google_account_id: Optional[int] = None,
+    meta_account_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(auth.get_read_db),
+    current_user: models.User = Depends(auth.get_current_active_user)
+) -> Any:
+    """
+    Retorna a árvore campanha → anúncio gravada no banco, com as métricas
+    somadas no período (sem start_date, todo o histórico gravado)
+
+    Sem contas informadas, inclui todas as campanhas do usuário atual. São
+    três consultas qualquer que seja o tamanho da árvore: campanhas com as
+    contas, anúncios e métricas agrupadas por entidade
+
+    A árvore é serializada direto com orjson: response_model fica só para a
+    documentação, sem validar cada nó
+    """
+    try:
+        date_range = metrics_cache.resolve_date_range(start_date, end_date)
+    except InvalidDateRange as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if google_account_id is not None:
+        _check_account(crud.crud_google_ads.get_google_ads_account(db, google_account_id), current_user, "Google Ads")
+    if meta_account_id is not None:
+        _check_account(crud.crud_meta_ads.get_meta_ads_account(db, meta_account_id), current_user, "Meta Ads")
+
+    criterion = crud.crud_campaigns.campaign_filter(current_user.id, google_account_id, meta_account_id)
+    campaigns = crud.crud_campaigns.get_campaign_tree(db, criterion)
+    totals = crud.crud_campaigns.get_metric_totals(db, criterion, date_range) if campaigns else {}
+    return FastJSONResponse({
+        "start_date": date_range[0] if date_range else None,
+        "end_date": date_range[1] if date_range else None,
+        "campaigns": [_campaign_node(campaign, totals) for campaign in campaigns],
+    })
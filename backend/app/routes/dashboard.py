@@ -0,0 +1,121 @@
+import threading
+from datetime import timedelta
+from typing import Any, List, Set
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.orm import Session
+
+from app import crud, models, schemas
+from app.core.conditional import etag_matches
+from app.core.profiling import ProfiledRoute
+from app.db.session import SessionLocal
+from app.routes import auth
+from app.services import anomaly_detection, dashboard_snapshots, metrics_cache, sync_service
+
+router = APIRouter(route_class=ProfiledRoute)
+
+PRESET_PATTERN = "^(" + "|".join(dashboard_snapshots.DATE_PRESETS) + ")$"
+
+# Usuários com sincronização em andamento neste processo: cliques repetidos em
+# "sincronizar" não disparam outra rodada sobre as mesmas contas
+_syncing_users: Set[int] = set()
+_syncing_lock = threading.Lock()
+
+
+def _sync_user_in_background(user_id: int) -> None:
+    """
+    Sincroniza as contas com uma sessão própria: a da requisição já foi
+    encerrada quando a tarefa em segundo plano roda
+    """
+    db = SessionLocal()
+    try:
+        sync_service.sync_user_accounts(db, user_id)
+    finally:
+        db.close()
+        with _syncing_lock:
+            _syncing_users.discard(user_id)
+
+
+@router.get(
+    "/snapshot",
+    response_model=schemas.dashboard.DashboardSnapshot,
+    responses={304: {"description": "Snapshot não mudou (If-None-Match)"}},
+)
+def read_dashboard_snapshot(
+    request: Request,
+    preset: str = Query("last_7_days", pattern=PRESET_PATTERN),
+    db: Session = Depends(auth.get_read_db),
+    current_user: models.User = Depends(auth.get_current_active_user)
+) -> Any:
+    """
+    Retorna o dashboard inicial do usuário atual para o período (preset)
+
+    O snapshot é regenerado ao fim de cada sincronização das contas do
+    usuário e servido como foi gravado, por uma leitura pela chave primária
+    """
+    snapshot = dashboard_snapshots.get_snapshot(db, current_user.id, preset)
+    if snapshot is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Dashboard ainda não gerado; sincronize as contas em POST /dashboard/sync"
+        )
+    headers = {"ETag": snapshot.etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None and etag_matches(if_none_match, snapshot.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=snapshot.payload, media_type="application/json", headers=headers)
+
+
+@router.post("/sync", response_model=schemas.dashboard.DashboardSyncStarted, status_code=202)
+def sync_dashboard(
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(auth.get_db),
+    current_user: models.User = Depends(auth.get_current_active_user)
+) -> Any:
+    """
+    Sincroniza em segundo plano as contas do usuário atual; o dashboard é
+    regenerado ao fim da sincronização de cada conta
+
+    Se uma sincronização do usuário já estiver em andamento, nenhuma outra
+    é iniciada (already_running)
+    """
+    accounts = (
+        len(crud.crud_google_ads.get_google_ads_accounts_by_user(db, current_user.id))
+        + len(crud.crud_meta_ads.get_meta_ads_accounts_by_user(db, current_user.id))
+    )
+    with _syncing_lock:
+        already_running = current_user.id in _syncing_users
+        _syncing_users.add(current_user.id)
+    if not already_running:
+        background_tasks.add_task(_sync_user_in_background, current_user.id)
+    return {"accounts": accounts, "already_running": already_running}
+
+
+@router.get("/anomalies", response_model=List[schemas.dashboard.MetricAnomaly])
+def read_anomalies(
+    days: int = Query(7, ge=1, le=90),
+    db: Session = Depends(auth.get_read_db),
+    current_user: models.User = Depends(auth.get_current_active_user)
+) -> Any:
+    """
+    Anomalias de gasto (altas) e CTR (quedas) detectadas nas campanhas e
+    anúncios das contas do usuário atual nos últimos dias
+    """
+    since = metrics_cache.utc_today() - timedelta(days=days - 1)
+    scopes = dashboard_snapshots.user_scopes(db, current_user.id)
+    return [
+        {
+            "channel": anomaly.provider,
+            "account_id": anomaly.account_id,
+            "level": anomaly.level,
+            "entity_id": anomaly.entity_id,
+            "metric": anomaly.metric,
+            "date": anomaly.date,
+            "kind": anomaly.kind,
+            "value": anomaly.value,
+            "expected": anomaly.expected,
+            "score": anomaly.score,
+            "detected_at": anomaly.detected_at,
+        }
+        for anomaly in anomaly_detection.list_anomalies(db, scopes, since)
+    ]
@@ -0,0 +1,119 @@
+from typing import Any, AsyncIterator, Dict, List, Set, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.core import events
+from app.core.config import settings
+from app.core.profiling import ProfiledRoute
+from app.core.serialization import dumps
+from app.routes import auth
+from app.services import live_updates  # noqa: F401 (publica as mudanças do cache de respostas)
+
+router = APIRouter(route_class=ProfiledRoute)
+
+# Espera sugerida ao EventSource antes de reconectar (ms)
+RETRY_MS = 3000
+
+
+def get_allowed_accounts(
+    google_account_id: List[int] = Query([]),
+    meta_account_id: List[int] = Query([]),
+    db: Session = Depends(auth.get_read_db),
+    current_user: models.User = Depends(auth.get_current_active_user)
+) -> Set[Tuple[str, int]]:
+    """
+    Contas cujos eventos a conexão recebe: as informadas (após verificar o
+    acesso) ou, sem nenhuma, todas as do usuário
+
+    Dependência síncrona: o FastAPI a executa no threadpool, fora do event
+    loop do endpoint de streaming
+    """
+    try:
+        return _allowed_accounts(db, current_user, google_account_id, meta_account_id)
+    finally:
+        # A conexão SSE fica aberta indefinidamente: devolver a sessão ao pool já
+        db.close()
+
+
+def _allowed_accounts(
+    db: Session,
+    current_user: models.User,
+    google_account_ids: List[int],
+    meta_account_ids: List[int],
+) -> Set[Tuple[str, int]]:
+    if not google_account_ids and not meta_account_ids:
+        return (
+            {("google", account.id) for account in crud.crud_google_ads.get_google_ads_accounts_by_user(db, current_user.id)}
+            | {("meta", account.id) for account in crud.crud_meta_ads.get_meta_ads_accounts_by_user(db, current_user.id)}
+        )
+    is_admin = crud.crud_user.is_admin(current_user)
+    allowed = set()
+    for account_id in google_account_ids:
+        account = crud.crud_google_ads.get_google_ads_account(db, account_id)
+        if not account:
+            raise HTTPException(status_code=404, detail="Conta Google Ads não encontrada")
+        if account.user_id != current_user.id and not is_admin:
+            raise HTTPException(status_code=403, detail="Sem permissão para acessar esta conta")
+        allowed.add(("google", account.id))
+    for account_id in meta_account_ids:
+        account = crud.crud_meta_ads.get_meta_ads_account(db, account_id)
+        if not account:
+            raise HTTPException(status_code=404, detail="Conta Meta Ads não encontrada")
+        if account.user_id != current_user.id and not is_admin:
+            raise HTTPException(status_code=403, detail="Sem permissão para acessar esta conta")
+        allowed.add(("meta", account.id))
+    return allowed
+
+
+def _format_event(event: Dict[str, Any]) -> bytes:
+    return b"event: " + event["type"].encode() + b"\ndata: " + dumps(event) + b"\n\n"
+
+
+async def _event_stream(subscription: events.Subscription) -> AsyncIterator[bytes]:
+    try:
+        yield f"retry: {RETRY_MS}\n\n".encode()
+        while True:
+            event = await subscription.get(settings.EVENTS_KEEPALIVE_SECONDS)
+            # Comentário periódico mantém a conexão aberta em proxies e
+            # detecta clientes desconectados
+            yield b": keepalive\n\n" if event is None else _format_event(event)
+    finally:
+        events.get_broker().unsubscribe(subscription)
+
+
+@router.get("/stream", responses={200: {"content": {"text/event-stream": {}}}})
+async def stream_events(
+    allowed: Set[Tuple[str, int]] = Depends(get_allowed_accounts),
+    current_user: models.User = Depends(auth.get_current_active_user)
+) -> Any:
+    """
+    Stream SSE (text/event-stream) com as mudanças das contas do usuário
+    atual, no lugar do polling dos endpoints de campanhas e anúncios
+
+    Eventos:
+    - rows: linhas de campanhas ou anúncios novas/alteradas ("rows") e ids
+      removidos ("removed") de uma conta e período; aplicar por id
+    - dashboard: snapshots do dashboard regenerados ("etags" por preset)
+    - resync: eventos podem ter sido perdidos; recarregar os dados exibidos
+
+    Parâmetros repetíveis google_account_id / meta_account_id restringem as
+    contas (ids do banco); sem eles, todas as contas do usuário
+    """
+    user_id = current_user.id
+
+    def matches(event: Dict[str, Any]) -> bool:
+        if event["type"] == "rows":
+            return (event["provider"], event["account_id"]) in allowed
+        if event["type"] == "dashboard":
+            return event["user_id"] == user_id
+        return False
+
+    subscription = events.get_broker().subscribe(matches)
+    return StreamingResponse(
+        _event_stream(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,22 +1,36 @@
-from typing import Any, List
+from datetime import date
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.routes import auth
+from app.schemas.metrics import AdRow, CampaignRow, ClientCampaignsRow, CustomerClientRow
+from app.core.conditional import conditional_response, payload_cache
 from app.core.config import settings
+from app.core.pagination import InvalidCursor, stream_json_array
+from app.core.profiling import ProfiledRoute
+from app.db.routing import use_replica
+from app.db.session import SessionLocal
+from app.services import metrics_cache, thumbnails
 from app.services.google_ads_service import GoogleAdsService
+from app.services.metrics_cache import InvalidDateRange, MetricsScope
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 def get_google_ads_service(
     db: Session = Depends(auth.get_db),
     account_id: int = None,
-    current_user: models.User = Depends(auth.get_current_active_user)
+    current_user: models.User = Depends(auth.get_current_active_user),
+    login_customer_id: Optional[str] = None
 ) -> GoogleAdsService:
     """
     Cria uma instância do serviço Google Ads com as credenciais apropriadas
+
+    login_customer_id é a conta de administrador (MCC) pela qual as contas
+    clientes são acessadas
     """
     # Se account_id for fornecido, usar as credenciais dessa conta específica
     if account_id:
@@ -38,22 +52,56 @@ def get_google_ads_service(
             client_id=settings.GOOGLE_ADS_CLIENT_ID,
             client_secret=settings.GOOGLE_ADS_CLIENT_SECRET,
             developer_token=settings.GOOGLE_ADS_DEVELOPER_TOKEN,
-            refresh_token=refresh_token
+            refresh_token=refresh_token,
+            login_customer_id=login_customer_id,
+            api_url=settings.GOOGLE_ADS_API_URL
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao inicializar serviço Google Ads: {str(e)}")
 
+def _stream_all_google_ads_accounts():
+    """
+    Gera a listagem completa de contas como JSON, lote a lote.
+
+    Usa uma sessão própria, pois o gerador continua executando depois que a
+    dependência get_db já encerrou a sessão da requisição.
+    """
+    db = use_replica(SessionLocal())
+    try:
+        accounts = crud.crud_google_ads.iter_google_ads_accounts(db)
+        yield from stream_json_array(
+            accounts, lambda account: schemas.GoogleAdsAccount.model_validate(account).model_dump_json()
+        )
+    finally:
+        db.close()
+
 @router.get("/accounts", response_model=List[schemas.GoogleAdsAccount])
 def read_google_ads_accounts(
-    db: Session = Depends(auth.get_db),
+    response: Response,
+    db: Session = Depends(auth.get_read_db),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    stream: bool = False,
     current_user: models.User = Depends(auth.get_current_active_user)
 ) -> Any:
     """
     Retorna todas as contas Google Ads do usuário atual
+
+    Para administradores a listagem é paginada por cursor (X-Next-Cursor)
+    ou, com stream=true, transmitida integralmente em lotes.
     """
     if crud.crud_user.is_admin(current_user):
         # Administradores podem ver todas as contas
-        accounts = db.query(models.GoogleAdsAccount).all()
+        if stream:
+            return StreamingResponse(_stream_all_google_ads_accounts(), media_type="application/json")
+        try:
+            accounts, next_cursor = crud.crud_google_ads.get_google_ads_accounts_page(
+                db, cursor=cursor, limit=limit
+            )
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
     else:
         # Usuários normais só veem suas próprias contas
         accounts = crud.crud_google_ads.get_google_ads_accounts_by_user(db, current_user.id)
@@ -91,15 +139,26 @@ def create_google_ads_account(
     account = crud.crud_google_ads.create_google_ads_account(db=db, account_in=account_in)
     return account
 
-@router.get("/campaigns/{account_id}")
+@router.get("/campaigns/{account_id}", response_model=List[CampaignRow])
 def read_google_ads_campaigns(
     account_id: int,
-    db: Session = Depends(auth.get_db),
+    request: Request,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(auth.get_read_db),
     current_user: models.User = Depends(auth.get_current_active_user)
 ) -> Any:
     """
     Retorna as campanhas do Google Ads para uma conta específica
+
+    Com start_date (e opcionalmente end_date), as métricas são do período e
+    vêm do cache diário, que busca no Google Ads apenas os dias faltantes
     """
+    try:
+        date_range = metrics_cache.resolve_date_range(start_date, end_date)
+    except InvalidDateRange as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     # Obter a conta do banco de dados
     account = crud.crud_google_ads.get_google_ads_account(db, account_id)
     if not account:
@@ -112,27 +171,50 @@ def read_google_ads_campaigns(
             detail="Sem permissão para acessar esta conta"
         )
     
-    # Inicializar o serviço e obter as campanhas
-    try:
-        service = get_google_ads_service(db, account_id, current_user)
-        campaigns = service.get_campaigns(account.account_id)
-        return campaigns
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Erro ao obter campanhas: {str(e)}"
-        )
+    # Inicializar o serviço e obter as campanhas (somente se o cache não responder)
+    def fetch_campaigns():
+        try:
+            if date_range:
+                rows = metrics_cache.daily_rows(
+                    db,
+                    MetricsScope("google", account.account_id, "campaign"),
+                    *date_range,
+                    lambda start, end: get_google_ads_service(db, account_id, current_user).get_campaign_daily_metrics(
+                        account.account_id, start, end
+                    ),
+                )
+                return metrics_cache.campaigns_from_daily(rows, "google")
+            service = get_google_ads_service(db, account_id, current_user)
+            return service.get_campaigns(account.account_id)
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Erro ao obter campanhas: {str(e)}"
+            )
+
+    return conditional_response(request, ("google-ads", "campaigns", account.id, date_range), fetch_campaigns)
 
-@router.get("/ads/{account_id}/{campaign_id}")
+@router.get("/ads/{account_id}/{campaign_id}", response_model=List[AdRow])
 def read_google_ads_ads(
     account_id: int,
     campaign_id: str,
-    db: Session = Depends(auth.get_db),
+    request: Request,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(auth.get_read_db),
     current_user: models.User = Depends(auth.get_current_active_user)
 ) -> Any:
     """
     Retorna os anúncios do Google Ads para uma campanha específica
+
+    Com start_date (e opcionalmente end_date), as métricas são do período e
+    vêm do cache diário, que busca no Google Ads apenas os dias faltantes
     """
+    try:
+        date_range = metrics_cache.resolve_date_range(start_date, end_date)
+    except InvalidDateRange as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     # Obter a conta do banco de dados
     account = crud.crud_google_ads.get_google_ads_account(db, account_id)
     if not account:
@@ -145,25 +227,125 @@ def read_google_ads_ads(
             detail="Sem permissão para acessar esta conta"
         )
     
-    # Inicializar o serviço e obter os anúncios
-    try:
-        service = get_google_ads_service(db, account_id, current_user)
-        
-        # Primeiro, obter os grupos de anúncios da campanha
-        ad_groups = service.get_ad_groups(account.account_id, campaign_id)
-        
-        # Depois, obter os anúncios para cada grupo
-        all_ads = []
-        for ad_group in ad_groups:
-            ads = service.get_ads(account.account_id, ad_group["id"])
-            # Adicionar informação do grupo de anúncios a cada anúncio
-            for ad in ads:
-                ad["ad_group"] = ad_group["name"]
-            all_ads.extend(ads)
-        
-        return all_ads
-    except Exception as e:
+    # Inicializar o serviço e obter os anúncios (somente se o cache não responder)
+    def fetch_ads():
+        try:
+            if date_range:
+                rows = metrics_cache.daily_rows(
+                    db,
+                    MetricsScope("google", account.account_id, "ad", campaign_id),
+                    *date_range,
+                    lambda start, end: get_google_ads_service(db, account_id, current_user).get_ad_daily_metrics(
+                        account.account_id, campaign_id, start, end
+                    ),
+                )
+                return thumbnails.proxy_ads(metrics_cache.ads_from_daily(rows, "google"))
+            service = get_google_ads_service(db, account_id, current_user)
+            
+            # Primeiro, obter os grupos de anúncios da campanha
+            ad_groups = service.get_ad_groups(account.account_id, campaign_id)
+            
+            # Depois, obter os anúncios para cada grupo
+            all_ads = []
+            for ad_group in ad_groups:
+                ads = service.get_ads(account.account_id, ad_group.id)
+                # Adicionar informação do grupo de anúncios a cada anúncio
+                for ad in ads:
+                    ad.ad_group = ad_group.name
+                all_ads.extend(ads)
+            
+            return thumbnails.proxy_ads(all_ads)
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Erro ao obter anúncios: {str(e)}"
+            )
+
+    return conditional_response(request, ("google-ads", "ads", account.id, campaign_id, date_range), fetch_ads)
+
+@router.get("/clients/{account_id}", response_model=List[CustomerClientRow])
+def read_google_ads_customer_clients(
+    account_id: int,
+    request: Request,
+    refresh: bool = False,
+    db: Session = Depends(auth.get_read_db),
+    current_user: models.User = Depends(auth.get_current_active_user)
+) -> Any:
+    """
+    Retorna a hierarquia de contas de uma conta de administrador (MCC)
+
+    A hierarquia fica em cache; refresh=true a busca novamente (ex.: depois
+    de vincular uma nova conta cliente). Os caches são por worker: refresh
+    atualiza só o worker que atendeu a requisição, os outros continuam com a
+    versão anterior até expirar (GOOGLE_ADS_HIERARCHY_CACHE_SECONDS e
+    DASHBOARD_CACHE_TTL_SECONDS)
+    """
+    # Obter a conta do banco de dados
+    account = crud.crud_google_ads.get_google_ads_account(db, account_id)
+    if not account:
+        raise HTTPException(status_code=404, detail="Conta Google Ads não encontrada")
+    
+    # Verificar permissões
+    if account.user_id != current_user.id and not crud.crud_user.is_admin(current_user):
         raise HTTPException(
-            status_code=500,
-            detail=f"Erro ao obter anúncios: {str(e)}"
+            status_code=403,
+            detail="Sem permissão para acessar esta conta"
         )
+
+    def fetch_clients():
+        try:
+            service = get_google_ads_service(db, account_id, current_user, login_customer_id=account.account_id)
+            return service.get_customer_clients(account.account_id, refresh=refresh)
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Erro ao obter contas clientes: {str(e)}"
+            )
+
+    key = ("google-ads", "clients", account.id)
+    if refresh:
+        payload_cache.invalidate(key)
+    return conditional_response(request, key, fetch_clients)
+
+@router.get("/clients/{account_id}/campaigns", response_model=List[ClientCampaignsRow])
+def read_google_ads_client_campaigns(
+    account_id: int,
+    request: Request,
+    refresh: bool = False,
+    db: Session = Depends(auth.get_read_db),
+    current_user: models.User = Depends(auth.get_current_active_user)
+) -> Any:
+    """
+    Retorna as campanhas de todas as contas clientes de uma conta de
+    administrador (MCC), consultadas em paralelo
+
+    Contas clientes com erro vêm sem campanhas e com o campo error
+    preenchido, sem falhar a resposta inteira. refresh=true, como na
+    hierarquia, só vale para o worker que atendeu a requisição
+    """
+    # Obter a conta do banco de dados
+    account = crud.crud_google_ads.get_google_ads_account(db, account_id)
+    if not account:
+        raise HTTPException(status_code=404, detail="Conta Google Ads não encontrada")
+    
+    # Verificar permissões
+    if account.user_id != current_user.id and not crud.crud_user.is_admin(current_user):
+        raise HTTPException(
+            status_code=403,
+            detail="Sem permissão para acessar esta conta"
+        )
+
+    def fetch_client_campaigns():
+        try:
+            service = get_google_ads_service(db, account_id, current_user, login_customer_id=account.account_id)
+            return service.get_client_campaigns(account.account_id, refresh=refresh)
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Erro ao obter campanhas das contas clientes: {str(e)}"
+            )
+
+    key = ("google-ads", "client-campaigns", account.id)
+    if refresh:
+        payload_cache.invalidate(key)
+    return conditional_response(request, key, fetch_client_campaigns)
@@ -1,14 +1,25 @@
-from typing import Any, List
+from datetime import date
+from typing import Any, List, Optional, Tuple
+from urllib.parse import urlencode
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.routes import auth
+from app.schemas.metrics import AdRow, CampaignRow
+from app.core.conditional import conditional_response
 from app.core.config import settings
-from app.services.meta_ads_service import MetaAdsService
+from app.core.pagination import InvalidCursor, stream_json_array
+from app.core.profiling import ProfiledRoute
+from app.db.routing import use_replica
+from app.db.session import SessionLocal
+from app.services import metrics_cache, thumbnails
+from app.services.meta_ads_service import MetaAdsService, ReportFailed, ReportPending, ReportRunStatus
+from app.services.metrics_cache import InvalidDateRange, MetricsScope
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 def get_meta_ads_service(
     db: Session = Depends(auth.get_db),
@@ -37,22 +48,55 @@ def get_meta_ads_service(
         return MetaAdsService(
             app_id=settings.META_APP_ID,
             app_secret=settings.META_APP_SECRET,
-            access_token=access_token
+            access_token=access_token,
+            graph_url=settings.META_GRAPH_API_URL
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao inicializar serviço Meta Ads: {str(e)}")
 
+def _stream_all_meta_ads_accounts():
+    """
+    Gera a listagem completa de contas como JSON, lote a lote.
+
+    Usa uma sessão própria, pois o gerador continua executando depois que a
+    dependência get_db já encerrou a sessão da requisição.
+    """
+    db = use_replica(SessionLocal())
+    try:
+        accounts = crud.crud_meta_ads.iter_meta_ads_accounts(db)
+        yield from stream_json_array(
+            accounts, lambda account: schemas.MetaAdsAccount.model_validate(account).model_dump_json()
+        )
+    finally:
+        db.close()
+
 @router.get("/accounts", response_model=List[schemas.MetaAdsAccount])
 def read_meta_ads_accounts(
-    db: Session = Depends(auth.get_db),
+    response: Response,
+    db: Session = Depends(auth.get_read_db),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    stream: bool = False,
     current_user: models.User = Depends(auth.get_current_active_user)
 ) -> Any:
     """
     Retorna todas as contas Meta Ads do usuário atual
+
+    Para administradores a listagem é paginada por cursor (X-Next-Cursor)
+    ou, com stream=true, transmitida integralmente em lotes.
     """
     if crud.crud_user.is_admin(current_user):
         # Administradores podem ver todas as contas
-        accounts = db.query(models.MetaAdsAccount).all()
+        if stream:
+            return StreamingResponse(_stream_all_meta_ads_accounts(), media_type="application/json")
+        try:
+            accounts, next_cursor = crud.crud_meta_ads.get_meta_ads_accounts_page(
+                db, cursor=cursor, limit=limit
+            )
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
     else:
         # Usuários normais só veem suas próprias contas
         accounts = crud.crud_meta_ads.get_meta_ads_accounts_by_user(db, current_user.id)
@@ -90,15 +134,27 @@ def create_meta_ads_account(
     account = crud.crud_meta_ads.create_meta_ads_account(db=db, account_in=account_in)
     return account
 
-@router.get("/campaigns/{account_id}")
+@router.get("/campaigns/{account_id}", response_model=List[CampaignRow])
 def read_meta_ads_campaigns(
     account_id: int,
-    db: Session = Depends(auth.get_db),
+    request: Request,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(auth.get_read_db),
     current_user: models.User = Depends(auth.get_current_active_user)
 ) -> Any:
     """
     Retorna as campanhas do Meta Ads para uma conta específica
+
+    Sem período, as métricas são dos últimos 30 dias. Com start_date (e
+    opcionalmente end_date), são do período e vêm do cache diário, que busca
+    no Meta apenas os dias faltantes
     """
+    try:
+        date_range = metrics_cache.resolve_date_range(start_date, end_date)
+    except InvalidDateRange as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     # Obter a conta do banco de dados
     account = crud.crud_meta_ads.get_meta_ads_account(db, account_id)
     if not account:
@@ -111,28 +167,85 @@ def read_meta_ads_campaigns(
             detail="Sem permissão para acessar esta conta"
         )
     
-    # Inicializar o serviço e obter as campanhas
-    try:
-        service = get_meta_ads_service(db, account_id, current_user)
-        campaigns = service.get_campaigns(account.account_id)
-        return campaigns
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Erro ao obter campanhas: {str(e)}"
-        )
+    # Inicializar o serviço e obter as campanhas (somente se o cache não responder)
+    def fetch_campaigns():
+        try:
+            if date_range:
+                rows = metrics_cache.daily_rows(
+                    db,
+                    MetricsScope("meta", account.account_id, "campaign"),
+                    *date_range,
+                    lambda start, end: get_meta_ads_service(db, account_id, current_user).get_campaign_daily_metrics(
+                        account.account_id, start, end
+                    ),
+                )
+                return metrics_cache.campaigns_from_daily(rows, "meta")
+            service = get_meta_ads_service(db, account_id, current_user)
+            return service.get_campaigns(account.account_id)
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Erro ao obter campanhas: {str(e)}"
+            )
+
+    return conditional_response(request, ("meta-ads", "campaigns", account.id, date_range), fetch_campaigns)
+
+def _report_pending_response(
+    account_id: int,
+    status: ReportRunStatus,
+    date_range: Optional[Tuple[date, date]] = None,
+    campaign_id: Optional[str] = None
+) -> JSONResponse:
+    """
+    202 com o id do job assíncrono, para o cliente consultar depois.
+
+    Jobs de métricas diárias levam na URL de consulta o período e a campanha
+    pedidos: o resultado passa pelo cache diário antes de ser somado por anúncio
+    """
+    poll_url = f"{settings.API_V1_STR}/meta-ads/ads/{account_id}/jobs/{status.id}"
+    if date_range:
+        query = {"start_date": date_range[0].isoformat(), "end_date": date_range[1].isoformat()}
+        if campaign_id:
+            query["campaign_id"] = campaign_id
+        poll_url = f"{poll_url}?{urlencode(query)}"
+    return JSONResponse(
+        status_code=202,
+        content={
+            "job_id": status.id,
+            "status": status.status,
+            "percent_completion": status.percent_completion,
+            "poll_url": poll_url,
+        },
+        headers={"Location": poll_url, "Retry-After": str(max(1, round(settings.META_ASYNC_POLL_INITIAL_SECONDS)))},
+    )
 
-@router.get("/ads/{account_id}")
-@router.get("/ads/{account_id}/{campaign_id}")
+@router.get("/ads/{account_id}", response_model=List[AdRow], responses={202: {"description": "Job assíncrono em andamento"}})
+@router.get("/ads/{account_id}/{campaign_id}", response_model=List[AdRow], responses={202: {"description": "Job assíncrono em andamento"}})
 def read_meta_ads_ads(
     account_id: int,
+    request: Request,
     campaign_id: str = None, # Opcional
-    db: Session = Depends(auth.get_db),
+    wait: Optional[float] = Query(None, ge=0, description="Segundos de espera por um job assíncrono antes de responder 202"),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(auth.get_read_db),
     current_user: models.User = Depends(auth.get_current_active_user)
 ) -> Any:
     """
     Retorna os anúncios do Meta Ads para uma conta ou campanha específica
+
+    Em contas grandes os insights vêm de um job assíncrono do Meta: se ele
+    não terminar dentro do prazo (wait, limitado a
+    META_ASYNC_INSIGHTS_WAIT_SECONDS), a resposta é 202 com o id do job.
+
+    Com start_date (e opcionalmente end_date), as métricas são do período e
+    vêm do cache diário, que busca no Meta apenas os dias faltantes
     """
+    try:
+        date_range = metrics_cache.resolve_date_range(start_date, end_date)
+    except InvalidDateRange as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     # Obter a conta do banco de dados
     account = crud.crud_meta_ads.get_meta_ads_account(db, account_id)
     if not account:
@@ -145,13 +258,133 @@ def read_meta_ads_ads(
             detail="Sem permissão para acessar esta conta"
         )
     
-    # Inicializar o serviço e obter os anúncios
+    wait_seconds = settings.META_ASYNC_INSIGHTS_WAIT_SECONDS
+    if wait is not None:
+        wait_seconds = min(wait, wait_seconds)
+
+    # Inicializar o serviço e obter os anúncios (somente se o cache não responder)
+    def fetch_ads():
+        try:
+            if date_range:
+                rows = metrics_cache.daily_rows(
+                    db,
+                    MetricsScope("meta", account.account_id, "ad", campaign_id or ""),
+                    *date_range,
+                    lambda start, end: get_meta_ads_service(db, account_id, current_user).get_ad_daily_metrics(
+                        account.account_id, campaign_id, start, end, wait_seconds=wait_seconds
+                    ),
+                )
+                return thumbnails.proxy_ads(metrics_cache.ads_from_daily(rows, "meta"))
+            service = get_meta_ads_service(db, account_id, current_user)
+            return thumbnails.proxy_ads(service.get_ads(account.account_id, campaign_id, wait_seconds=wait_seconds))
+        except (ReportPending, ReportFailed):
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Erro ao obter anúncios: {str(e)}"
+            )
+
     try:
-        service = get_meta_ads_service(db, account_id, current_user)
-        ads = service.get_ads(account.account_id, campaign_id)
-        return ads
-    except Exception as e:
+        return conditional_response(request, ("meta-ads", "ads", account.id, campaign_id, date_range), fetch_ads)
+    except ReportPending as e:
+        return _report_pending_response(account.id, e.status, date_range, campaign_id)
+    except ReportFailed as e:
+        raise HTTPException(status_code=502, detail=f"Job de insights do Meta Ads falhou: {e.status.status}")
+
+@router.get("/ads/{account_id}/jobs/{job_id}", response_model=List[AdRow], responses={202: {"description": "Job assíncrono em andamento"}})
+def read_meta_ads_ads_job(
+    account_id: int,
+    job_id: str,
+    request: Request,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    campaign_id: Optional[str] = None,
+    db: Session = Depends(auth.get_read_db),
+    current_user: models.User = Depends(auth.get_current_active_user)
+) -> Any:
+    """
+    Consulta um job assíncrono de anúncios: 202 enquanto estiver em
+    andamento, os anúncios quando terminar.
+
+    Com start_date (jobs de métricas diárias, ver _report_pending_response),
+    as linhas diárias do job são gravadas no cache e a resposta é a do
+    período inteiro, como em read_meta_ads_ads
+    """
+    try:
+        date_range = metrics_cache.resolve_date_range(start_date, end_date)
+    except InvalidDateRange as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    account = crud.crud_meta_ads.get_meta_ads_account(db, account_id)
+    if not account:
+        raise HTTPException(status_code=404, detail="Conta Meta Ads não encontrada")
+    
+    if account.user_id != current_user.id and not crud.crud_user.is_admin(current_user):
         raise HTTPException(
-            status_code=500,
-            detail=f"Erro ao obter anúncios: {str(e)}"
+            status_code=403,
+            detail="Sem permissão para acessar esta conta"
+        )
+    if not job_id.isdigit():
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+
+    service = get_meta_ads_service(db, account_id, current_user)
+    try:
+        status = service.report_status(job_id)
+    except Exception:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    # O id do job vale para qualquer conta: conferir se é desta
+    if status.account_id != account.account_id:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    if date_range and not (
+        status.date_start and status.date_stop
+        and date_range[0] <= status.date_start and status.date_stop <= date_range[1]
+    ):
+        raise HTTPException(status_code=400, detail="O período do job não está dentro do período pedido")
+    if status.failed:
+        raise HTTPException(status_code=502, detail=f"Job de insights do Meta Ads falhou: {status.status}")
+    if not status.completed:
+        return _report_pending_response(account.id, status, date_range, campaign_id)
+
+    report: dict = {}
+
+    def fetch_daily(start: date, end: date):
+        # Trechos cobertos pelo job saem do resultado dele (lido uma vez); os
+        # demais, ex.: dias que venceram no cache enquanto o job rodava, são
+        # buscados como em read_meta_ads_ads
+        if status.date_start <= start and end <= status.date_stop:
+            if "rows" not in report:
+                report["rows"] = service.get_report_ad_daily_metrics(status, campaign_id)
+            return [row for row in report["rows"] if start <= row.date <= end]
+        return service.get_ad_daily_metrics(
+            account.account_id, campaign_id, start, end, wait_seconds=settings.META_ASYNC_INSIGHTS_WAIT_SECONDS
+        )
+
+    def fetch_ads():
+        try:
+            if date_range:
+                rows = metrics_cache.daily_rows(
+                    db, MetricsScope("meta", account.account_id, "ad", campaign_id or ""), *date_range, fetch_daily
+                )
+                return thumbnails.proxy_ads(metrics_cache.ads_from_daily(rows, "meta"))
+            return thumbnails.proxy_ads(service.get_report_ads(status))
+        except (ReportPending, ReportFailed):
+            raise
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Erro ao obter anúncios: {str(e)}"
+            )
+
+    # O resultado de um job concluído não muda: consultas repetidas saem do cache
+    try:
+        return conditional_response(
+            request, ("meta-ads", "ads-job", account.id, job_id, date_range, campaign_id), fetch_ads
         )
+    except ReportPending as e:
+        # Outro trecho do período foi para um novo job
+        return _report_pending_response(account.id, e.status, date_range, campaign_id)
+    except ReportFailed as e:
+        raise HTTPException(status_code=502, detail=f"Job de insights do Meta Ads falhou: {e.status.status}")
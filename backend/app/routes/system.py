@@ -0,0 +1,49 @@
+from typing import Any, List
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+
+from app import models
+from app.core.profiling import ProfiledRoute, profile_store
+from app.db.pool import pool_status
+from app.db.session import engine, replica_engines
+from app.routes import auth
+
+router = APIRouter(route_class=ProfiledRoute)
+
+
+@router.get("/db-pool")
+def read_db_pool_status(
+    current_user: models.User = Depends(auth.get_current_active_admin)
+) -> Any:
+    """
+    Retorna o estado do pool de conexões do worker que atendeu a requisição:
+    o do banco principal, com o de cada réplica em replicas
+    """
+    return {**pool_status(engine), "replicas": [pool_status(replica) for replica in replica_engines]}
+
+
+@router.get("/profiles")
+def read_profiles(
+    current_user: models.User = Depends(auth.get_current_active_admin)
+) -> List[dict]:
+    """
+    Lista os perfis gravados (pedidos via X-Profile ou amostrados), mais recentes primeiro
+    """
+    return profile_store.list()
+
+
+@router.get("/profiles/{profile_id}")
+def read_profile(
+    profile_id: str,
+    current_user: models.User = Depends(auth.get_current_active_admin)
+) -> Any:
+    """
+    Baixa um perfil (abrir em https://www.speedscope.app ou flamegraph.pl)
+    """
+    found = profile_store.find(profile_id)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Perfil não encontrado")
+    path, fmt = found
+    media_type = "application/json" if fmt == "speedscope" else "text/plain"
+    return FileResponse(path, media_type=media_type, filename=path.rsplit("/", 1)[-1])
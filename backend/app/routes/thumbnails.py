@@ -0,0 +1,56 @@
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+
+from app.core.conditional import etag_matches
+from app.core.config import settings
+from app.core.profiling import ProfiledRoute
+from app.services import thumbnails
+from app.services.thumbnails import ThumbnailError, ThumbnailStore
+
+router = APIRouter(route_class=ProfiledRoute)
+
+# O conteúdo de uma URL assinada não muda: o navegador não precisa revalidar
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@router.get(
+    "/{signature}",
+    response_class=Response,
+    responses={
+        200: {"content": {"image/jpeg": {}, "image/png": {}}},
+        304: {"description": "Miniatura não mudou (If-None-Match)"},
+        422: {"description": "Imagem original grande demais para reduzir"},
+    },
+)
+def read_thumbnail(
+    signature: str,
+    request: Request,
+    url: str = Query(..., description="URL original da miniatura"),
+    w: Optional[int] = Query(None, description="Largura da variante, entre THUMBNAILS_SIZES"),
+    store: ThumbnailStore = Depends(thumbnails.get_thumbnail_store)
+) -> Any:
+    """
+    Miniatura de um anúncio em tamanho reduzido, servida do disco do proxy
+
+    Sem autenticação (carregada pelo navegador numa <img>): só atende URLs
+    assinadas pela própria API nas respostas de anúncios
+    """
+    if not thumbnails.verify(signature, url):
+        raise HTTPException(status_code=403, detail="Assinatura inválida")
+    width = w or settings.THUMBNAILS_SIZES[0]
+    if width not in settings.THUMBNAILS_SIZES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Largura não suportada; use uma de {sorted(settings.THUMBNAILS_SIZES)}"
+        )
+    try:
+        thumbnail = store.get(url, width)
+    except ThumbnailError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    headers = {"ETag": thumbnail.etag, "Cache-Control": CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None and etag_matches(if_none_match, thumbnail.etag):
+        return Response(status_code=304, headers=headers)
+    # Bytes lidos pelo store com o lock da URL: a limpeza pode ter removido o arquivo desde então
+    return Response(thumbnail.content, media_type=thumbnail.content_type, headers=headers)
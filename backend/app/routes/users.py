@@ -1,12 +1,14 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
+from app.core.pagination import InvalidCursor
+from app.core.profiling import ProfiledRoute
 from app.routes import auth
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 
 @router.post("/", response_model=schemas.user.User)
@@ -43,7 +45,7 @@ def read_user_me(
 def read_user_by_id(
     user_id: int,
     current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(auth.get_db),
+    db: Session = Depends(auth.get_read_db),
 ) -> Any:
     """
     Obtém um usuário pelo ID.
@@ -59,15 +61,24 @@ def read_user_by_id(
 
 @router.get("/", response_model=List[schemas.user.User])
 def read_users(
-    db: Session = Depends(auth.get_db),
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    db: Session = Depends(auth.get_read_db),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
     current_user: models.User = Depends(auth.get_current_active_admin) # Apenas admin pode listar todos os usuários
 ) -> Any:
     """
     Obtém uma lista de usuários.
+
+    A paginação é feita por cursor: o cursor da próxima página é retornado
+    no cabeçalho X-Next-Cursor.
     """
-    users = crud.crud_user.get_users(db, skip=skip, limit=limit)
+    try:
+        users, next_cursor = crud.crud_user.get_users(db, cursor=cursor, limit=limit)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return users
 
 
@@ -0,0 +1,13 @@
+from app.schemas import user, metrics, dashboard, campaigns
+from app.schemas.google_ads import (
+    GoogleAdsAccount,
+    GoogleAdsAccountCreate,
+    GoogleAdsAccountUpdate,
+    GoogleAdsAccountInDB,
+)
+from app.schemas.meta_ads import (
+    MetaAdsAccount,
+    MetaAdsAccountCreate,
+    MetaAdsAccountUpdate,
+    MetaAdsAccountInDB,
+)
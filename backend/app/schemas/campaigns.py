@@ -0,0 +1,37 @@
+from datetime import date, datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from app.schemas.dashboard import DashboardMetrics
+
+
+# Anúncio na árvore de entidades, com as métricas somadas no período
+class AdNode(DashboardMetrics):
+    id: int
+    ad_id: str
+    name: Optional[str] = None
+    ad_group: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    ad_link: Optional[str] = None
+
+
+# Campanha na árvore de entidades, com a conta e os anúncios
+class CampaignNode(DashboardMetrics):
+    id: int
+    campaign_id: str
+    name: Optional[str] = None
+    status: Optional[str] = None
+    channel: Optional[str] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    account_id: Optional[str] = None  # id da conta no provedor
+    account_name: Optional[str] = None
+    ads: List[AdNode] = []
+
+
+# Árvore campanha → anúncio das campanhas gravadas no banco
+class CampaignTree(BaseModel):
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    campaigns: List[CampaignNode]
@@ -0,0 +1,67 @@
+from datetime import date, datetime
+from typing import List
+
+from pydantic import BaseModel
+
+from app.schemas.metrics import ExternalId
+
+
+# Métricas agregadas do dashboard (CTR em porcentagem para os dois canais)
+class DashboardMetrics(BaseModel):
+    impressions: int = 0
+    clicks: int = 0
+    conversions: float = 0
+    spend: float = 0.0
+    ctr: float = 0.0
+    cpc: float = 0.0
+    cpa: float = 0.0
+    cpm: float = 0.0
+    roas: float = 0.0
+
+
+# Totais de um canal (google, meta)
+class DashboardChannel(DashboardMetrics):
+    channel: str
+    accounts: int = 0
+
+
+# Campanha entre as de maior investimento no período
+class DashboardCampaign(DashboardMetrics):
+    channel: str
+    account_id: str
+    id: ExternalId
+    name: str
+    status: str
+
+
+# Snapshot do dashboard inicial de um usuário para um período
+class DashboardSnapshot(BaseModel):
+    preset: str
+    start_date: date
+    end_date: date
+    generated_at: datetime
+    totals: DashboardMetrics
+    channels: List[DashboardChannel] = []
+    top_campaigns: List[DashboardCampaign] = []
+
+
+# Resposta ao pedido de sincronização das contas
+class DashboardSyncStarted(BaseModel):
+    accounts: int
+    # Sincronização anterior do usuário ainda em andamento: nenhuma nova foi iniciada
+    already_running: bool = False
+
+
+# Dia de uma campanha ou anúncio que desviou do esperado (app/services/anomaly_detection.py)
+class MetricAnomaly(BaseModel):
+    channel: str
+    account_id: str
+    level: str  # campaign, ad
+    entity_id: str
+    metric: str  # spend, ctr
+    date: date
+    kind: str  # spike, drop
+    value: float
+    expected: float
+    score: float
+    detected_at: datetime
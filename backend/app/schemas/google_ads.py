@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional
 
 # Propriedades compartilhadas
@@ -21,8 +21,7 @@ class GoogleAdsAccountInDBBase(GoogleAdsAccountBase):
     id: int
     user_id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Propriedades para retornar ao cliente (sem refresh token)
 class GoogleAdsAccount(GoogleAdsAccountInDBBase):
@@ -0,0 +1,74 @@
+from pydantic import BaseModel, ConfigDict
+from typing import List, Optional, Union
+
+# Os ids vêm como inteiros no Google Ads e como strings no Meta Ads
+ExternalId = Union[int, str]
+
+
+# Métricas compartilhadas por todas as linhas
+class MetricsRow(BaseModel):
+    impressions: int = 0
+    clicks: int = 0
+    ctr: float = 0.0
+    conversions: float = 0
+    spend: float = 0.0
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+# Linha de campanha retornada pelos endpoints de campanhas
+class CampaignRow(MetricsRow):
+    id: ExternalId
+    name: str
+    status: str
+    channel: str
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    cpc: float = 0.0
+    cpa: float = 0.0
+    cpm: float = 0.0
+    roas: float = 0.0
+
+
+# Linha de grupo de anúncios (Google Ads) / conjunto de anúncios (Meta Ads)
+class AdGroupRow(MetricsRow):
+    id: ExternalId
+    name: str
+    status: str
+
+
+# Linha de anúncio retornada pelos endpoints de anúncios
+class AdRow(MetricsRow):
+    id: ExternalId
+    name: str
+    status: str
+    thumbnail_url: Optional[str] = None
+    # Google Ads
+    final_url: Optional[str] = None
+    ad_group: Optional[str] = None
+    # Meta Ads
+    campaign_id: Optional[ExternalId] = None
+    adset_id: Optional[ExternalId] = None
+    ad_link: Optional[str] = None
+
+
+# Conta na hierarquia de uma conta de administrador (MCC) do Google Ads
+class CustomerClientRow(BaseModel):
+    id: int
+    name: Optional[str] = None
+    manager: bool
+    level: int
+    status: str
+    currency_code: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+# Campanhas de uma conta cliente de uma MCC (error preenchido se a consulta falhou)
+class ClientCampaignsRow(BaseModel):
+    customer_id: int
+    name: Optional[str] = None
+    campaigns: List[CampaignRow] = []
+    error: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
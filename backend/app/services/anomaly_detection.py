@@ -0,0 +1,255 @@
+"""
+Detecção incremental de anomalias nas séries diárias de gasto e CTR
+
+Cada série (provedor, conta, nível, entidade e métrica) tem um estado de
+tamanho fixo em metric_series_state: média e variância exponenciais (EWMA) e
+o desvio de cada dia da semana em relação à média. As linhas diárias passam
+pelo detector quando são ingeridas no cache de métricas
+(app/services/metrics_cache.py): cada ponto é comparado com o esperado para
+o dia e, se desviar mais que ANOMALY_Z_THRESHOLD desvios-padrão na direção
+monitorada (alta do gasto, queda do CTR), vira um registro em
+metric_anomalies. Nenhuma verificação relê o histórico das séries.
+
+Só dias fechados (fora da janela de atribuição) atualizam o estado, em ordem
+de data. Dias abertos são avaliados contra o estado atual e reavaliados a
+cada nova busca, substituindo o registro anterior. Dias fechados anteriores
+ao último já aprendido (ex.: um período antigo consultado depois) são
+ignorados: o estado não volta no tempo.
+"""
+import logging
+import math
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, insert, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.tracing import start_span
+from app.models.models import MetricAnomaly, MetricSeriesState
+from app.services import metrics_cache
+from app.services.metrics_cache import MetricsScope
+from app.services.rows import DailyMetricRow
+
+logger = logging.getLogger(__name__)
+
+# Desvio-padrão mínimo, relativo à média: séries quase constantes não
+# disparam anomalias por variações pequenas
+MIN_STD_FRACTION = 0.05
+# Entidades por consulta ao carregar estados e remover registros
+BATCH_SIZE = 500
+
+
+def _spend(row: DailyMetricRow) -> Optional[float]:
+    return row.spend
+
+
+def _ctr(row: DailyMetricRow) -> Optional[float]:
+    # Com poucas impressões o CTR é ruído
+    if row.impressions < settings.ANOMALY_MIN_IMPRESSIONS:
+        return None
+    return row.clicks / row.impressions * 100
+
+
+# Métricas monitoradas: valor do dia (None para não avaliar) e direção da anomalia
+METRICS: Dict[str, Tuple[Callable[[DailyMetricRow], Optional[float]], str]] = {
+    "spend": (_spend, "spike"),
+    "ctr": (_ctr, "drop"),
+}
+
+
+@dataclass(frozen=True)
+class DetectorParams:
+    alpha: float
+    gamma: float
+    threshold: float
+    warmup: int
+
+    @classmethod
+    def from_settings(cls) -> "DetectorParams":
+        return cls(
+            alpha=settings.ANOMALY_EWMA_ALPHA,
+            gamma=settings.ANOMALY_SEASONAL_GAMMA,
+            threshold=settings.ANOMALY_Z_THRESHOLD,
+            warmup=settings.ANOMALY_WARMUP_POINTS,
+        )
+
+
+@dataclass(slots=True)
+class SeriesState:
+    points: int = 0
+    mean: float = 0.0
+    variance: float = 0.0
+    seasonal: List[float] = field(default_factory=lambda: [0.0] * 7)
+    last_date: Optional[date] = None
+
+    def expected(self, day: date) -> float:
+        return self.mean + self.seasonal[day.weekday()]
+
+    def std(self) -> float:
+        return max(math.sqrt(self.variance), MIN_STD_FRACTION * abs(self.mean), 1e-9)
+
+    def update(self, value: float, day: date, params: DetectorParams) -> None:
+        weekday = day.weekday()
+        if self.points == 0:
+            self.mean = value
+        else:
+            # Um pico entra limitado ao limiar, para não inflar a variância
+            # e esconder os próximos
+            limit = params.threshold * self.std()
+            diff = min(max(value - self.seasonal[weekday] - self.mean, -limit), limit)
+            self.mean += params.alpha * diff
+            self.variance = (1 - params.alpha) * (self.variance + params.alpha * diff * diff)
+            deviation = min(max(value - self.mean - self.seasonal[weekday], -limit), limit)
+            self.seasonal[weekday] += params.gamma * deviation
+        self.points += 1
+        self.last_date = day
+
+
+def observe(
+    state: SeriesState, value: float, day: date, closed: bool, kind: str, params: DetectorParams
+) -> Optional[Tuple[float, float]]:
+    """
+    Avalia um ponto da série e, se o dia estiver fechado, atualiza o estado.
+    Retorna (esperado, desvios-padrão) se o ponto for uma anomalia
+    """
+    if state.last_date is not None and day <= state.last_date:
+        return None
+    anomaly = None
+    if state.points >= params.warmup:
+        expected = state.expected(day)
+        score = (value - expected) / state.std()
+        if score > params.threshold if kind == "spike" else score < -params.threshold:
+            anomaly = (expected, score)
+    if closed:
+        state.update(value, day, params)
+    return anomaly
+
+
+def _state_from_model(model: MetricSeriesState) -> SeriesState:
+    return SeriesState(model.points, model.mean, model.variance, list(model.seasonal), model.last_date)
+
+
+def _load_states(db: Session, scope: MetricsScope, entity_ids: List[str]) -> Dict[Tuple[str, str], MetricSeriesState]:
+    states = {}
+    for i in range(0, len(entity_ids), BATCH_SIZE):
+        query = db.query(MetricSeriesState).filter(
+            MetricSeriesState.provider == scope.provider,
+            MetricSeriesState.account_id == scope.account_id,
+            MetricSeriesState.level == scope.level,
+            MetricSeriesState.entity_id.in_(entity_ids[i:i + BATCH_SIZE]),
+        ).with_for_update()
+        for model in query:
+            states[(model.entity_id, model.metric)] = model
+    return states
+
+
+def ingest(db: Session, scope: MetricsScope, rows: Iterable[DailyMetricRow], today: date) -> int:
+    """
+    Passa as linhas diárias ingeridas pelo detector: atualiza os estados das
+    séries e substitui os registros de anomalia dos dias avaliados.
+    Retorna o número de anomalias registradas
+    """
+    params = DetectorParams.from_settings()
+    by_entity: Dict[str, List[DailyMetricRow]] = defaultdict(list)
+    for row in rows:
+        by_entity[row.entity_id].append(row)
+    if not by_entity:
+        return 0
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    key = {"provider": scope.provider, "account_id": scope.account_id, "level": scope.level}
+
+    with start_span("anomalies.ingest", provider=scope.provider, account_id=scope.account_id, level=scope.level) as span:
+        models = _load_states(db, scope, list(by_entity))
+        evaluated: List[Tuple[str, str, date]] = []
+        anomalies: List[dict] = []
+        for entity_id, entity_rows in by_entity.items():
+            entity_rows.sort(key=lambda row: row.date)
+            for metric, (value_of, kind) in METRICS.items():
+                model = models.get((entity_id, metric))
+                state = _state_from_model(model) if model is not None else SeriesState()
+                changed = False
+                for row in entity_rows:
+                    value = value_of(row)
+                    if value is None or (state.last_date is not None and row.date <= state.last_date):
+                        continue
+                    evaluated.append((entity_id, metric, row.date))
+                    closed = metrics_cache.is_closed(row.date, today)
+                    anomaly = observe(state, value, row.date, closed, kind, params)
+                    changed = changed or closed
+                    if anomaly is not None:
+                        expected, score = anomaly
+                        anomalies.append({
+                            **key,
+                            "entity_id": entity_id,
+                            "metric": metric,
+                            "date": row.date,
+                            "kind": kind,
+                            "value": value,
+                            "expected": expected,
+                            "score": score,
+                            "detected_at": now,
+                        })
+                if not changed:
+                    continue
+                if model is None:
+                    model = MetricSeriesState(**key, entity_id=entity_id, metric=metric)
+                    db.add(model)
+                model.points, model.mean, model.variance = state.points, state.mean, state.variance
+                model.seasonal, model.last_date = list(state.seasonal), state.last_date
+
+        try:
+            for i in range(0, len(evaluated), BATCH_SIZE):
+                db.execute(delete(MetricAnomaly).where(
+                    MetricAnomaly.provider == scope.provider,
+                    MetricAnomaly.account_id == scope.account_id,
+                    MetricAnomaly.level == scope.level,
+                    tuple_(MetricAnomaly.entity_id, MetricAnomaly.metric, MetricAnomaly.date).in_(evaluated[i:i + BATCH_SIZE]),
+                ))
+            if anomalies:
+                db.execute(insert(MetricAnomaly), anomalies)
+            db.commit()
+        except IntegrityError:
+            # Outro processo criou os mesmos estados ao mesmo tempo: o dele vale
+            db.rollback()
+            logger.info(f"Estados de séries de {scope} gravados por outro processo")
+            return 0
+        span.set(series=len(by_entity) * len(METRICS), points=len(evaluated), anomalies=len(anomalies))
+    return len(anomalies)
+
+
+def _writer_session(db: Session) -> Session:
+    """
+    Sessão no primário do mesmo banco da sessão recebida
+    """
+    writer = getattr(db, "writer", None)
+    return Session(bind=writer if writer is not None else db.get_bind())
+
+
+@metrics_cache.on_rows_stored
+def detect_on_ingest(db: Session, scope: MetricsScope, rows: List[DailyMetricRow], today: date) -> None:
+    if not settings.ANOMALY_DETECTION_ENABLED:
+        return
+    # A sessão de quem ingeriu pode estar marcada para ler de uma réplica,
+    # que recusa o SELECT ... FOR UPDATE dos estados: usar uma própria no primário
+    writer_db = _writer_session(db)
+    try:
+        ingest(writer_db, scope, rows, today)
+    finally:
+        writer_db.close()
+
+
+def list_anomalies(db: Session, scopes: List[Tuple[str, str]], since: date) -> List[MetricAnomaly]:
+    """
+    Anomalias das contas (provedor, id da conta no provedor) a partir de since,
+    das mais recentes para as mais antigas
+    """
+    if not scopes:
+        return []
+    return db.query(MetricAnomaly).filter(
+        tuple_(MetricAnomaly.provider, MetricAnomaly.account_id).in_(scopes),
+        MetricAnomaly.date >= since,
+    ).order_by(MetricAnomaly.date.desc(), MetricAnomaly.id).all()
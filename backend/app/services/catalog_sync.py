@@ -0,0 +1,273 @@
+"""
+Catálogo de campanhas e anúncios das contas (tabelas campaigns e ads)
+
+A cada sincronização de conta (app/services/sync_service.py) as campanhas e
+os anúncios vindos do provedor são gravados em campaigns e ads, base da
+árvore de GET /campaigns/tree. Entre duas sincronizações quase nada muda, e
+regravar todas as linhas a cada vez só geraria escrita, WAL e atualização
+de índices. Cada linha guarda o hash (content_hash) dos seus campos de
+catálogo: a sincronização lê apenas (id no provedor, id, hash) das linhas
+da conta e grava só as novas e as que mudaram, em INSERTs e UPDATEs em lote
+de até CATALOG_SYNC_BATCH_SIZE linhas.
+
+O hash das miniaturas ignora a query string: as URLs assinadas do Meta
+mudam a cada busca sem que a imagem mude. Como a assinatura expira (oe,
+timestamp em hexadecimal), a URL gravada é trocada pela recebida quando
+vence em menos de THUMBNAIL_EXPIRY_MARGIN, mesmo sem mudança no hash.
+Campanhas e anúncios que deixam de vir do provedor são mantidos, com as
+métricas gravadas para eles.
+"""
+import hashlib
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.serialization import dumps
+from app.core.tracing import start_span
+from app.models.models import Ad, Campaign, GoogleAdsAccount, MetaAdsAccount
+from app.services.rows import AdData, CampaignData
+
+logger = logging.getLogger(__name__)
+
+# Status dos provedores nos valores da coluna campaigns.status
+STATUSES = {
+    "ENABLED": "active",
+    "ACTIVE": "active",
+    "PAUSED": "paused",
+    "REMOVED": "removed",
+    "DELETED": "removed",
+    "ARCHIVED": "removed",
+}
+
+# Antecedência com que uma URL assinada de miniatura é renovada (segundos)
+THUMBNAIL_EXPIRY_MARGIN = 24 * 3600
+
+
+@dataclass
+class CatalogReport:
+    campaigns: int = 0  # recebidas do provedor
+    campaigns_inserted: int = 0
+    campaigns_updated: int = 0
+    ads: int = 0
+    ads_inserted: int = 0
+    ads_updated: int = 0
+    ads_skipped: int = 0  # campanha fora do catálogo
+    thumbnails_refreshed: int = 0  # URL assinada vencendo, sem outra mudança
+    statements: int = 0
+
+    @property
+    def rows_written(self) -> int:
+        return (
+            self.campaigns_inserted + self.campaigns_updated
+            + self.ads_inserted + self.ads_updated + self.thumbnails_refreshed
+        )
+
+
+def content_hash(values: Dict[str, Any]) -> str:
+    return hashlib.blake2b(dumps(values), digest_size=16).hexdigest()
+
+
+def _status(value: Optional[str]) -> Optional[str]:
+    return STATUSES.get(value, value.lower()) if value else None
+
+
+def _datetime(value: Optional[str]) -> Optional[datetime]:
+    """
+    Data/hora do provedor sem fuso ("2025-01-01 00:00:00" no Google,
+    "2025-01-01T00:00:00-0300" no Meta)
+    """
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value[:19].replace(" ", "T"))
+    except ValueError:
+        return None
+
+
+def _campaign_values(account: Union[GoogleAdsAccount, MetaAdsAccount], provider: str, campaign: CampaignData) -> Dict[str, Any]:
+    return {
+        "name": campaign.name,
+        "status": _status(campaign.status),
+        "channel": provider,
+        "start_date": _datetime(campaign.start_date),
+        "end_date": _datetime(campaign.end_date),
+        "user_id": account.user_id,
+    }
+
+
+def _ad_values(ad: AdData, campaign_id: int) -> Dict[str, Any]:
+    return {
+        "name": ad.name,
+        # Nome do grupo de anúncios no Google; id do conjunto de anúncios no Meta
+        "ad_group": ad.ad_group if ad.ad_group is not None else (str(ad.adset_id) if ad.adset_id is not None else None),
+        "thumbnail_url": ad.thumbnail_url,
+        "ad_link": ad.ad_link or ad.final_url,
+        "campaign_id": campaign_id,
+    }
+
+
+def _ad_hash(values: Dict[str, Any]) -> str:
+    thumbnail_url = values["thumbnail_url"]
+    return content_hash({**values, "thumbnail_url": thumbnail_url.split("?", 1)[0] if thumbnail_url else None})
+
+
+def thumbnail_expires_at(url: Optional[str]) -> Optional[int]:
+    """
+    Expiração (epoch) de uma URL assinada do CDN do Meta (parâmetro oe, em
+    hexadecimal); None se a URL não tiver expiração
+    """
+    if not url:
+        return None
+    oe = parse_qs(urlsplit(url).query).get("oe")
+    if not oe:
+        return None
+    try:
+        return int(oe[0], 16)
+    except ValueError:
+        return None
+
+
+def _thumbnail_expiring(url: Optional[str], now: float) -> bool:
+    expires_at = thumbnail_expires_at(url)
+    return expires_at is not None and expires_at - now < THUMBNAIL_EXPIRY_MARGIN
+
+
+def _write(db: Session, model, inserts: List[dict], updates: List[dict], batch_size: int, report: CatalogReport) -> None:
+    for i in range(0, len(inserts), batch_size):
+        db.execute(insert(model), inserts[i:i + batch_size])
+        report.statements += 1
+    for i in range(0, len(updates), batch_size):
+        # UPDATE em lote pela chave primária (executemany)
+        db.execute(update(model), updates[i:i + batch_size])
+        report.statements += 1
+
+
+def _account_column(provider: str):
+    return Campaign.google_ads_account_id if provider == "google" else Campaign.meta_ads_account_id
+
+
+def _existing_campaigns(db: Session, provider: str, account_id: int) -> Dict[str, Tuple[int, Optional[str]]]:
+    query = db.query(Campaign.campaign_id, Campaign.id, Campaign.content_hash).filter(_account_column(provider) == account_id)
+    return {campaign_id: (id, digest) for campaign_id, id, digest in query}
+
+
+def _sync_campaigns(
+    db: Session,
+    account: Union[GoogleAdsAccount, MetaAdsAccount],
+    provider: str,
+    campaigns: List[CampaignData],
+    batch_size: int,
+    report: CatalogReport,
+) -> Dict[str, int]:
+    """
+    Grava as campanhas novas e alteradas. Retorna id no provedor -> id no banco
+    """
+    existing = _existing_campaigns(db, provider, account.id)
+    inserts, updates = [], []
+    seen = set()
+    for campaign in campaigns:
+        external_id = str(campaign.id)
+        if external_id in seen:
+            continue
+        seen.add(external_id)
+        values = _campaign_values(account, provider, campaign)
+        digest = content_hash(values)
+        current = existing.get(external_id)
+        if current is None:
+            inserts.append({
+                **values,
+                "campaign_id": external_id,
+                _account_column(provider).key: account.id,
+                "content_hash": digest,
+            })
+        elif current[1] != digest:
+            updates.append({**values, "id": current[0], "content_hash": digest})
+    _write(db, Campaign, inserts, updates, batch_size, report)
+    report.campaigns += len(seen)
+    report.campaigns_inserted += len(inserts)
+    report.campaigns_updated += len(updates)
+    if inserts:
+        existing = _existing_campaigns(db, provider, account.id)
+    return {external_id: id for external_id, (id, _) in existing.items()}
+
+
+def _sync_ads(
+    db: Session,
+    provider: str,
+    account_id: int,
+    campaign_ids: Dict[str, int],
+    ads: List[AdData],
+    batch_size: int,
+    report: CatalogReport,
+) -> None:
+    account_campaigns = select(Campaign.id).where(_account_column(provider) == account_id)
+    existing = {
+        ad_id: (id, digest, thumbnail_url)
+        for ad_id, id, digest, thumbnail_url in db.query(
+            Ad.ad_id, Ad.id, Ad.content_hash, Ad.thumbnail_url
+        ).filter(Ad.campaign_id.in_(account_campaigns))
+    }
+    now = time.time()
+    inserts, updates, thumbnail_updates = [], [], []
+    seen = set()
+    for ad in ads:
+        external_id = str(ad.id)
+        if external_id in seen:
+            continue
+        seen.add(external_id)
+        campaign_id = campaign_ids.get(str(ad.campaign_id))
+        if campaign_id is None:
+            report.ads_skipped += 1
+            continue
+        values = _ad_values(ad, campaign_id)
+        digest = _ad_hash(values)
+        current = existing.get(external_id)
+        if current is None:
+            inserts.append({**values, "ad_id": external_id, "content_hash": digest})
+        elif current[1] != digest:
+            updates.append({**values, "id": current[0], "content_hash": digest})
+        elif values["thumbnail_url"] != current[2] and _thumbnail_expiring(current[2], now):
+            thumbnail_updates.append({"id": current[0], "thumbnail_url": values["thumbnail_url"]})
+    _write(db, Ad, inserts, updates, batch_size, report)
+    # Lote separado: o UPDATE em lote usa as mesmas colunas em todas as linhas
+    _write(db, Ad, [], thumbnail_updates, batch_size, report)
+    report.thumbnails_refreshed += len(thumbnail_updates)
+    report.ads += len(seen)
+    report.ads_inserted += len(inserts)
+    report.ads_updated += len(updates)
+
+
+def sync_catalog(
+    db: Session,
+    account: Union[GoogleAdsAccount, MetaAdsAccount],
+    campaigns: List[CampaignData],
+    ads: List[AdData],
+    batch_size: Optional[int] = None,
+) -> CatalogReport:
+    """
+    Grava no catálogo as campanhas e os anúncios da conta vindos do
+    provedor, numa transação, escrevendo só as linhas novas ou alteradas
+    """
+    provider = "google" if isinstance(account, GoogleAdsAccount) else "meta"
+    batch_size = batch_size or settings.CATALOG_SYNC_BATCH_SIZE
+    report = CatalogReport()
+    with start_span("catalog_sync.account", provider=provider, account_id=account.account_id) as span:
+        campaign_ids = _sync_campaigns(db, account, provider, campaigns, batch_size, report)
+        _sync_ads(db, provider, account.id, campaign_ids, ads, batch_size, report)
+        db.commit()
+        span.set(
+            campaigns=report.campaigns,
+            ads=report.ads,
+            rows_written=report.rows_written,
+            statements=report.statements,
+        )
+    if report.ads_skipped:
+        logger.info(f"Catálogo {provider} {account.account_id}: {report.ads_skipped} anúncios de campanhas fora do catálogo")
+    return report
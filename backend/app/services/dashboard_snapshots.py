@@ -0,0 +1,183 @@
+"""
+Snapshots do dashboard inicial de cada usuário
+
+O dashboard inicial mostra os mesmos agregados a cada visita: totais, divisão
+por canal e campanhas de maior investimento. Em vez de recalculá-los com
+chamadas às APIs dos provedores, o snapshot de cada usuário e período
+(preset) é gerado a partir do cache diário de métricas ao fim da
+sincronização de uma conta do usuário (app/services/sync_service.py) e
+gravado já serializado: a página inicial é uma leitura pela chave primária.
+
+A regeneração só lê o banco: a conta sincronizada já atualizou o cache, e as
+demais contas do usuário entram com os dias que já estão nele.
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.conditional import compute_etag
+from app.core.serialization import dumps
+from app.core.tracing import start_span
+from app.models.models import CachedDailyMetric, DashboardSnapshot, GoogleAdsAccount, MetaAdsAccount
+from app.services import metrics_cache
+from app.services.rows import CampaignData, DailyMetricRow
+
+# Períodos do dashboard; como no Google Ads, os "últimos N dias" não incluem hoje
+DATE_PRESETS: Dict[str, Callable[[date], Tuple[date, date]]] = {
+    "today": lambda today: (today, today),
+    "yesterday": lambda today: (today - timedelta(days=1), today - timedelta(days=1)),
+    "last_7_days": lambda today: (today - timedelta(days=7), today - timedelta(days=1)),
+    "last_30_days": lambda today: (today - timedelta(days=30), today - timedelta(days=1)),
+}
+
+TOP_CAMPAIGNS = 10
+
+
+def sync_range(today: date) -> Tuple[date, date]:
+    """
+    Dias que a sincronização mantém no cache para cobrir todos os presets
+    """
+    ranges = [preset(today) for preset in DATE_PRESETS.values()]
+    return min(start for start, _ in ranges), max(end for _, end in ranges)
+
+
+def user_scopes(db: Session, user_id: int) -> List[Tuple[str, str]]:
+    google = db.query(GoogleAdsAccount.account_id).filter(GoogleAdsAccount.user_id == user_id)
+    meta = db.query(MetaAdsAccount.account_id).filter(MetaAdsAccount.user_id == user_id)
+    return [("google", account_id) for account_id, in google] + [("meta", account_id) for account_id, in meta]
+
+
+def derived_metrics(impressions: int, clicks: int, conversions: float, spend: float, conversion_value: float) -> dict:
+    return {
+        "impressions": impressions,
+        "clicks": clicks,
+        "conversions": conversions,
+        "spend": spend,
+        "ctr": clicks / impressions * 100 if impressions else 0.0,
+        "cpc": spend / clicks if clicks else 0.0,
+        "cpa": spend / conversions if conversions else 0.0,
+        "cpm": spend / impressions * 1000 if impressions else 0.0,
+        "roas": conversion_value / spend if spend else 0.0,
+    }
+
+
+def _summary(rows: Iterable[DailyMetricRow]) -> dict:
+    impressions = clicks = 0
+    conversions = spend = conversion_value = 0.0
+    for row in rows:
+        impressions += row.impressions
+        clicks += row.clicks
+        conversions += row.conversions
+        spend += row.spend
+        conversion_value += row.conversion_value
+    return derived_metrics(impressions, clicks, conversions, spend, conversion_value)
+
+
+def _top_campaign(channel: str, account_id: str, campaign: CampaignData) -> dict:
+    return {
+        "channel": channel,
+        "account_id": account_id,
+        "id": campaign.id,
+        "name": campaign.name,
+        "status": campaign.status,
+        "impressions": campaign.impressions,
+        "clicks": campaign.clicks,
+        "conversions": campaign.conversions,
+        "spend": campaign.spend,
+        # As linhas das campanhas seguem a convenção de cada provedor; no snapshot, em %
+        "ctr": campaign.ctr * 100 if channel == "google" else campaign.ctr,
+        "cpc": campaign.cpc,
+        "cpa": campaign.cpa,
+        "cpm": campaign.cpm,
+        "roas": campaign.roas,
+    }
+
+
+def build_snapshots(db: Session, user_id: int, today: Optional[date] = None) -> Dict[str, dict]:
+    """
+    Conteúdo dos snapshots de todos os presets do usuário, a partir das
+    linhas diárias de campanha em cache (uma única consulta)
+    """
+    today = today or metrics_cache.utc_today()
+    scopes = user_scopes(db, user_id)
+    start, end = sync_range(today)
+    rows_by_scope: Dict[Tuple[str, str], List[DailyMetricRow]] = defaultdict(list)
+    if scopes:
+        cached = db.query(CachedDailyMetric).filter(
+            tuple_(CachedDailyMetric.provider, CachedDailyMetric.account_id).in_(scopes),
+            CachedDailyMetric.level == "campaign",
+            CachedDailyMetric.scope == "",
+            CachedDailyMetric.date >= start,
+            CachedDailyMetric.date <= end,
+        )
+        for metric in cached:
+            rows_by_scope[(metric.provider, metric.account_id)].append(metrics_cache.row_from_model(metric))
+
+    generated_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    snapshots = {}
+    for preset, preset_range in DATE_PRESETS.items():
+        preset_start, preset_end = preset_range(today)
+        in_range = {
+            scope: [row for row in rows if preset_start <= row.date <= preset_end]
+            for scope, rows in rows_by_scope.items()
+        }
+        channels = []
+        for channel in ("google", "meta"):
+            channel_scopes = [scope for scope in scopes if scope[0] == channel]
+            if channel_scopes:
+                channel_rows = [row for scope in channel_scopes for row in in_range.get(scope, [])]
+                channels.append({"channel": channel, "accounts": len(channel_scopes), **_summary(channel_rows)})
+        campaigns = [
+            _top_campaign(provider, account_id, campaign)
+            for (provider, account_id), rows in in_range.items()
+            for campaign in metrics_cache.campaigns_from_daily(rows, provider)
+        ]
+        campaigns.sort(key=lambda campaign: campaign["spend"], reverse=True)
+        snapshots[preset] = {
+            "preset": preset,
+            "start_date": preset_start,
+            "end_date": preset_end,
+            "generated_at": generated_at,
+            "totals": _summary(row for rows in in_range.values() for row in rows),
+            "channels": channels,
+            "top_campaigns": campaigns[:TOP_CAMPAIGNS],
+        }
+    return snapshots
+
+
+def refresh_user_snapshots(db: Session, user_id: int, today: Optional[date] = None) -> Dict[str, str]:
+    """
+    Regenera e grava os snapshots de todos os presets do usuário; retorna o
+    ETag de cada preset
+    """
+    with start_span("dashboard.snapshots", user_id=user_id) as span:
+        snapshots = build_snapshots(db, user_id, today)
+        payloads = {preset: dumps(content) for preset, content in snapshots.items()}
+        etags = {preset: compute_etag(payload) for preset, payload in payloads.items()}
+        for attempt in range(2):
+            try:
+                for preset, payload in payloads.items():
+                    db.merge(DashboardSnapshot(
+                        user_id=user_id,
+                        preset=preset,
+                        payload=payload,
+                        etag=etags[preset],
+                        generated_at=snapshots[preset]["generated_at"],
+                    ))
+                db.commit()
+                break
+            except IntegrityError:
+                # Outra sincronização do mesmo usuário gravou ao mesmo tempo: regravar por cima
+                db.rollback()
+                if attempt:
+                    raise
+        span.set(presets=len(payloads), bytes=sum(len(payload) for payload in payloads.values()))
+    return etags
+
+
+def get_snapshot(db: Session, user_id: int, preset: str) -> Optional[DashboardSnapshot]:
+    return db.get(DashboardSnapshot, (user_id, preset))
@@ -0,0 +1,123 @@
+import json
+import urllib.error
+import urllib.request
+from importlib import import_module
+from typing import Any, Dict, Iterator, Optional
+
+
+class _RestPager:
+    """
+    Equivalente ao SearchPager do SDK: .pages percorre as páginas e a
+    iteração direta percorre as linhas de todas elas
+    """
+
+    def __init__(self, service: "_RestGoogleAdsService", request: Any, response: Any):
+        self._service = service
+        self._request = request
+        self._response = response
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._response, name)
+
+    @property
+    def pages(self) -> Iterator[Any]:
+        yield self._response
+        while self._response.next_page_token:
+            self._request.page_token = self._response.next_page_token
+            self._response = self._service._search_page(self._request)
+            yield self._response
+
+    def __iter__(self) -> Iterator[Any]:
+        for page in self.pages:
+            yield from page.results
+
+
+class _RestGoogleAdsService:
+    def __init__(self, client: "RestGoogleAdsClient"):
+        self._client = client
+
+    def _search_page(self, request: Any) -> Any:
+        body = {"query": request.query}
+        if request.page_token:
+            body["pageToken"] = request.page_token
+        data = self._client._post(request.customer_id, "googleAds:search", body)
+        return self._client._types.SearchGoogleAdsResponse.from_json(data, ignore_unknown_fields=True)
+
+    def search(self, request: Any = None, *, customer_id: Optional[str] = None, query: Optional[str] = None) -> _RestPager:
+        if request is None:
+            request = self._client._types.SearchGoogleAdsRequest(customer_id=customer_id, query=query)
+        else:
+            request = self._client._types.SearchGoogleAdsRequest(request)
+        return _RestPager(self, request, self._search_page(request))
+
+    def search_stream(self, request: Any = None, *, customer_id: Optional[str] = None, query: Optional[str] = None) -> Iterator[Any]:
+        if request is None:
+            request = self._client._types.SearchGoogleAdsStreamRequest(customer_id=customer_id, query=query)
+        data = self._client._post(request.customer_id, "googleAds:searchStream", {"query": request.query})
+        stream_response = self._client._types.SearchGoogleAdsStreamResponse
+        for batch in json.loads(data):
+            yield stream_response.from_json(json.dumps(batch), ignore_unknown_fields=True)
+
+
+class RestGoogleAdsClient:
+    """
+    Cliente mínimo com a interface usada do GoogleAdsClient (get_service e
+    get_type) sobre a API REST/JSON do Google Ads.
+
+    Usado quando GOOGLE_ADS_API_URL aponta para o servidor fake dos
+    benchmarks (benchmarks/fake_ads_server.py): não há OAuth nem gRPC, e os
+    erros HTTP são convertidos em GoogleAdsException como no SDK.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        developer_token: str,
+        login_customer_id: Optional[str] = None,
+        version: Optional[str] = None,
+        timeout: float = 60,
+    ):
+        from google.ads.googleads.client import _DEFAULT_VERSION
+
+        self.base_url = base_url.rstrip("/")
+        self.developer_token = developer_token
+        self.login_customer_id = login_customer_id
+        self.version = version or _DEFAULT_VERSION
+        self.timeout = timeout
+        self._types = import_module(f"google.ads.googleads.{self.version}.services.types.google_ads_service")
+
+    def get_service(self, name: str) -> _RestGoogleAdsService:
+        if name != "GoogleAdsService":
+            raise ValueError(f"Serviço {name} não suportado pelo cliente REST")
+        return _RestGoogleAdsService(self)
+
+    def get_type(self, name: str) -> Any:
+        return getattr(self._types, name)()
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {"Content-Type": "application/json", "developer-token": self.developer_token or ""}
+        if self.login_customer_id:
+            headers["login-customer-id"] = self.login_customer_id
+        return headers
+
+    def _post(self, customer_id: str, method: str, body: Dict[str, Any]) -> bytes:
+        url = f"{self.base_url}/{self.version}/customers/{customer_id}/{method}"
+        request = urllib.request.Request(url, data=json.dumps(body).encode(), headers=self._headers(), method="POST")
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.read()
+        except urllib.error.HTTPError as e:
+            raise self._exception(e) from None
+
+    def _exception(self, error: urllib.error.HTTPError) -> Exception:
+        from google.ads.googleads.errors import GoogleAdsException
+
+        failure_type = import_module(f"google.ads.googleads.{self.version}.errors.types.errors").GoogleAdsFailure
+        body = json.loads(error.read() or b"{}").get("error", {})
+        failure_json = next(
+            (detail for detail in body.get("details", []) if detail.get("@type", "").endswith("GoogleAdsFailure")),
+            {},
+        )
+        failure_json = {key: value for key, value in failure_json.items() if key != "@type"}
+        failure = failure_type.from_json(json.dumps(failure_json), ignore_unknown_fields=True)
+        return GoogleAdsException(error, None, failure, failure.request_id)
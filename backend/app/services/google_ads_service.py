@@ -1,10 +1,240 @@
-from google.ads.googleads.client import GoogleAdsClient
-from google.ads.googleads.errors import GoogleAdsException
-from typing import Dict, List, Optional, Any
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Any, List, Optional
+import contextvars
 import logging
+import threading
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import observe_upstream
+from app.core.tracing import start_span, tracing_enabled
+from app.services.google_ads_rest import RestGoogleAdsClient
+from app.services.rows import (
+    AdData,
+    AdGroupData,
+    CampaignData,
+    ClientCampaignsData,
+    CustomerClientData,
+    DailyMetricRow,
+)
+from app.services.upstream import call_with_throttle_retry
 
 logger = logging.getLogger(__name__)
 
+# Classes do SDK, preenchidas por load_sdk() no primeiro uso do serviço
+GoogleAdsClient = None
+GoogleAdsException = None
+SharedTokenCredentials = None
+get_token_store = None
+_sdk_lock = threading.Lock()
+
+
+def load_sdk() -> None:
+    """
+    Importa o SDK do Google Ads sob demanda.
+
+    A árvore de protos do google-ads leva segundos para importar e ocupa
+    dezenas de MB; importá-la no nível do módulo fazia todo worker pagar esse
+    custo no boot, mesmo sem nunca atender uma rota do Google Ads.
+    """
+    global GoogleAdsClient, GoogleAdsException, SharedTokenCredentials, get_token_store
+    if GoogleAdsClient is not None:
+        return
+    with _sdk_lock:
+        if GoogleAdsClient is None:
+            from google.ads.googleads.errors import GoogleAdsException as _exception
+            from google.ads.googleads.client import GoogleAdsClient as _client
+            # oauth_tokens importa o google-auth
+            from app.services.oauth_tokens import SharedTokenCredentials as _credentials, get_token_store as _get_store
+            GoogleAdsException = _exception
+            SharedTokenCredentials = _credentials
+            get_token_store = _get_store
+            GoogleAdsClient = _client
+
+
+def _is_throttled(error: Exception) -> bool:
+    """
+    Erros de cota (QuotaError), como RESOURCE_EXHAUSTED, indicam throttling
+    """
+    if not isinstance(error, GoogleAdsException):
+        return False
+    return any(e.error_code.quota_error for e in error.failure.errors)
+
+
+def _message_size(message: Any) -> Optional[int]:
+    # Tamanho serializado da página (proto-plus encapsula a mensagem protobuf)
+    try:
+        return type(message).pb(message).ByteSize()
+    except (AttributeError, TypeError):
+        return None
+
+
+def _campaign_from_row(row: Any) -> CampaignData:
+    """
+    Converte uma linha da consulta de campanhas em CampaignData
+    """
+    campaign = row.campaign
+    metrics = row.metrics
+    
+    # Converter micros para unidades monetárias reais
+    cost = metrics.cost_micros / 1000000.0
+    cpc = metrics.average_cpc / 1000000.0 if metrics.average_cpc else 0
+    cpa = metrics.cost_per_conversion / 1000000.0 if metrics.cost_per_conversion else 0
+    cpm = metrics.average_cpm / 1000000.0 if metrics.average_cpm else 0
+    
+    # Calcular ROAS (se houver conversões e custo)
+    roas = 0
+    if metrics.conversions > 0 and cost > 0:
+        # Valor estimado por conversão (exemplo)
+        estimated_conversion_value = 100  # Valor fictício, idealmente viria dos dados
+        roas = (metrics.conversions * estimated_conversion_value) / cost
+    
+    # Argumentos posicionais (mesma ordem dos campos): bem mais rápido que kwargs
+    return CampaignData(
+        campaign.id,
+        campaign.name,
+        # .name: no Python 3.11+ str() de um IntEnum retorna o número
+        campaign.status.name,
+        campaign.advertising_channel_type.name,
+        campaign.start_date_time,
+        campaign.end_date_time,
+        metrics.impressions,
+        metrics.clicks,
+        metrics.ctr,
+        metrics.conversions,
+        cost,
+        cpc,
+        cpa,
+        cpm,
+        roas
+    )
+
+
+def _customer_client_from_row(row: Any) -> CustomerClientData:
+    client = row.customer_client
+    return CustomerClientData(
+        client.id,
+        client.descriptive_name or None,
+        client.manager,
+        client.level,
+        client.status.name,
+        client.currency_code or None,
+    )
+
+
+def _error_message(error: Exception) -> str:
+    # GoogleAdsException traz a causa em failure.errors; str(error) não a mostra
+    failure = getattr(error, "failure", None)
+    if failure is not None and failure.errors:
+        return failure.errors[0].message
+    return str(error) or type(error).__name__
+
+
+def _ad_group_from_row(row: Any) -> AdGroupData:
+    """
+    Converte uma linha da consulta de grupos de anúncios em AdGroupData
+    """
+    ad_group = row.ad_group
+    metrics = row.metrics
+    
+    return AdGroupData(
+        ad_group.id,
+        ad_group.name,
+        ad_group.status.name,
+        metrics.impressions,
+        metrics.clicks,
+        metrics.ctr,
+        metrics.conversions,
+        # Converter micros para unidades monetárias reais
+        metrics.cost_micros / 1000000.0
+    )
+
+
+def _ad_from_row(row: Any) -> AdData:
+    """
+    Converte uma linha da consulta de anúncios em AdData
+    """
+    ad_group_ad = row.ad_group_ad
+    ad = ad_group_ad.ad
+    metrics = row.metrics
+    
+    # Determinar o tipo de anúncio e obter a URL da imagem, se disponível
+    thumbnail_url = None
+    if hasattr(ad, 'image_ad') and ad.image_ad.image_url:
+        thumbnail_url = ad.image_ad.image_url
+    
+    return AdData(
+        ad.id,
+        ad.name,
+        ad_group_ad.status.name,
+        metrics.impressions,
+        metrics.clicks,
+        metrics.ctr,
+        metrics.conversions,
+        # Converter micros para unidades monetárias reais
+        metrics.cost_micros / 1000000.0,
+        thumbnail_url,
+        # Obter URL final do anúncio
+        final_url=ad.final_urls[0] if ad.final_urls else None
+    )
+
+
+def _daily_metrics(row: Any, entity_id: Any, attributes: dict) -> DailyMetricRow:
+    """
+    Linha diária (consulta segmentada por segments.date) para o cache de métricas
+    """
+    metrics = row.metrics
+    return DailyMetricRow(
+        str(entity_id),
+        date.fromisoformat(row.segments.date),
+        metrics.impressions,
+        metrics.clicks,
+        metrics.conversions,
+        # Converter micros para unidades monetárias reais
+        metrics.cost_micros / 1000000.0,
+        # Mesmo valor fictício por conversão usado no ROAS de _campaign_from_row
+        metrics.conversions * 100,
+        attributes,
+    )
+
+
+def _campaign_daily_from_row(row: Any) -> DailyMetricRow:
+    campaign = row.campaign
+    return _daily_metrics(row, campaign.id, {
+        "name": campaign.name,
+        "status": campaign.status.name,
+        "channel": campaign.advertising_channel_type.name,
+        "start_date": campaign.start_date_time,
+        "end_date": campaign.end_date_time,
+    })
+
+
+def _ad_daily_from_row(row: Any) -> DailyMetricRow:
+    ad_group_ad = row.ad_group_ad
+    ad = ad_group_ad.ad
+    return _daily_metrics(row, ad.id, {
+        "name": ad.name,
+        "status": ad_group_ad.status.name,
+        "thumbnail_url": ad.image_ad.image_url or None,
+        "final_url": ad.final_urls[0] if ad.final_urls else None,
+        "ad_group": row.ad_group.name,
+    })
+
+
+# Hierarquia (customer_client) de cada MCC: muda raramente e custa uma
+# consulta por MCC
+_hierarchy_cache = TTLCache(
+    ttl_seconds=settings.GOOGLE_ADS_HIERARCHY_CACHE_SECONDS, max_entries=1024, name="google_ads_hierarchy"
+)
+
+# Threads das consultas às contas clientes das MCCs, compartilhadas entre as
+# requisições: várias MCCs ao mesmo tempo não multiplicam as threads do
+# worker nem as chamadas simultâneas à API. As threads só são criadas no
+# primeiro uso, já no worker (depois do fork do gunicorn)
+_mcc_pool = ThreadPoolExecutor(max_workers=settings.GOOGLE_ADS_MCC_CONCURRENCY, thread_name_prefix="google-ads-mcc")
+
+
 class GoogleAdsService:
     """
     Serviço para interagir com a API do Google Ads
@@ -16,10 +246,14 @@ class GoogleAdsService:
         client_secret: str,
         developer_token: str,
         refresh_token: str,
-        login_customer_id: Optional[str] = None
+        login_customer_id: Optional[str] = None,
+        api_url: Optional[str] = None
     ):
         """
-        Inicializa o cliente do Google Ads com as credenciais fornecidas
+        Inicializa o cliente do Google Ads com as credenciais fornecidas.
+
+        Com api_url, usa o cliente REST (sem OAuth) apontando para essa URL,
+        como o servidor fake dos benchmarks
         """
         self.client_config = {
             "client_id": client_id,
@@ -32,27 +266,80 @@ class GoogleAdsService:
         if login_customer_id:
             self.client_config["login_customer_id"] = login_customer_id
             
+        load_sdk()
+        if api_url:
+            self.client = RestGoogleAdsClient(api_url, developer_token, login_customer_id)
+            return
         try:
-            self.client = GoogleAdsClient.load_from_dict(self.client_config)
+            token_store = get_token_store()
+            if token_store is None:
+                self.client = GoogleAdsClient.load_from_dict(self.client_config)
+                return
+            # load_from_dict trocaria o refresh_token por um access token a
+            # cada cliente criado; o token compartilhado só é obtido (e, se
+            # preciso, renovado) na primeira chamada à API
+            self.client = GoogleAdsClient(
+                SharedTokenCredentials(client_id, client_secret, refresh_token, token_store),
+                developer_token=developer_token,
+                login_customer_id=login_customer_id,
+                use_proto_plus=True,
+            )
         except GoogleAdsException as ex:
             logger.error(f"Erro ao inicializar cliente Google Ads: {ex}")
             raise
+
+    def _search(self, customer_id: str, query: str) -> List[Any]:
+        """
+        Executa a consulta GAQL página a página, com um span por página e o
+        total de linhas, páginas e bytes no span da consulta
+        """
+        ga_service = self.client.get_service("GoogleAdsService")
+        request = self.client.get_type("SearchGoogleAdsRequest")
+        request.customer_id = customer_id
+        request.query = query
+
+        rows: List[Any] = []
+        with start_span(
+            "google_ads.search", customer_id=customer_id, query=" ".join(query.split())
+        ) as search_span:
+            page_number = 0
+            while True:
+                with start_span("google_ads.search.page", customer_id=customer_id, page=page_number) as page_span:
+                    # O pager devolve a resposta já obtida como primeira página;
+                    # a paginação é feita aqui para medir (e repetir) cada página
+                    page = call_with_throttle_retry(
+                        lambda: next(iter(ga_service.search(request=request).pages)),
+                        _is_throttled,
+                        page_span,
+                        search_span,
+                    )
+                    # Serializar a página só para medir o tamanho tem custo: apenas com tracing
+                    page_bytes = _message_size(page) if tracing_enabled() else None
+                    page_span.set(rows=len(page.results), bytes=page_bytes)
+                rows.extend(page.results)
+                search_span.incr("pages")
+                search_span.incr("bytes", page_bytes or 0)
+                if not page.next_page_token:
+                    break
+                request.page_token = page.next_page_token
+                page_number += 1
+            search_span.set(rows=len(rows))
+        return rows
     
-    def get_campaigns(self, customer_id: str) -> List[Dict[str, Any]]:
+    @observe_upstream("google_ads", "get_campaigns")
+    def get_campaigns(self, customer_id: str) -> List[CampaignData]:
         """
         Obtém a lista de campanhas para o ID de cliente fornecido
         """
         try:
-            ga_service = self.client.get_service("GoogleAdsService")
-            
             # Consulta para obter campanhas e métricas básicas
             query = """
                 SELECT
                   campaign.id,
                   campaign.name,
                   campaign.status,
-                  campaign.start_date,
-                  campaign.end_date,
+                  campaign.start_date_time,
+                  campaign.end_date_time,
                   campaign.advertising_channel_type,
                   metrics.impressions,
                   metrics.clicks,
@@ -60,7 +347,6 @@ class GoogleAdsService:
                   metrics.conversions,
                   metrics.cost_micros,
                   metrics.average_cpc,
-                  metrics.average_cpa,
                   metrics.average_cpm,
                   metrics.cost_per_conversion
                 FROM campaign
@@ -68,47 +354,8 @@ class GoogleAdsService:
                 ORDER BY campaign.name
             """
             
-            # Executar a consulta
-            response = ga_service.search(customer_id=customer_id, query=query)
-            
-            # Processar os resultados
-            campaigns = []
-            for row in response:
-                campaign = row.campaign
-                metrics = row.metrics
-                
-                # Converter micros para unidades monetárias reais
-                cost = metrics.cost_micros / 1000000.0
-                cpc = metrics.average_cpc / 1000000.0 if metrics.average_cpc else 0
-                cpa = metrics.average_cpa / 1000000.0 if metrics.average_cpa else 0
-                cpm = metrics.average_cpm / 1000000.0 if metrics.average_cpm else 0
-                
-                # Calcular ROAS (se houver conversões e custo)
-                roas = 0
-                if metrics.conversions > 0 and cost > 0:
-                    # Valor estimado por conversão (exemplo)
-                    estimated_conversion_value = 100  # Valor fictício, idealmente viria dos dados
-                    roas = (metrics.conversions * estimated_conversion_value) / cost
-                
-                campaigns.append({
-                    "id": campaign.id,
-                    "name": campaign.name,
-                    "status": str(campaign.status).replace("CampaignStatus.", ""),
-                    "channel": str(campaign.advertising_channel_type).replace("AdvertisingChannelType.", ""),
-                    "start_date": campaign.start_date,
-                    "end_date": campaign.end_date,
-                    "impressions": metrics.impressions,
-                    "clicks": metrics.clicks,
-                    "ctr": metrics.ctr,
-                    "conversions": metrics.conversions,
-                    "spend": cost,
-                    "cpc": cpc,
-                    "cpa": cpa,
-                    "cpm": cpm,
-                    "roas": roas
-                })
-            
-            return campaigns
+            # Executar a consulta e processar os resultados
+            return [_campaign_from_row(row) for row in self._search(customer_id, query)]
             
         except GoogleAdsException as ex:
             logger.error(f"Erro ao obter campanhas do Google Ads: {ex}")
@@ -118,13 +365,12 @@ class GoogleAdsService:
                 logger.error(f"\tError location: {error.location}")
             raise
     
-    def get_ad_groups(self, customer_id: str, campaign_id: str) -> List[Dict[str, Any]]:
+    @observe_upstream("google_ads", "get_ad_groups")
+    def get_ad_groups(self, customer_id: str, campaign_id: str) -> List[AdGroupData]:
         """
         Obtém os grupos de anúncios para uma campanha específica
         """
         try:
-            ga_service = self.client.get_service("GoogleAdsService")
-            
             # Consulta para obter grupos de anúncios
             query = f"""
                 SELECT
@@ -141,42 +387,19 @@ class GoogleAdsService:
                 ORDER BY ad_group.name
             """
             
-            # Executar a consulta
-            response = ga_service.search(customer_id=customer_id, query=query)
-            
-            # Processar os resultados
-            ad_groups = []
-            for row in response:
-                ad_group = row.ad_group
-                metrics = row.metrics
-                
-                # Converter micros para unidades monetárias reais
-                cost = metrics.cost_micros / 1000000.0
-                
-                ad_groups.append({
-                    "id": ad_group.id,
-                    "name": ad_group.name,
-                    "status": str(ad_group.status).replace("AdGroupStatus.", ""),
-                    "impressions": metrics.impressions,
-                    "clicks": metrics.clicks,
-                    "ctr": metrics.ctr,
-                    "conversions": metrics.conversions,
-                    "spend": cost
-                })
-            
-            return ad_groups
+            # Executar a consulta e processar os resultados
+            return [_ad_group_from_row(row) for row in self._search(customer_id, query)]
             
         except GoogleAdsException as ex:
             logger.error(f"Erro ao obter grupos de anúncios do Google Ads: {ex}")
             raise
     
-    def get_ads(self, customer_id: str, ad_group_id: str) -> List[Dict[str, Any]]:
+    @observe_upstream("google_ads", "get_ads")
+    def get_ads(self, customer_id: str, ad_group_id: str) -> List[AdData]:
         """
         Obtém os anúncios para um grupo de anúncios específico
         """
         try:
-            ga_service = self.client.get_service("GoogleAdsService")
-            
             # Consulta para obter anúncios
             query = f"""
                 SELECT
@@ -198,42 +421,160 @@ class GoogleAdsService:
                 ORDER BY ad_group_ad.ad.name
             """
             
-            # Executar a consulta
-            response = ga_service.search(customer_id=customer_id, query=query)
+            # Executar a consulta e processar os resultados
+            return [_ad_from_row(row) for row in self._search(customer_id, query)]
             
-            # Processar os resultados
+        except GoogleAdsException as ex:
+            logger.error(f"Erro ao obter anúncios do Google Ads: {ex}")
+            raise
+
+    @observe_upstream("google_ads", "get_account_ads")
+    def get_account_ads(self, customer_id: str) -> List[AdData]:
+        """
+        Obtém todos os anúncios da conta com a campanha e o grupo de cada um,
+        numa única consulta (catálogo de app/services/catalog_sync.py)
+        """
+        try:
+            query = """
+                SELECT
+                  campaign.id,
+                  ad_group.name,
+                  ad_group_ad.ad.id,
+                  ad_group_ad.ad.name,
+                  ad_group_ad.ad.final_urls,
+                  ad_group_ad.status,
+                  ad_group_ad.ad.image_ad.image_url,
+                  metrics.impressions,
+                  metrics.clicks,
+                  metrics.ctr,
+                  metrics.conversions,
+                  metrics.cost_micros
+                FROM ad_group_ad
+                WHERE ad_group_ad.status != 'REMOVED'
+            """
             ads = []
-            for row in response:
-                ad_group_ad = row.ad_group_ad
-                ad = ad_group_ad.ad
-                metrics = row.metrics
-                
-                # Converter micros para unidades monetárias reais
-                cost = metrics.cost_micros / 1000000.0
-                
-                # Determinar o tipo de anúncio e obter a URL da imagem, se disponível
-                thumbnail_url = None
-                if hasattr(ad, 'image_ad') and ad.image_ad.image_url:
-                    thumbnail_url = ad.image_ad.image_url
-                
-                # Obter URL final do anúncio
-                final_url = ad.final_urls[0] if ad.final_urls else None
-                
-                ads.append({
-                    "id": ad.id,
-                    "name": ad.name,
-                    "status": str(ad_group_ad.status).replace("AdGroupAdStatus.", ""),
-                    "thumbnail_url": thumbnail_url,
-                    "final_url": final_url,
-                    "impressions": metrics.impressions,
-                    "clicks": metrics.clicks,
-                    "ctr": metrics.ctr,
-                    "conversions": metrics.conversions,
-                    "spend": cost
-                })
-            
+            for row in self._search(customer_id, query):
+                ad = _ad_from_row(row)
+                ad.ad_group = row.ad_group.name
+                ad.campaign_id = row.campaign.id
+                ads.append(ad)
             return ads
-            
         except GoogleAdsException as ex:
-            logger.error(f"Erro ao obter anúncios do Google Ads: {ex}")
+            logger.error(f"Erro ao obter anúncios da conta do Google Ads: {ex}")
+            raise
+
+    @observe_upstream("google_ads", "get_campaign_daily_metrics")
+    def get_campaign_daily_metrics(self, customer_id: str, start_date: date, end_date: date) -> List[DailyMetricRow]:
+        """
+        Métricas diárias das campanhas no período (uma linha por campanha e dia com dados)
+        """
+        try:
+            query = f"""
+                SELECT
+                  campaign.id,
+                  campaign.name,
+                  campaign.status,
+                  campaign.start_date_time,
+                  campaign.end_date_time,
+                  campaign.advertising_channel_type,
+                  segments.date,
+                  metrics.impressions,
+                  metrics.clicks,
+                  metrics.conversions,
+                  metrics.cost_micros
+                FROM campaign
+                WHERE campaign.status != 'REMOVED'
+                  AND segments.date BETWEEN '{start_date.isoformat()}' AND '{end_date.isoformat()}'
+            """
+            return [_campaign_daily_from_row(row) for row in self._search(customer_id, query)]
+        except GoogleAdsException as ex:
+            logger.error(f"Erro ao obter métricas diárias de campanhas do Google Ads: {ex}")
             raise
+
+    @observe_upstream("google_ads", "get_ad_daily_metrics")
+    def get_ad_daily_metrics(
+        self, customer_id: str, campaign_id: str, start_date: date, end_date: date
+    ) -> List[DailyMetricRow]:
+        """
+        Métricas diárias dos anúncios de uma campanha no período, numa única
+        consulta (sem uma consulta por grupo de anúncios)
+        """
+        try:
+            query = f"""
+                SELECT
+                  ad_group.name,
+                  ad_group_ad.ad.id,
+                  ad_group_ad.ad.name,
+                  ad_group_ad.ad.final_urls,
+                  ad_group_ad.status,
+                  ad_group_ad.ad.image_ad.image_url,
+                  segments.date,
+                  metrics.impressions,
+                  metrics.clicks,
+                  metrics.conversions,
+                  metrics.cost_micros
+                FROM ad_group_ad
+                WHERE campaign.id = {int(campaign_id)}
+                  AND segments.date BETWEEN '{start_date.isoformat()}' AND '{end_date.isoformat()}'
+            """
+            return [_ad_daily_from_row(row) for row in self._search(customer_id, query)]
+        except GoogleAdsException as ex:
+            logger.error(f"Erro ao obter métricas diárias de anúncios do Google Ads: {ex}")
+            raise
+
+    @observe_upstream("google_ads", "get_customer_clients")
+    def get_customer_clients(self, manager_id: str, refresh: bool = False) -> List[CustomerClientData]:
+        """
+        Hierarquia de uma conta de administrador (MCC): a própria MCC (level 0)
+        e todas as contas abaixo dela, diretas e indiretas. O recurso
+        customer_client já traz todos os níveis, então basta uma consulta em
+        vez de uma por sub-MCC. Em cache por GOOGLE_ADS_HIERARCHY_CACHE_SECONDS
+        """
+        if not refresh:
+            clients = _hierarchy_cache.get(manager_id)
+            if clients is not None:
+                return clients
+        try:
+            query = """
+                SELECT
+                  customer_client.id,
+                  customer_client.descriptive_name,
+                  customer_client.manager,
+                  customer_client.level,
+                  customer_client.status,
+                  customer_client.currency_code
+                FROM customer_client
+                WHERE customer_client.status = 'ENABLED'
+                ORDER BY customer_client.level
+            """
+            clients = [_customer_client_from_row(row) for row in self._search(manager_id, query)]
+        except GoogleAdsException as ex:
+            logger.error(f"Erro ao obter a hierarquia da conta de administrador: {ex}")
+            raise
+        _hierarchy_cache.set(manager_id, clients)
+        return clients
+
+    def get_client_campaigns(self, manager_id: str, refresh: bool = False) -> List[ClientCampaignsData]:
+        """
+        Campanhas de todas as contas clientes (não-administradoras) de uma MCC,
+        consultadas em paralelo pelas GOOGLE_ADS_MCC_CONCURRENCY threads do
+        worker, compartilhadas com as outras requisições.
+        O serviço deve ter sido criado com login_customer_id da MCC
+        """
+        clients = [client for client in self.get_customer_clients(manager_id, refresh) if not client.manager]
+
+        def fetch(client: CustomerClientData) -> ClientCampaignsData:
+            try:
+                return ClientCampaignsData(client.id, client.name, self.get_campaigns(str(client.id)))
+            except Exception as e:
+                logger.warning(f"Erro ao obter campanhas da conta cliente {client.id} da MCC {manager_id}: {_error_message(e)}")
+                return ClientCampaignsData(client.id, client.name, [], error=_error_message(e))
+
+        if not clients:
+            return []
+        with start_span("google_ads.mcc", manager_id=manager_id, clients=len(clients)) as span:
+            # Um contexto por tarefa: os spans de cada conta ficam sob o span da MCC
+            futures = [_mcc_pool.submit(contextvars.copy_context().run, fetch, client) for client in clients]
+            results = [future.result() for future in futures]
+            span.set(errors=sum(1 for result in results if result.error))
+        return results
@@ -0,0 +1,97 @@
+"""
+Eventos com as linhas de campanhas e anúncios que mudaram, para o push via
+SSE (app/routes/events.py) no lugar do polling dos dashboards
+
+Publicam eventos:
+- o cache das respostas (app/core/conditional.py): quando um recurso de
+  campanhas ou anúncios é buscado de novo e o conteúdo mudou, apenas as
+  linhas alteradas e os ids removidos;
+- a sincronização (app/services/sync_service.py): as campanhas da janela
+  sincronizada comparadas com as do cache diário antes dela, e os novos
+  ETags dos snapshots do dashboard.
+
+Cada worker compara com a própria versão em cache, então a mesma mudança
+pode chegar mais de uma vez; aplicar as linhas por id é idempotente.
+"""
+from datetime import date
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import orjson
+
+from app.core import events
+from app.core.conditional import on_payload_change
+from app.core.serialization import dumps
+from app.services import metrics_cache
+
+_PROVIDERS = {"google-ads": "google", "meta-ads": "meta"}
+
+
+def diff_rows(previous: Sequence[Dict[str, Any]], current: Sequence[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Any]]:
+    """
+    Linhas novas ou alteradas e ids removidos, comparando pelo id
+    """
+    before = {row["id"]: row for row in previous}
+    changed = [row for row in current if before.get(row["id"]) != row]
+    current_ids = {row["id"] for row in current}
+    removed = [row_id for row_id in before if row_id not in current_ids]
+    return changed, removed
+
+
+def rows_event(
+    resource: str,
+    provider: str,
+    account_id: int,
+    rows: List[Dict[str, Any]],
+    removed: List[Any],
+    campaign_id: Optional[str] = None,
+    date_range: Optional[Tuple[date, date]] = None,
+) -> Dict[str, Any]:
+    return {
+        "type": "rows",
+        "resource": resource,  # campaigns, ads
+        "provider": provider,
+        "account_id": account_id,  # id da conta no banco, como nas rotas
+        "campaign_id": campaign_id,
+        "date_range": [day.isoformat() for day in date_range] if date_range else None,
+        "rows": rows,
+        "removed": removed,
+    }
+
+
+@on_payload_change
+def publish_payload_changes(key: Hashable, previous_body: bytes, body: bytes) -> None:
+    # Chaves das rotas: (prefixo, "campaigns", conta, período) e
+    # (prefixo, "ads", conta, campanha, período)
+    if not isinstance(key, tuple) or len(key) < 4 or key[0] not in _PROVIDERS:
+        return
+    if key[1] == "campaigns":
+        campaign_id, date_range = None, key[3]
+    elif key[1] == "ads" and len(key) == 5:
+        campaign_id, date_range = key[3], key[4]
+    else:
+        return
+    changed, removed = diff_rows(orjson.loads(previous_body), orjson.loads(body))
+    if changed or removed:
+        events.publish(rows_event(key[1], _PROVIDERS[key[0]], key[2], changed, removed, campaign_id, date_range))
+
+
+def publish_sync_changes(db: Any, result: Any) -> None:
+    """
+    Hook de fim de sincronização: campanhas da janela que mudaram com ela
+    """
+    def campaign_rows(rows: List[metrics_cache.DailyMetricRow]) -> List[Dict[str, Any]]:
+        return orjson.loads(dumps(metrics_cache.campaigns_from_daily(rows, result.provider)))
+
+    changed, removed = diff_rows(campaign_rows(result.previous_rows), campaign_rows(result.current_rows))
+    if changed or removed:
+        events.publish(rows_event(
+            "campaigns", result.provider, result.account_id, changed, removed,
+            date_range=(result.start_date, result.end_date),
+        ))
+
+
+def publish_dashboard(user_id: int, etags: Dict[str, str]) -> None:
+    """
+    Snapshots do dashboard regenerados: o cliente busca de novo os presets que exibe
+    """
+    events.publish({"type": "dashboard", "user_id": user_id, "etags": etags})
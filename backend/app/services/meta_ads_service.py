@@ -1,15 +1,343 @@
-from facebook_business.api import FacebookAdsApi
-from facebook_business.adobjects.adaccount import AdAccount
-from facebook_business.adobjects.campaign import Campaign
-from facebook_business.adobjects.adset import AdSet
-from facebook_business.adobjects.ad import Ad
-from facebook_business.adobjects.adcreative import AdCreative
-from facebook_business.exceptions import FacebookRequestError
-from typing import Dict, List, Optional, Any
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
 import logging
+import re
+import threading
+import time
+import warnings
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import observe_upstream
+from app.core.tracing import start_span
+from app.services.rows import AdData, CampaignData, DailyMetricRow
+from app.services.upstream import call_with_throttle_retry
 
 logger = logging.getLogger(__name__)
 
+# Classes do SDK, preenchidas por load_sdk() no primeiro uso do serviço
+FacebookAdsApi = None
+FacebookSession = None
+AdAccount = None
+Campaign = None
+AdSet = None
+Ad = None
+AdCreative = None
+AdsInsights = None
+AdReportRun = None
+FacebookRequestError = None
+FacebookUnavailablePropertyException = None
+_sdk_lock = threading.Lock()
+
+
+def load_sdk() -> None:
+    """
+    Importa o SDK facebook_business sob demanda, no primeiro uso do serviço
+    """
+    global FacebookAdsApi, FacebookSession, AdAccount, Campaign, AdSet, Ad, AdCreative, AdsInsights, AdReportRun, FacebookRequestError
+    global FacebookUnavailablePropertyException
+    if FacebookAdsApi is not None:
+        return
+    with _sdk_lock:
+        if FacebookAdsApi is None:
+            from facebook_business.adobjects.adaccount import AdAccount as _ad_account
+            from facebook_business.adobjects.campaign import Campaign as _campaign
+            from facebook_business.adobjects.adset import AdSet as _ad_set
+            from facebook_business.adobjects.ad import Ad as _ad
+            from facebook_business.adobjects.adcreative import AdCreative as _ad_creative
+            from facebook_business.adobjects.adsinsights import AdsInsights as _ads_insights
+            from facebook_business.adobjects.adreportrun import AdReportRun as _ad_report_run
+            from facebook_business.exceptions import FacebookRequestError as _request_error
+            from facebook_business.exceptions import FacebookUnavailablePropertyException as _unavailable_property
+            from facebook_business.api import FacebookAdsApi as _api
+            from facebook_business.session import FacebookSession as _session
+            AdAccount = _ad_account
+            Campaign = _campaign
+            AdSet = _ad_set
+            Ad = _ad
+            AdCreative = _ad_creative
+            AdsInsights = _ads_insights
+            AdReportRun = _ad_report_run
+            FacebookSession = _session
+            FacebookRequestError = _request_error
+            FacebookUnavailablePropertyException = _unavailable_property
+            # Atribuído por último: é a sentinela de "SDK carregado"
+            FacebookAdsApi = _api
+
+
+# Códigos de erro da Graph API para limite de requisições (app, usuário, conta)
+_THROTTLE_ERROR_CODES = {4, 17, 32, 613, *range(80000, 80015)}
+
+
+def _is_throttled(error: Exception) -> bool:
+    if not isinstance(error, FacebookRequestError):
+        return False
+    return error.api_error_code() in _THROTTLE_ERROR_CODES or error.http_status() == 429
+
+
+def _page_attributes(headers: Mapping[str, str]) -> dict:
+    """
+    Tamanho da página e uso do limite de requisições da conta, a partir dos
+    headers da resposta
+    """
+    content_length = headers.get("content-length")
+    return {
+        "bytes": int(content_length) if content_length else None,
+        "ad_account_usage": headers.get("x-ad-account-usage"),
+    }
+
+
+def _fetch_pages(fetch: Callable[[], Any], span_name: str, **span_attributes: Any) -> List[Any]:
+    """
+    Lê uma aresta da Graph API página a página, com um span por página e o
+    total de linhas e páginas no span da consulta. fetch faz a primeira
+    chamada e retorna o Cursor do SDK
+    """
+    rows: List[Any] = []
+    with start_span(span_name, **span_attributes) as edge_span:
+        cursor = None
+        page_number = 0
+        # O Cursor do SDK não expõe publicamente se ainda há páginas
+        while cursor is None or not cursor._finished_iteration:
+            with start_span(f"{span_name}.page", page=page_number) as page_span:
+                if cursor is None:
+                    # A primeira página vem na própria chamada da aresta
+                    cursor = call_with_throttle_retry(fetch, _is_throttled, page_span, edge_span)
+                else:
+                    call_with_throttle_retry(cursor.load_next_page, _is_throttled, page_span, edge_span)
+                page_attributes = _page_attributes(cursor.headers())
+                page_span.set(rows=len(cursor), **page_attributes)
+            rows.extend(cursor[i] for i in range(len(cursor)))
+            edge_span.incr("pages")
+            edge_span.incr("bytes", page_attributes["bytes"] or 0)
+            page_number += 1
+        edge_span.set(rows=len(rows))
+    return rows
+
+
+def _fetch_insights(node: Any, fields: Optional[List[str]], params: dict, span_name: str = "meta_ads.insights", **span_attributes: Any) -> List[Any]:
+    """
+    Busca os insights página a página.
+
+    node é a conta (consulta síncrona) ou o AdReportRun de um job assíncrono
+    já concluído: os dois expõem a aresta /insights
+    """
+    return _fetch_pages(lambda: node.get_insights(fields=fields, params=params), span_name, **span_attributes)
+
+
+# Status de um AdReportRun (campo async_status)
+_REPORT_COMPLETED = "Job Completed"
+_REPORT_FAILED = {"Job Failed", "Job Skipped"}
+
+
+@dataclass
+class ReportRunStatus:
+    """
+    Situação de um job assíncrono de insights (AdReportRun)
+    """
+    id: str
+    account_id: Optional[str]
+    status: str
+    percent_completion: int
+    # Período do job (time_range ou date_preset da criação)
+    date_start: Optional[date] = None
+    date_stop: Optional[date] = None
+
+    @property
+    def completed(self) -> bool:
+        return self.status == _REPORT_COMPLETED and self.percent_completion == 100
+
+    @property
+    def failed(self) -> bool:
+        return self.status in _REPORT_FAILED
+
+
+class ReportPending(Exception):
+    """
+    O job assíncrono não terminou dentro do prazo de espera
+    """
+
+    def __init__(self, status: ReportRunStatus):
+        super().__init__(f"Job {status.id} em andamento ({status.percent_completion}%)")
+        self.status = status
+
+
+class ReportFailed(Exception):
+    """
+    O job assíncrono terminou com falha no Meta
+    """
+
+    def __init__(self, status: ReportRunStatus):
+        super().__init__(f"Job {status.id} terminou com status {status.status}")
+        self.status = status
+
+
+# Quantidade de anúncios por conta/campanha, para decidir entre consulta
+# síncrona e job assíncrono sem contar os anúncios a cada requisição
+_ad_count_cache = TTLCache(
+    ttl_seconds=settings.META_AD_COUNT_CACHE_SECONDS, max_entries=4096, name="meta_ad_count"
+)
+
+# A aresta /insights só aceita campos de AdsInsights: ids e nomes de campanha
+# e anúncio vêm nela; status, datas e criativo vêm das arestas /campaigns e
+# /ads, lidas com todos os status para cobrir o que teve métricas no período
+_CAMPAIGN_EFFECTIVE_STATUSES = ["ACTIVE", "PAUSED", "DELETED", "ARCHIVED", "IN_PROCESS", "WITH_ISSUES"]
+_AD_EFFECTIVE_STATUSES = _CAMPAIGN_EFFECTIVE_STATUSES + [
+    "PENDING_REVIEW", "DISAPPROVED", "PREAPPROVED", "PENDING_BILLING_INFO", "CAMPAIGN_PAUSED", "ADSET_PAUSED",
+]
+_EDGE_PAGE_SIZE = 500
+# Campanha ou anúncio ausente da aresta (sem permissão ou removido depois)
+_UNKNOWN_STATUS = "UNKNOWN"
+# Campos do criativo lidos na aresta /ads: miniatura e link de destino
+_CREATIVE_FIELDS = "creative{thumbnail_url,image_url,object_story_spec}"
+# O SDK valida os campos pelos nomes simples e avisa sobre a expansão, que a Graph API aceita
+warnings.filterwarnings("ignore", message=re.escape(f"ads does not allow field {_CREATIVE_FIELDS}"), category=UserWarning)
+_NO_ATTRIBUTES: Mapping[str, Any] = {}
+
+
+def _purchase_conversions(insight: Mapping[str, Any]) -> int:
+    """
+    Extrai as conversões (exemplo: compras) da lista de actions do insight
+    """
+    for action in insight.get("actions") or ():
+        if action["action_type"] == "purchase": # Ajustar conforme o tipo de conversão desejado
+            return int(action["value"])
+    return 0
+
+
+def _purchase_roas(insight: Mapping[str, Any]) -> float:
+    """
+    Extrai o ROAS de compras (se disponível) do insight
+    """
+    for roas_item in insight.get("purchase_roas") or ():
+        if roas_item["action_type"] == "omni_purchase": # Ajustar conforme o tipo de ROAS desejado
+            return float(roas_item["value"])
+    return 0.0
+
+
+def _campaign_from_insight(insight: Mapping[str, Any], campaign: Mapping[str, Any] = _NO_ATTRIBUTES) -> CampaignData:
+    """
+    Converte um insight no nível de campanha (e os dados da campanha, da
+    aresta /campaigns) em CampaignData
+    """
+    # Extrair ROAS (se disponível)
+    roas_value = _purchase_roas(insight)
+    
+    # Argumentos posicionais (mesma ordem dos campos): bem mais rápido que kwargs
+    return CampaignData(
+        insight["campaign_id"],
+        insight["campaign_name"],
+        campaign.get("status", _UNKNOWN_STATUS),
+        "meta", # Definido como Meta
+        campaign.get("start_time"),
+        campaign.get("stop_time"),
+        int(insight.get("impressions", 0)),
+        int(insight.get("clicks", 0)),
+        float(insight.get("ctr", 0.0)),
+        _purchase_conversions(insight),
+        float(insight.get("spend", 0.0)),
+        float(insight.get("cpc", 0.0)),
+        float(insight.get("cpp", 0.0)), # Usando CPP como CPA
+        float(insight.get("cpm", 0.0)),
+        roas_value
+    )
+
+
+def _ad_from_insight(
+    insight: Mapping[str, Any], ad: Mapping[str, Any], thumbnail_url: Optional[str], ad_link: Optional[str]
+) -> AdData:
+    """
+    Converte um insight no nível de anúncio (e os dados do anúncio, da aresta
+    /ads, e do criativo) em AdData
+    """
+    return AdData(
+        insight["ad_id"],
+        insight["ad_name"],
+        ad.get("status", _UNKNOWN_STATUS),
+        int(insight.get("impressions", 0)),
+        int(insight.get("clicks", 0)),
+        float(insight.get("ctr", 0.0)),
+        _purchase_conversions(insight),
+        float(insight.get("spend", 0.0)),
+        thumbnail_url,
+        campaign_id=insight["campaign_id"],
+        adset_id=insight.get("adset_id"),
+        ad_link=ad_link,
+    )
+
+def _daily_from_insight(entity_id: str, insight: Mapping[str, Any], attributes: Dict[str, Any]) -> DailyMetricRow:
+    """
+    Converte um insight diário (time_increment=1) em linha do cache de métricas
+    """
+    spend = float(insight.get("spend", 0.0))
+    return DailyMetricRow(
+        entity_id,
+        date.fromisoformat(insight["date_start"]),
+        int(insight.get("impressions", 0)),
+        int(insight.get("clicks", 0)),
+        _purchase_conversions(insight),
+        spend,
+        # Receita do dia: o ROAS é receita / investimento
+        _purchase_roas(insight) * spend,
+        attributes,
+    )
+
+
+def _creative_links(creative: Mapping[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Miniatura e link de destino do criativo (campos pedidos na aresta /ads)
+    """
+    thumbnail_url = creative.get("thumbnail_url") or creative.get("image_url")
+    ad_link = None
+    object_story_spec = creative.get("object_story_spec")
+    if object_story_spec:
+        if 'link_data' in object_story_spec and 'link' in object_story_spec['link_data']:
+            ad_link = object_story_spec['link_data']['link']
+        elif 'video_data' in object_story_spec and 'call_to_action' in object_story_spec['video_data'] and 'value' in object_story_spec['video_data']['call_to_action'] and 'link' in object_story_spec['video_data']['call_to_action']['value']:
+            ad_link = object_story_spec['video_data']['call_to_action']['value']['link']
+    return thumbnail_url, ad_link
+
+
+def _ads_from_insights(insights: List[Any], ads: Dict[str, Any]) -> List[AdData]:
+    """
+    Converte os insights no nível de anúncio em AdData, com os dados dos
+    anúncios e dos seus criativos (aresta /ads)
+    """
+    ads_data = []
+    for insight in insights:
+        ad = ads.get(insight["ad_id"], _NO_ATTRIBUTES)
+        thumbnail_url, ad_link = _creative_links(ad.get("creative") or _NO_ATTRIBUTES)
+        ads_data.append(_ad_from_insight(insight, ad, thumbnail_url, ad_link))
+    return ads_data
+
+
+def _ad_daily_rows(insights: List[Any], ads: Dict[str, Any]) -> List[DailyMetricRow]:
+    """
+    Converte os insights diários no nível de anúncio em linhas do cache
+    """
+    rows = []
+    for insight in insights:
+        ad = ads.get(insight["ad_id"], _NO_ATTRIBUTES)
+        thumbnail_url, ad_link = _creative_links(ad.get("creative") or _NO_ATTRIBUTES)
+        rows.append(_daily_from_insight(insight["ad_id"], insight, {
+            "name": insight["ad_name"],
+            "status": ad.get("status", _UNKNOWN_STATUS),
+            "thumbnail_url": thumbnail_url,
+            "campaign_id": insight["campaign_id"],
+            "adset_id": insight.get("adset_id"),
+            "ad_link": ad_link,
+        }))
+    return rows
+
+
+def _daily_time_params(start_date: date, end_date: date) -> dict:
+    return {
+        'time_range': {'since': start_date.isoformat(), 'until': end_date.isoformat()},
+        'time_increment': 1,
+    }
+
+
 class MetaAdsService:
     """
     Serviço para interagir com a API do Meta Ads (Facebook/Instagram)
@@ -19,41 +347,51 @@ class MetaAdsService:
         self,
         app_id: str,
         app_secret: str,
-        access_token: str
+        access_token: str,
+        graph_url: Optional[str] = None
     ):
         """
-        Inicializa a API do Meta Ads com as credenciais fornecidas
+        Inicializa a API do Meta Ads com as credenciais fornecidas.
+
+        A instância da API fica no serviço (self.api) e é passada a cada
+        objeto do SDK: a API padrão do SDK é global no processo e outra
+        requisição poderia trocá-la pelo token de outro usuário.
+
+        graph_url substitui https://graph.facebook.com (ex.: servidor fake
+        dos benchmarks)
         """
+        load_sdk()
         try:
-            FacebookAdsApi.init(app_id=app_id, app_secret=app_secret, access_token=access_token)
+            session = FacebookSession(app_id, app_secret, access_token)
+            if graph_url:
+                session.GRAPH = graph_url.rstrip("/")
+            self.api = FacebookAdsApi(session)
         except Exception as e:
             logger.error(f"Erro ao inicializar Meta Ads API: {e}")
             raise
             
-    def get_campaigns(self, ad_account_id: str) -> List[Dict[str, Any]]:
+    @observe_upstream("meta_ads", "get_campaigns")
+    def get_campaigns(self, ad_account_id: str) -> List[CampaignData]:
         """
         Obtém a lista de campanhas para o ID da conta de anúncios fornecido
         """
         try:
-            account = AdAccount(f"act_{ad_account_id}")
+            account = AdAccount(f"act_{ad_account_id}", api=self.api)
             
-            # Campos a serem buscados para campanhas e métricas
+            # Campos de insights: status e datas vêm da aresta /campaigns
             fields = [
-                Campaign.Field.id,
-                Campaign.Field.name,
-                Campaign.Field.status,
-                Campaign.Field.start_time,
-                Campaign.Field.stop_time,
-                Campaign.Field.objective,
-                Campaign.Field.spend,
-                Campaign.Field.impressions,
-                Campaign.Field.clicks,
-                Campaign.Field.ctr,
-                Campaign.Field.cpc,
-                Campaign.Field.cpm,
-                Campaign.Field.cpp, # Cost per result (similar to CPA)
-                Campaign.Field.actions, # Conversions
-                Campaign.Field.roas, # Return on Ad Spend
+                AdsInsights.Field.campaign_id,
+                AdsInsights.Field.campaign_name,
+                AdsInsights.Field.objective,
+                AdsInsights.Field.spend,
+                AdsInsights.Field.impressions,
+                AdsInsights.Field.clicks,
+                AdsInsights.Field.ctr,
+                AdsInsights.Field.cpc,
+                AdsInsights.Field.cpm,
+                AdsInsights.Field.cpp, # Cost per result (similar to CPA)
+                AdsInsights.Field.actions, # Conversions
+                AdsInsights.Field.purchase_roas, # Return on Ad Spend
             ]
             params = {
                 # Filtrar por status (opcional)
@@ -63,46 +401,14 @@ class MetaAdsService:
             }
             
             # Obter insights (métricas)
-            insights = account.get_insights(fields=fields, params=params)
+            insights = _fetch_insights(account, fields, params, account_id=account.get_id(), level="campaign")
+            campaigns = self._campaign_attributes(account)
             
             # Processar os resultados
-            campaigns = []
-            for insight in insights:
-                # Extrair conversões (exemplo: compras)
-                conversions = 0
-                if insight.get(Campaign.Field.actions):
-                    for action in insight[Campaign.Field.actions]:
-                        if action["action_type"] == "purchase": # Ajustar conforme o tipo de conversão desejado
-                            conversions = int(action["value"])
-                            break
-                
-                # Extrair ROAS (se disponível)
-                roas_value = 0.0
-                if insight.get(Campaign.Field.roas):
-                     for roas_item in insight[Campaign.Field.roas]:
-                         if roas_item["action_type"] == "purchase_roas": # Ajustar conforme o tipo de ROAS desejado
-                             roas_value = float(roas_item["value"])
-                             break
-                
-                campaigns.append({
-                    "id": insight[Campaign.Field.id],
-                    "name": insight[Campaign.Field.name],
-                    "status": insight[Campaign.Field.status],
-                    "channel": "meta", # Definido como Meta
-                    "start_date": insight.get(Campaign.Field.start_time),
-                    "end_date": insight.get(Campaign.Field.stop_time),
-                    "impressions": int(insight.get(Campaign.Field.impressions, 0)),
-                    "clicks": int(insight.get(Campaign.Field.clicks, 0)),
-                    "ctr": float(insight.get(Campaign.Field.ctr, 0.0)),
-                    "conversions": conversions,
-                    "spend": float(insight.get(Campaign.Field.spend, 0.0)),
-                    "cpc": float(insight.get(Campaign.Field.cpc, 0.0)),
-                    "cpa": float(insight.get(Campaign.Field.cpp, 0.0)), # Usando CPP como CPA
-                    "cpm": float(insight.get(Campaign.Field.cpm, 0.0)),
-                    "roas": roas_value
-                })
-            
-            return campaigns
+            return [
+                _campaign_from_insight(insight, campaigns.get(insight["campaign_id"], _NO_ATTRIBUTES))
+                for insight in insights
+            ]
             
         except FacebookRequestError as e:
             logger.error(f"Erro ao obter campanhas do Meta Ads: {e}")
@@ -110,36 +416,210 @@ class MetaAdsService:
             logger.error(f"Error message: {e.api_error_message()}")
             raise
             
-    def get_ads(self, ad_account_id: str, campaign_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    def _campaign_attributes(self, account: Any) -> Dict[str, Any]:
+        """
+        Status e datas das campanhas da conta (aresta /campaigns), por id
+        """
+        fields = [
+            Campaign.Field.id,
+            Campaign.Field.status,
+            Campaign.Field.start_time,
+            Campaign.Field.stop_time,
+        ]
+        params = {'limit': _EDGE_PAGE_SIZE, 'effective_status': _CAMPAIGN_EFFECTIVE_STATUSES}
+        with observe_upstream("meta_ads", "list_campaigns"):
+            campaigns = _fetch_pages(
+                lambda: account.get_campaigns(fields=fields, params=params),
+                "meta_ads.campaigns",
+                account_id=account.get_id(),
+            )
+        return {campaign["id"]: campaign for campaign in campaigns}
+
+    def _ad_attributes(self, account: Any, campaign_id: Optional[str]) -> Dict[str, Any]:
+        """
+        Status e criativo dos anúncios da conta ou campanha (aresta /ads), por id.
+
+        Os campos do criativo vêm na mesma aresta (expansão de campos), sem
+        uma chamada por criativo
+        """
+        fields = [
+            Ad.Field.id,
+            Ad.Field.status,
+            _CREATIVE_FIELDS,
+        ]
+        params = {'limit': _EDGE_PAGE_SIZE, 'effective_status': _AD_EFFECTIVE_STATUSES}
+        if campaign_id:
+            params['filtering'] = [{'field': 'campaign.id', 'operator': 'EQUAL', 'value': campaign_id}]
+        with observe_upstream("meta_ads", "list_ads"):
+            ads = _fetch_pages(
+                lambda: account.get_ads(fields=fields, params=params),
+                "meta_ads.ads",
+                account_id=account.get_id(),
+            )
+        return {ad["id"]: ad for ad in ads}
+
+    def _ad_count(self, account: Any, campaign_id: Optional[str]) -> int:
+        """
+        Quantidade de anúncios da conta (ou da campanha), pelo total_count da
+        aresta /ads, em cache por META_AD_COUNT_CACHE_SECONDS
+        """
+        key = (account.get_id(), campaign_id)
+        count = _ad_count_cache.get(key)
+        if count is not None:
+            return count
+        params = {'limit': 1, 'summary': True}
+        if campaign_id:
+            params['filtering'] = [{'field': 'campaign.id', 'operator': 'EQUAL', 'value': campaign_id}]
+        with observe_upstream("meta_ads", "count_ads"), start_span(
+            "meta_ads.count_ads", account_id=account.get_id()
+        ) as span:
+            cursor = call_with_throttle_retry(
+                lambda: account.get_ads(fields=[Ad.Field.id], params=params), _is_throttled, span
+            )
+            try:
+                count = cursor.total()
+            except FacebookUnavailablePropertyException:
+                # Resposta sem summary.total_count: seguir pela consulta síncrona
+                count = 0
+            span.set(rows=count)
+        _ad_count_cache.set(key, count)
+        return count
+
+    def _use_report_run(self, account: Any, campaign_id: Optional[str]) -> bool:
+        """
+        Contas grandes no nível de anúncio vão para um job assíncrono: a
+        consulta síncrona estoura o tempo limite ou pagina devagar demais
         """
-        Obtém os anúncios (e seus criativos) para uma conta ou campanha específica
+        threshold = settings.META_ASYNC_INSIGHTS_MIN_ADS
+        return threshold > 0 and self._ad_count(account, campaign_id) >= threshold
+
+    def _start_report_run(self, account: Any, fields: List[str], params: dict) -> str:
+        """
+        Cria o AdReportRun com os mesmos campos e parâmetros da consulta síncrona
+        """
+        with observe_upstream("meta_ads", "start_report"), start_span(
+            "meta_ads.report.start", account_id=account.get_id(), level=params.get("level")
+        ) as span:
+            # O SDK acrescenta os campos em params['fields']: não alterar o original
+            report = call_with_throttle_retry(
+                lambda: account.get_insights(fields=fields, params=dict(params), is_async=True),
+                _is_throttled,
+                span,
+            )
+            span.set(report_id=report.get_id())
+        return report.get_id()
+
+    @observe_upstream("meta_ads", "report_status")
+    def report_status(self, report_id: str) -> ReportRunStatus:
+        """
+        Consulta o status de um job assíncrono de insights
+        """
+        report = call_with_throttle_retry(
+            lambda: AdReportRun(report_id, api=self.api).api_get(fields=[
+                AdReportRun.Field.account_id,
+                AdReportRun.Field.async_status,
+                AdReportRun.Field.async_percent_completion,
+                AdReportRun.Field.date_start,
+                AdReportRun.Field.date_stop,
+            ]),
+            _is_throttled,
+        )
+        date_start = report.get(AdReportRun.Field.date_start)
+        date_stop = report.get(AdReportRun.Field.date_stop)
+        return ReportRunStatus(
+            id=report_id,
+            account_id=report.get(AdReportRun.Field.account_id),
+            status=report.get(AdReportRun.Field.async_status) or "",
+            percent_completion=int(report.get(AdReportRun.Field.async_percent_completion) or 0),
+            date_start=date.fromisoformat(date_start) if date_start else None,
+            date_stop=date.fromisoformat(date_stop) if date_stop else None,
+        )
+
+    def wait_for_report(self, report_id: str, timeout_seconds: float) -> ReportRunStatus:
+        """
+        Consulta o job com backoff exponencial até terminar ou até o prazo
+        acabar, e retorna o último status
+        """
+        deadline = time.monotonic() + timeout_seconds
+        delay = settings.META_ASYNC_POLL_INITIAL_SECONDS
+        with start_span("meta_ads.report.wait", report_id=report_id) as span:
+            while True:
+                status = self.report_status(report_id)
+                span.incr("polls")
+                remaining = deadline - time.monotonic()
+                if status.completed or status.failed or remaining <= 0:
+                    break
+                time.sleep(min(delay, remaining))
+                delay = min(delay * 2, settings.META_ASYNC_POLL_MAX_SECONDS)
+            span.set(status=status.status, percent_completion=status.percent_completion)
+        return status
+
+    def _report_insights(self, status: ReportRunStatus) -> List[Any]:
+        """
+        Lê as páginas do resultado de um job concluído
+        """
+        if status.failed:
+            raise ReportFailed(status)
+        if not status.completed:
+            raise ReportPending(status)
+        return _fetch_insights(
+            AdReportRun(status.id, api=self.api),
+            None,
+            {'limit': settings.META_ASYNC_RESULT_PAGE_SIZE},
+            "meta_ads.report.result",
+            account_id=f"act_{status.account_id}",
+            report_id=status.id,
+        )
+
+    def _ad_level_insights(
+        self,
+        account: Any,
+        fields: List[str],
+        params: dict,
+        campaign_id: Optional[str],
+        wait_seconds: Optional[float]
+    ) -> List[Any]:
+        """
+        Insights no nível de anúncio: consulta síncrona ou, em contas grandes,
+        job assíncrono aguardado por até wait_seconds
+        """
+        if self._use_report_run(account, campaign_id):
+            report_id = self._start_report_run(account, fields, params)
+            if wait_seconds is None:
+                wait_seconds = settings.META_ASYNC_INSIGHTS_WAIT_SECONDS
+            return self._report_insights(self.wait_for_report(report_id, wait_seconds))
+        return _fetch_insights(account, fields, params, account_id=account.get_id(), level="ad")
+
+    @observe_upstream("meta_ads", "get_ads")
+    def get_ads(
+        self,
+        ad_account_id: str,
+        campaign_id: Optional[str] = None,
+        wait_seconds: Optional[float] = None
+    ) -> List[AdData]:
+        """
+        Obtém os anúncios (e seus criativos) para uma conta ou campanha específica.
+
+        Acima de META_ASYNC_INSIGHTS_MIN_ADS anúncios os insights vêm de um
+        job assíncrono; se ele não terminar em wait_seconds, levanta
+        ReportPending com o id do job para consulta posterior (get_report_ads)
         """
         try:
-            account = AdAccount(f"act_{ad_account_id}")
+            account = AdAccount(f"act_{ad_account_id}", api=self.api)
             
-            # Campos para anúncios e criativos
+            # Campos de insights: status e criativo vêm da aresta /ads
             ad_fields = [
-                Ad.Field.id,
-                Ad.Field.name,
-                Ad.Field.status,
-                Ad.Field.campaign_id,
-                Ad.Field.adset_id,
-                Ad.Field.creative,
-            ]
-            creative_fields = [
-                AdCreative.Field.id,
-                AdCreative.Field.name,
-                AdCreative.Field.thumbnail_url,
-                AdCreative.Field.object_story_spec, # Para obter link e imagem/vídeo
-                AdCreative.Field.image_url,
-                AdCreative.Field.video_id,
+                AdsInsights.Field.ad_id,
+                AdsInsights.Field.ad_name,
+                AdsInsights.Field.campaign_id,
+                AdsInsights.Field.adset_id,
             ]
             insight_fields = [
-                Ad.Field.impressions,
-                Ad.Field.clicks,
-                Ad.Field.ctr,
-                Ad.Field.spend,
-                Ad.Field.actions, # Conversões
+                AdsInsights.Field.impressions,
+                AdsInsights.Field.clicks,
+                AdsInsights.Field.ctr,
+                AdsInsights.Field.spend,
+                AdsInsights.Field.actions, # Conversões
             ]
             
             params = {
@@ -151,58 +631,117 @@ class MetaAdsService:
                 params['filtering'].append({'field': 'ad.campaign_id', 'operator': 'EQUAL', 'value': campaign_id})
             
             # Obter insights dos anúncios
-            insights = account.get_insights(fields=insight_fields + ad_fields, params=params)
+            insights = self._ad_level_insights(account, insight_fields + ad_fields, params, campaign_id, wait_seconds)
             
-            ads_data = []
-            for insight in insights:
-                creative_id = insight.get(Ad.Field.creative, {}).get("id")
-                thumbnail_url = None
-                ad_link = None
-                
-                # Buscar detalhes do criativo se existir
-                if creative_id:
-                    try:
-                        creative = AdCreative(creative_id).api_get(fields=creative_fields)
-                        thumbnail_url = creative.get(AdCreative.Field.thumbnail_url) or creative.get(AdCreative.Field.image_url)
-                        
-                        # Tentar obter o link do object_story_spec
-                        object_story_spec = creative.get(AdCreative.Field.object_story_spec)
-                        if object_story_spec:
-                            if 'link_data' in object_story_spec and 'link' in object_story_spec['link_data']:
-                                ad_link = object_story_spec['link_data']['link']
-                            elif 'video_data' in object_story_spec and 'call_to_action' in object_story_spec['video_data'] and 'value' in object_story_spec['video_data']['call_to_action'] and 'link' in object_story_spec['video_data']['call_to_action']['value']:
-                                ad_link = object_story_spec['video_data']['call_to_action']['value']['link']
-                                
-                    except FacebookRequestError as creative_error:
-                        logger.warning(f"Erro ao buscar criativo {creative_id}: {creative_error}")
-                
-                # Extrair conversões
-                conversions = 0
-                if insight.get(Ad.Field.actions):
-                    for action in insight[Ad.Field.actions]:
-                        if action["action_type"] == "purchase": # Ajustar conforme necessário
-                            conversions = int(action["value"])
-                            break
-                            
-                ads_data.append({
-                    "id": insight[Ad.Field.id],
-                    "name": insight[Ad.Field.name],
-                    "status": insight[Ad.Field.status],
-                    "campaign_id": insight[Ad.Field.campaign_id],
-                    "adset_id": insight.get(Ad.Field.adset_id),
-                    "thumbnail_url": thumbnail_url,
-                    "ad_link": ad_link,
-                    "impressions": int(insight.get(Ad.Field.impressions, 0)),
-                    "clicks": int(insight.get(Ad.Field.clicks, 0)),
-                    "ctr": float(insight.get(Ad.Field.ctr, 0.0)),
-                    "spend": float(insight.get(Ad.Field.spend, 0.0)),
-                    "conversions": conversions,
-                })
-                
-            return ads_data
+            return _ads_from_insights(insights, self._ad_attributes(account, campaign_id))
 
         except FacebookRequestError as e:
             logger.error(f"Erro ao obter anúncios do Meta Ads: {e}")
             logger.error(f"Error code: {e.api_error_code()}")
             logger.error(f"Error message: {e.api_error_message()}")
             raise
+
+    @observe_upstream("meta_ads", "get_report_ads")
+    def get_report_ads(self, status: ReportRunStatus) -> List[AdData]:
+        """
+        Obtém os anúncios do resultado de um job assíncrono iniciado por get_ads
+        """
+        try:
+            insights = self._report_insights(status)
+            # O job pode ser de uma campanha: os anúncios da conta cobrem todos
+            ads = self._ad_attributes(AdAccount(f"act_{status.account_id}", api=self.api), None)
+            return _ads_from_insights(insights, ads)
+        except FacebookRequestError as e:
+            logger.error(f"Erro ao obter resultado do job {status.id} do Meta Ads: {e}")
+            raise
+
+    @observe_upstream("meta_ads", "get_campaign_daily_metrics")
+    def get_campaign_daily_metrics(self, ad_account_id: str, start_date: date, end_date: date) -> List[DailyMetricRow]:
+        """
+        Métricas diárias das campanhas no período (uma linha por campanha e dia com dados)
+        """
+        try:
+            account = AdAccount(f"act_{ad_account_id}", api=self.api)
+            fields = [
+                AdsInsights.Field.campaign_id,
+                AdsInsights.Field.campaign_name,
+                AdsInsights.Field.spend,
+                AdsInsights.Field.impressions,
+                AdsInsights.Field.clicks,
+                AdsInsights.Field.actions, # Conversões
+                AdsInsights.Field.purchase_roas,
+            ]
+            params = {'level': 'campaign', **_daily_time_params(start_date, end_date)}
+            insights = _fetch_insights(account, fields, params, account_id=account.get_id(), level="campaign")
+            campaigns = self._campaign_attributes(account)
+            rows = []
+            for insight in insights:
+                campaign = campaigns.get(insight["campaign_id"], _NO_ATTRIBUTES)
+                rows.append(_daily_from_insight(insight["campaign_id"], insight, {
+                    "name": insight["campaign_name"],
+                    "status": campaign.get("status", _UNKNOWN_STATUS),
+                    "channel": "meta",
+                    "start_date": campaign.get("start_time"),
+                    "end_date": campaign.get("stop_time"),
+                }))
+            return rows
+        except FacebookRequestError as e:
+            logger.error(f"Erro ao obter métricas diárias de campanhas do Meta Ads: {e}")
+            raise
+
+    @observe_upstream("meta_ads", "get_ad_daily_metrics")
+    def get_ad_daily_metrics(
+        self,
+        ad_account_id: str,
+        campaign_id: Optional[str],
+        start_date: date,
+        end_date: date,
+        wait_seconds: Optional[float] = None
+    ) -> List[DailyMetricRow]:
+        """
+        Métricas diárias dos anúncios da conta ou campanha no período.
+
+        Como em get_ads, contas grandes usam um job assíncrono e levantam
+        ReportPending se ele não terminar em wait_seconds; o resultado vem
+        depois de get_report_ad_daily_metrics
+        """
+        try:
+            account = AdAccount(f"act_{ad_account_id}", api=self.api)
+            fields = [
+                AdsInsights.Field.ad_id,
+                AdsInsights.Field.ad_name,
+                AdsInsights.Field.campaign_id,
+                AdsInsights.Field.adset_id,
+                AdsInsights.Field.impressions,
+                AdsInsights.Field.clicks,
+                AdsInsights.Field.spend,
+                AdsInsights.Field.actions, # Conversões
+            ]
+            params = {'level': 'ad', 'filtering': [], **_daily_time_params(start_date, end_date)}
+            if campaign_id:
+                params['filtering'].append({'field': 'ad.campaign_id', 'operator': 'EQUAL', 'value': campaign_id})
+            insights = self._ad_level_insights(account, fields, params, campaign_id, wait_seconds)
+            return _ad_daily_rows(insights, self._ad_attributes(account, campaign_id))
+        except FacebookRequestError as e:
+            logger.error(f"Erro ao obter métricas diárias de anúncios do Meta Ads: {e}")
+            raise
+
+    @observe_upstream("meta_ads", "get_report_ad_daily_metrics")
+    def get_report_ad_daily_metrics(self, status: ReportRunStatus, campaign_id: Optional[str]) -> List[DailyMetricRow]:
+        """
+        Métricas diárias dos anúncios do resultado de um job assíncrono
+        iniciado por get_ad_daily_metrics. Levanta ValueError se o job não
+        for diário ou trouxer anúncios de outra campanha
+        """
+        try:
+            insights = self._report_insights(status)
+            for insight in insights:
+                if insight.get("date_start") != insight.get("date_stop"):
+                    raise ValueError(f"Job {status.id} não tem métricas diárias")
+                if campaign_id and insight["campaign_id"] != campaign_id:
+                    raise ValueError(f"Job {status.id} não é da campanha {campaign_id}")
+            ads = self._ad_attributes(AdAccount(f"act_{status.account_id}", api=self.api), campaign_id)
+            return _ad_daily_rows(insights, ads)
+        except FacebookRequestError as e:
+            logger.error(f"Erro ao obter resultado do job {status.id} do Meta Ads: {e}")
+            raise
@@ -0,0 +1,366 @@
+"""
+Cache diário de métricas para consultas por período (start_date/end_date)
+
+Métricas de dias fora da janela de atribuição não mudam mais: ficam em cache
+permanentemente. Os dias ainda abertos (os últimos METRICS_OPEN_DAYS) são
+rebuscados depois de METRICS_OPEN_DAY_TTL_SECONDS. O planejador busca no
+provedor apenas os trechos contínuos de dias ausentes ou vencidos e junta o
+resultado com os dias em cache: uma visão de 90 dias já aquecida custa ao
+provedor só os dias abertos.
+
+Dias antigos podem ter sido compactados em agregados semanais ou mensais
+(app/services/metrics_retention.py); nesses dias as linhas vêm dos agregados.
+
+Os dias são datas UTC.
+"""
+import bisect
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.tracing import start_span
+from app.db.routing import on_primary
+from app.models.models import CachedDailyMetric, CachedMetricDay, CachedMetricRollup
+from app.services.rows import AdData, CampaignData, DailyMetricRow
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidDateRange(ValueError):
+    """
+    Período inválido (início depois do fim, só o fim informado ou longo demais)
+    """
+
+
+@dataclass(frozen=True)
+class MetricsScope:
+    """
+    O que uma consulta diária ao provedor cobre: nível e filtro numa conta
+    """
+    provider: str  # google, meta
+    account_id: str
+    level: str  # campaign, ad
+    scope: str = ""  # filtro da consulta, ex.: id da campanha dos anúncios
+
+    def filter(self, query, model):
+        return query.filter(
+            model.provider == self.provider,
+            model.account_id == self.account_id,
+            model.level == self.level,
+            model.scope == self.scope,
+        )
+
+
+# Chamado após gravar no cache as linhas recém-buscadas de um trecho:
+# (sessão, escopo, linhas, hoje)
+RowsListener = Callable[[Session, MetricsScope, List[DailyMetricRow], date], None]
+_rows_listeners: List[RowsListener] = []
+
+
+def on_rows_stored(listener: RowsListener) -> RowsListener:
+    """
+    Registra uma função chamada com as linhas diárias ingeridas no cache
+    (pode ser usado como decorador)
+    """
+    _rows_listeners.append(listener)
+    return listener
+
+
+def utc_today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def resolve_date_range(start_date: Optional[date], end_date: Optional[date]) -> Optional[Tuple[date, date]]:
+    """
+    Valida os parâmetros de período dos endpoints. Sem start_date, retorna
+    None (consulta sem período, como antes); sem end_date, vai até hoje
+    """
+    if start_date is None:
+        if end_date is not None:
+            raise InvalidDateRange("end_date exige start_date")
+        return None
+    end_date = end_date or utc_today()
+    if start_date > end_date:
+        raise InvalidDateRange("start_date deve ser anterior ou igual a end_date")
+    if (end_date - start_date).days + 1 > settings.METRICS_MAX_RANGE_DAYS:
+        raise InvalidDateRange(f"Período máximo de {settings.METRICS_MAX_RANGE_DAYS} dias")
+    return start_date, end_date
+
+
+def is_closed(day: date, today: date) -> bool:
+    """
+    Dia fora da janela de atribuição: suas métricas não mudam mais
+    """
+    return day <= today - timedelta(days=settings.METRICS_OPEN_DAYS)
+
+
+def plan_fetch(
+    start: date, end: date, cached_days: Dict[date, CachedMetricDay], now: datetime
+) -> List[Tuple[date, date]]:
+    """
+    Trechos contínuos de dias a buscar no provedor: dias ainda não buscados,
+    dias abertos com cache vencido e dias buscados quando ainda estavam
+    abertos mas que já fecharam (para gravar a versão final)
+    """
+    today = now.date()
+    open_ttl = timedelta(seconds=settings.METRICS_OPEN_DAY_TTL_SECONDS)
+    runs: List[Tuple[date, date]] = []
+    day = start
+    while day <= end:
+        cached = cached_days.get(day)
+        stale = (
+            cached is None
+            or (not cached.closed and (is_closed(day, today) or now - cached.fetched_at > open_ttl))
+        )
+        if stale:
+            if runs and runs[-1][1] == day - timedelta(days=1):
+                runs[-1] = (runs[-1][0], day)
+            else:
+                runs.append((day, day))
+        day += timedelta(days=1)
+    return runs
+
+
+def _store(db: Session, scope: MetricsScope, start: date, end: date, rows: List[DailyMetricRow], now: datetime) -> None:
+    """
+    Substitui o trecho [start, end] do escopo pelas linhas recém-buscadas
+    """
+    today = now.date()
+    try:
+        for model in (CachedDailyMetric, CachedMetricDay):
+            scope.filter(db.query(model), model).filter(
+                model.date >= start, model.date <= end
+            ).execution_options(read_your_writes=False).delete(synchronize_session=False)
+        key = {"provider": scope.provider, "account_id": scope.account_id, "level": scope.level, "scope": scope.scope}
+        if rows:
+            db.execute(insert(CachedDailyMetric).execution_options(read_your_writes=False), [
+                {
+                    **key,
+                    "entity_id": row.entity_id,
+                    "date": row.date,
+                    "impressions": row.impressions,
+                    "clicks": row.clicks,
+                    "conversions": row.conversions,
+                    "spend": row.spend,
+                    "conversion_value": row.conversion_value,
+                    "attributes": row.attributes,
+                }
+                for row in rows
+            ])
+        db.execute(insert(CachedMetricDay).execution_options(read_your_writes=False), [
+            {**key, "date": start + timedelta(days=i), "closed": is_closed(start + timedelta(days=i), today), "fetched_at": now}
+            for i in range((end - start).days + 1)
+        ])
+        db.commit()
+    except IntegrityError:
+        # Outro worker gravou o mesmo trecho ao mesmo tempo: o cache dele vale
+        db.rollback()
+        logger.info(f"Trecho {start}..{end} de {scope} já gravado por outro processo")
+        return
+    for listener in _rows_listeners:
+        try:
+            listener(db, scope, rows, today)
+        except Exception as e:
+            # Falha num listener não afeta a consulta
+            db.rollback()
+            logger.exception(f"Erro ao processar as linhas ingeridas de {scope}: {e}")
+
+
+def row_from_model(metric: CachedDailyMetric) -> DailyMetricRow:
+    return DailyMetricRow(
+        metric.entity_id,
+        metric.date,
+        metric.impressions,
+        metric.clicks,
+        metric.conversions,
+        metric.spend,
+        metric.conversion_value,
+        metric.attributes or {},
+    )
+
+
+def cached_rows(db: Session, scope: MetricsScope, start: date, end: date) -> List[DailyMetricRow]:
+    """
+    Linhas diárias do período que já estão no cache, sem buscar no provedor
+    """
+    return [
+        row_from_model(metric)
+        for metric in scope.filter(db.query(CachedDailyMetric), CachedDailyMetric).filter(
+            CachedDailyMetric.date >= start, CachedDailyMetric.date <= end
+        )
+    ]
+
+
+def _rollup_rows(db: Session, scope: MetricsScope, compacted: Dict[str, List[date]]) -> List[DailyMetricRow]:
+    """
+    Linhas dos dias compactados, a partir dos agregados de cada granularidade.
+    Um agregado entra na proporção dos seus dias compactados dentro do período
+    pedido: exato quando o período cobre o agregado inteiro, rateado senão
+    """
+    rows = []
+    for grain, days in compacted.items():
+        days.sort()
+        rollups = scope.filter(db.query(CachedMetricRollup), CachedMetricRollup).filter(
+            CachedMetricRollup.grain == grain,
+            CachedMetricRollup.period_start <= days[-1],
+            CachedMetricRollup.period_end >= days[0],
+        )
+        for rollup in rollups:
+            first = bisect.bisect_left(days, rollup.period_start)
+            last = bisect.bisect_right(days, rollup.period_end)
+            if first == last:
+                continue
+            fraction = min((last - first) / rollup.days, 1.0) if rollup.days else 1.0
+            rows.append(DailyMetricRow(
+                rollup.entity_id,
+                days[last - 1],
+                round(rollup.impressions * fraction),
+                round(rollup.clicks * fraction),
+                rollup.conversions * fraction,
+                rollup.spend * fraction,
+                rollup.conversion_value * fraction,
+                rollup.attributes or {},
+            ))
+    return rows
+
+
+def daily_rows(
+    db: Session,
+    scope: MetricsScope,
+    start: date,
+    end: date,
+    fetch: Callable[[date, date], List[DailyMetricRow]],
+) -> List[DailyMetricRow]:
+    """
+    Linhas diárias do período: as do cache e, para os trechos planejados,
+    as buscadas com fetch(início, fim), que passam a valer no cache.
+
+    O cache é lido no primário mesmo em sessões de réplica: numa réplica
+    atrasada os dias recém-gravados pareceriam ausentes e seriam buscados
+    de novo no provedor
+    """
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    with on_primary(db), start_span(
+        "metrics_cache.range", provider=scope.provider, account_id=scope.account_id, level=scope.level
+    ) as span:
+        cached_days = {
+            cached.date: cached
+            for cached in scope.filter(db.query(CachedMetricDay), CachedMetricDay).filter(
+                CachedMetricDay.date >= start, CachedMetricDay.date <= end
+            )
+        }
+        runs = plan_fetch(start, end, cached_days, now)
+        refetched = set()
+        fetched: List[DailyMetricRow] = []
+        for run_start, run_end in runs:
+            rows = fetch(run_start, run_end)
+            _store(db, scope, run_start, run_end, rows, now)
+            fetched.extend(rows)
+            refetched.update(run_start + timedelta(days=i) for i in range((run_end - run_start).days + 1))
+
+        cached: List[DailyMetricRow] = []
+        if len(refetched) < (end - start).days + 1:
+            cached = [row for row in cached_rows(db, scope, start, end) if row.date not in refetched]
+            compacted: Dict[str, List[date]] = defaultdict(list)
+            for day, cached_day in cached_days.items():
+                if cached_day.rollup_grain and day not in refetched:
+                    compacted[cached_day.rollup_grain].append(day)
+            if compacted:
+                cached.extend(_rollup_rows(db, scope, compacted))
+        span.set(
+            days=(end - start).days + 1,
+            fetched_days=len(refetched),
+            fetches=len(runs),
+            rows=len(cached) + len(fetched),
+        )
+    return cached + fetched
+
+
+def _by_entity(rows: Iterable[DailyMetricRow]) -> Dict[str, List[DailyMetricRow]]:
+    grouped: Dict[str, List[DailyMetricRow]] = defaultdict(list)
+    for row in rows:
+        grouped[row.entity_id].append(row)
+    return grouped
+
+
+def _totals(rows: List[DailyMetricRow]) -> Tuple[int, int, float, float, float]:
+    return (
+        sum(row.impressions for row in rows),
+        sum(row.clicks for row in rows),
+        sum(row.conversions for row in rows),
+        sum(row.spend for row in rows),
+        sum(row.conversion_value for row in rows),
+    )
+
+
+def _ctr(clicks: int, impressions: int, provider: str) -> float:
+    if not impressions:
+        return 0.0
+    # O Meta informa o CTR em porcentagem; o Google Ads, como fração
+    return clicks / impressions * (100 if provider == "meta" else 1)
+
+
+def campaigns_from_daily(rows: Iterable[DailyMetricRow], provider: str) -> List[CampaignData]:
+    """
+    Soma as linhas diárias por campanha e recalcula as métricas derivadas
+    (CTR, CPC, CPA, CPM, ROAS) para o período. Os atributos são os do dia
+    mais recente
+    """
+    campaigns = []
+    for entity_id, entity_rows in _by_entity(rows).items():
+        attributes = max(entity_rows, key=lambda row: row.date).attributes
+        impressions, clicks, conversions, spend, conversion_value = _totals(entity_rows)
+        campaigns.append(CampaignData(
+            int(entity_id) if provider == "google" else entity_id,
+            attributes.get("name"),
+            attributes.get("status"),
+            attributes.get("channel"),
+            attributes.get("start_date"),
+            attributes.get("end_date"),
+            impressions,
+            clicks,
+            _ctr(clicks, impressions, provider),
+            conversions,
+            spend,
+            spend / clicks if clicks else 0.0,
+            spend / conversions if conversions else 0.0,
+            spend / impressions * 1000 if impressions else 0.0,
+            conversion_value / spend if spend else 0.0,
+        ))
+    campaigns.sort(key=lambda campaign: campaign.name or "")
+    return campaigns
+
+
+def ads_from_daily(rows: Iterable[DailyMetricRow], provider: str) -> List[AdData]:
+    """
+    Soma as linhas diárias por anúncio; os atributos são os do dia mais recente
+    """
+    ads = []
+    for entity_id, entity_rows in _by_entity(rows).items():
+        attributes = max(entity_rows, key=lambda row: row.date).attributes
+        impressions, clicks, conversions, spend, _ = _totals(entity_rows)
+        ads.append(AdData(
+            int(entity_id) if provider == "google" else entity_id,
+            attributes.get("name"),
+            attributes.get("status"),
+            impressions,
+            clicks,
+            _ctr(clicks, impressions, provider),
+            conversions,
+            spend,
+            attributes.get("thumbnail_url"),
+            final_url=attributes.get("final_url"),
+            ad_group=attributes.get("ad_group"),
+            campaign_id=attributes.get("campaign_id"),
+            adset_id=attributes.get("adset_id"),
+            ad_link=attributes.get("ad_link"),
+        ))
+    ads.sort(key=lambda ad: ad.name or "")
+    return ads
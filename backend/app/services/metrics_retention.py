@@ -0,0 +1,286 @@
+"""
+Retenção do cache diário de métricas: compactação das linhas diárias antigas
+
+No nível de anúncio o cache diário cresce com anúncios × dias, e o detalhe
+diário antigo quase não é consultado. Cada política (METRICS_RETENTION_POLICIES)
+define, para um nível, a idade a partir da qual os dias são compactados e a
+granularidade dos agregados: as linhas diárias de cada período (semana ou
+mês) inteiramente mais antigo que a idade viram uma linha por entidade em
+cached_metric_rollups. As linhas originais são arquivadas em
+METRICS_ARCHIVE_DIR (JSON colunar com gzip) ou descartadas.
+
+Os dias compactados continuam em cached_metric_days, marcados com a
+granularidade: o planejador não os busca de novo e as consultas por período
+(app/services/metrics_cache.py) usam os agregados nesses dias.
+
+A compactação é feita em transações curtas de até
+METRICS_COMPACTION_BATCH_SIZE linhas diárias, removidas pelo id. Durante a
+compactação de um período as consultas somam as linhas ainda não movidas e
+os agregados. Deve rodar um processo por vez (ex.: cron diário):
+    python -m app.services.metrics_retention
+"""
+import gzip
+import logging
+import os
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.serialization import dumps
+from app.core.tracing import start_span
+from app.db.session import SessionLocal
+from app.models.models import CachedDailyMetric, CachedMetricDay, CachedMetricRollup
+from app.services import metrics_cache
+from app.services.metrics_cache import MetricsScope
+
+logger = logging.getLogger(__name__)
+
+GRAINS = ("week", "month")
+# O dashboard e a sincronização leem os últimos 30 dias direto das linhas diárias
+MIN_RETENTION_DAYS = 35
+
+ARCHIVE_COLUMNS = ("entity_id", "date", "impressions", "clicks", "conversions", "spend", "conversion_value", "attributes")
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    level: str  # campaign, ad
+    after_days: int
+    grain: str  # week, month
+
+
+def policies_from_settings() -> List[RetentionPolicy]:
+    policies = []
+    for item in settings.METRICS_RETENTION_POLICIES:
+        policy = RetentionPolicy(item["level"], int(item["after_days"]), item["grain"])
+        if policy.grain not in GRAINS:
+            raise ValueError(f"Granularidade de retenção inválida: {policy.grain}")
+        if policy.after_days < MIN_RETENTION_DAYS:
+            raise ValueError(f"Retenção mínima de {MIN_RETENTION_DAYS} dias (nível {policy.level})")
+        policies.append(policy)
+    return policies
+
+
+def period_of(day: date, grain: str) -> Tuple[date, date]:
+    """
+    Semana (segunda a domingo) ou mês que contém o dia
+    """
+    if grain == "week":
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=6)
+    start = day.replace(day=1)
+    next_month = (start + timedelta(days=32)).replace(day=1)
+    return start, next_month - timedelta(days=1)
+
+
+@dataclass
+class CompactionReport:
+    periods: int = 0
+    days: int = 0
+    raw_rows: int = 0
+    rollups: int = 0
+    archives: List[str] = field(default_factory=list)
+
+
+def _pending_periods(
+    db: Session, policy: RetentionPolicy, cutoff: date
+) -> List[Tuple[MetricsScope, date, date, List[date]]]:
+    """
+    Períodos inteiramente anteriores ao corte com dias fechados ainda não
+    compactados, por escopo
+    """
+    pending = CachedMetricDay.rollup_grain.is_(None), CachedMetricDay.closed.is_(True), CachedMetricDay.date <= cutoff
+    scopes = db.query(
+        CachedMetricDay.provider, CachedMetricDay.account_id, CachedMetricDay.level, CachedMetricDay.scope
+    ).filter(CachedMetricDay.level == policy.level, *pending).distinct().all()
+    periods = []
+    for provider, account_id, level, scope_filter in scopes:
+        scope = MetricsScope(provider, account_id, level, scope_filter)
+        days_by_period: Dict[Tuple[date, date], List[date]] = defaultdict(list)
+        for day, in scope.filter(db.query(CachedMetricDay.date), CachedMetricDay).filter(*pending):
+            days_by_period[period_of(day, policy.grain)].append(day)
+        for (start, end), days in sorted(days_by_period.items()):
+            if end <= cutoff:
+                periods.append((scope, start, end, days))
+    return periods
+
+
+def _archive(scope: MetricsScope, period_start: date, rows: List[CachedDailyMetric], archive_dir: str) -> str:
+    """
+    Grava as linhas diárias em colunas (JSON com gzip), antes de removê-las
+    """
+    directory = os.path.join(archive_dir, scope.provider, scope.account_id, scope.level, scope.scope or "_")
+    os.makedirs(directory, exist_ok=True)
+    # O menor id do lote distingue os arquivos do mesmo período
+    path = os.path.join(directory, f"{period_start.isoformat()}-{rows[0].id}.json.gz")
+    content = {
+        "provider": scope.provider,
+        "account_id": scope.account_id,
+        "level": scope.level,
+        "scope": scope.scope,
+        "columns": {column: [getattr(row, column) for row in rows] for column in ARCHIVE_COLUMNS},
+    }
+    partial = f"{path}.partial"
+    with gzip.open(partial, "wb") as f:
+        f.write(dumps(content))
+    os.replace(partial, path)
+    return path
+
+
+def _merge_rollups(
+    db: Session,
+    scope: MetricsScope,
+    grain: str,
+    period_start: date,
+    period_end: date,
+    days: int,
+    rows: List[CachedDailyMetric],
+) -> Set[str]:
+    """
+    Soma as linhas diárias do lote aos agregados das entidades no período
+    """
+    by_entity: Dict[str, List[CachedDailyMetric]] = defaultdict(list)
+    for row in rows:
+        by_entity[row.entity_id].append(row)
+    existing = {
+        rollup.entity_id: rollup
+        for rollup in scope.filter(db.query(CachedMetricRollup), CachedMetricRollup).filter(
+            CachedMetricRollup.grain == grain,
+            CachedMetricRollup.period_start == period_start,
+            CachedMetricRollup.entity_id.in_(list(by_entity)),
+        )
+    }
+    for entity_id, entity_rows in by_entity.items():
+        rollup = existing.get(entity_id)
+        if rollup is None:
+            rollup = CachedMetricRollup(
+                provider=scope.provider,
+                account_id=scope.account_id,
+                level=scope.level,
+                scope=scope.scope,
+                entity_id=entity_id,
+                grain=grain,
+                period_start=period_start,
+                period_end=period_end,
+                days=days,
+                impressions=0,
+                clicks=0,
+                conversions=0.0,
+                spend=0.0,
+                conversion_value=0.0,
+            )
+            db.add(rollup)
+        for row in entity_rows:
+            rollup.impressions += row.impressions or 0
+            rollup.clicks += row.clicks or 0
+            rollup.conversions += row.conversions or 0.0
+            rollup.spend += row.spend or 0.0
+            rollup.conversion_value += row.conversion_value or 0.0
+            if rollup.last_date is None or row.date >= rollup.last_date:
+                rollup.attributes, rollup.last_date = row.attributes, row.date
+    return set(by_entity)
+
+
+def compact_period(
+    db: Session,
+    scope: MetricsScope,
+    grain: str,
+    period_start: date,
+    period_end: date,
+    days: List[date],
+    batch_size: int,
+    archive_dir: Optional[str],
+    report: CompactionReport,
+) -> None:
+    """
+    Compacta os dias de um período do escopo em lotes, cada um numa transação
+    """
+    with start_span("metrics_retention.period", provider=scope.provider, account_id=scope.account_id, level=scope.level) as span:
+        # Marcar os dias primeiro: a partir do commit do primeiro lote, as
+        # consultas somam os agregados às linhas que ainda não foram movidas
+        db.execute(
+            update(CachedMetricDay)
+            .where(
+                CachedMetricDay.provider == scope.provider,
+                CachedMetricDay.account_id == scope.account_id,
+                CachedMetricDay.level == scope.level,
+                CachedMetricDay.scope == scope.scope,
+                CachedMetricDay.date.in_(days),
+            )
+            .values(rollup_grain=grain)
+        )
+        # Base do rateio: todos os dias compactados do período, inclusive os
+        # de execuções anteriores e os dias em que a entidade não teve linhas
+        compacted_days = scope.filter(db.query(CachedMetricDay), CachedMetricDay).filter(
+            CachedMetricDay.rollup_grain == grain,
+            CachedMetricDay.date >= period_start,
+            CachedMetricDay.date <= period_end,
+        ).count()
+        scope.filter(db.query(CachedMetricRollup), CachedMetricRollup).filter(
+            CachedMetricRollup.grain == grain, CachedMetricRollup.period_start == period_start
+        ).update({CachedMetricRollup.days: compacted_days}, synchronize_session=False)
+        moved = 0
+        entities: Set[str] = set()
+        while True:
+            rows = scope.filter(db.query(CachedDailyMetric), CachedDailyMetric).filter(
+                CachedDailyMetric.date.in_(days)
+            ).order_by(CachedDailyMetric.id).limit(batch_size).all()
+            if not rows:
+                db.commit()
+                break
+            entities |= _merge_rollups(db, scope, grain, period_start, period_end, compacted_days, rows)
+            if archive_dir:
+                report.archives.append(_archive(scope, period_start, rows, archive_dir))
+            db.execute(delete(CachedDailyMetric).where(CachedDailyMetric.id.in_([row.id for row in rows])))
+            db.commit()
+            db.expunge_all()
+            moved += len(rows)
+        report.periods += 1
+        report.days += len(days)
+        report.raw_rows += moved
+        report.rollups += len(entities)
+        span.set(days=len(days), rows=moved)
+
+
+def compact(
+    db: Session,
+    today: Optional[date] = None,
+    policies: Optional[List[RetentionPolicy]] = None,
+    batch_size: Optional[int] = None,
+    archive_dir: Optional[str] = None,
+) -> CompactionReport:
+    """
+    Aplica as políticas de retenção a todos os escopos do cache diário
+    """
+    today = today or metrics_cache.utc_today()
+    policies = policies_from_settings() if policies is None else policies
+    batch_size = batch_size or settings.METRICS_COMPACTION_BATCH_SIZE
+    archive_dir = archive_dir or settings.METRICS_ARCHIVE_DIR
+    report = CompactionReport()
+    for policy in policies:
+        cutoff = today - timedelta(days=policy.after_days)
+        for scope, period_start, period_end, days in _pending_periods(db, policy, cutoff):
+            compact_period(db, scope, policy.grain, period_start, period_end, days, batch_size, archive_dir, report)
+    return report
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        report = compact(db)
+    finally:
+        db.close()
+    logger.info(
+        f"Compactação: {report.periods} períodos, {report.days} dias, {report.raw_rows} linhas diárias "
+        f"em {report.rollups} agregados, {len(report.archives)} arquivos"
+    )
+
+
+if __name__ == "__main__":
+    main()
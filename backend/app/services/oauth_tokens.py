@@ -0,0 +1,266 @@
+"""
+Tokens de acesso OAuth compartilhados entre workers e processos
+
+Cada GoogleAdsClient trocava o refresh_token por um access token ao ser
+criado, ou seja, em toda requisição e em cada worker. O TokenStore guarda o
+access token e sua expiração, indexados pelo hash do refresh_token, e todos
+os processos da máquina reutilizam o mesmo token. A renovação é antecipada
+(OAUTH_TOKEN_REFRESH_MARGIN_SECONDS antes de expirar) e feita sob um lock
+entre processos: só um processo renova cada token por vez, os demais esperam
+o lock e leem o token novo.
+
+Backends (OAUTH_TOKEN_STORE): "sqlite" (arquivo local, padrão), "memory"
+(apenas o processo) ou "none" (sem compartilhamento, como antes). Outros
+backends (ex.: Redis) implementam TokenStore e são ativados com
+set_token_store().
+"""
+import abc
+import contextlib
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, ContextManager, Dict, Iterator, Optional
+
+from google.oauth2.credentials import Credentials
+
+from app.core.config import settings
+from app.core.metrics import CACHE_REQUESTS
+from app.core.tracing import start_span
+
+try:
+    import fcntl
+except ImportError:  # Sem fcntl (Windows): lock apenas entre as threads do processo
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_TOKEN_URI = "https://accounts.google.com/o/oauth2/token"
+
+
+@dataclass(frozen=True)
+class StoredToken:
+    access_token: str
+    expires_at: float  # epoch, em segundos
+
+    def fresh(self, now: float) -> bool:
+        """
+        Longe o bastante da expiração para não precisar ser renovado
+        """
+        return self.expires_at - now > settings.OAUTH_TOKEN_REFRESH_MARGIN_SECONDS
+
+
+class TokenStore(abc.ABC):
+    """
+    Interface dos backends de tokens. lock(key) deve excluir todos os
+    processos e threads que possam renovar o mesmo token
+    """
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[StoredToken]:
+        ...
+
+    @abc.abstractmethod
+    def put(self, key: str, token: StoredToken) -> None:
+        ...
+
+    @abc.abstractmethod
+    def lock(self, key: str) -> ContextManager[None]:
+        ...
+
+
+class MemoryTokenStore(TokenStore):
+    """
+    Tokens compartilhados apenas entre as threads do processo
+    """
+
+    def __init__(self):
+        self._tokens: Dict[str, StoredToken] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def get(self, key: str) -> Optional[StoredToken]:
+        return self._tokens.get(key)
+
+    def put(self, key: str, token: StoredToken) -> None:
+        self._tokens[key] = token
+
+    @contextlib.contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        with self._guard:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            yield
+
+
+class SQLiteTokenStore(TokenStore):
+    """
+    Tokens num arquivo SQLite local, compartilhado pelos processos da máquina.
+
+    O lock de renovação é um flock num arquivo por token (em <path>.locks/):
+    o sistema o libera se o processo morrer durante a renovação. Cada open()
+    é uma descrição de arquivo própria, então o flock também exclui as
+    threads do mesmo processo.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock_dir = f"{path}.locks"
+        self._local = threading.local()
+        self._thread_locks = MemoryTokenStore()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # O arquivo guarda tokens de acesso: legível só pelo usuário do
+            # processo (o SQLite cria o WAL com as mesmas permissões)
+            os.close(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600))
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS oauth_tokens ("
+                "key TEXT PRIMARY KEY, access_token TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str) -> Optional[StoredToken]:
+        row = self._connection().execute(
+            "SELECT access_token, expires_at FROM oauth_tokens WHERE key = ?", (key,)
+        ).fetchone()
+        return StoredToken(*row) if row else None
+
+    def put(self, key: str, token: StoredToken) -> None:
+        self._connection().execute(
+            "INSERT OR REPLACE INTO oauth_tokens (key, access_token, expires_at) VALUES (?, ?, ?)",
+            (key, token.access_token, token.expires_at),
+        )
+
+    @contextlib.contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        if fcntl is None:
+            with self._thread_locks.lock(key):
+                yield
+            return
+        os.makedirs(self.lock_dir, mode=0o700, exist_ok=True)
+        fd = os.open(os.path.join(self.lock_dir, key), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)  # Fechar o descritor libera o flock
+
+
+_BACKENDS: Dict[str, Callable[[], TokenStore]] = {
+    "sqlite": lambda: SQLiteTokenStore(settings.OAUTH_TOKEN_STORE_PATH),
+    "memory": MemoryTokenStore,
+}
+
+_store: Optional[TokenStore] = None
+_store_lock = threading.Lock()
+
+
+def get_token_store() -> Optional[TokenStore]:
+    """
+    Store configurado em OAUTH_TOKEN_STORE (None com "none")
+    """
+    global _store
+    if _store is None and settings.OAUTH_TOKEN_STORE != "none":
+        with _store_lock:
+            if _store is None:
+                backend = _BACKENDS.get(settings.OAUTH_TOKEN_STORE)
+                if backend is None:
+                    raise ValueError(f"OAUTH_TOKEN_STORE inválido: {settings.OAUTH_TOKEN_STORE}")
+                _store = backend()
+    return _store
+
+
+def set_token_store(store: Optional[TokenStore]) -> None:
+    """
+    Substitui o store do processo (ex.: um backend Redis)
+    """
+    global _store
+    _store = store
+
+
+def token_key(client_id: str, refresh_token: str) -> str:
+    """
+    Chave do token no store: o refresh_token em si nunca é gravado
+    """
+    return hashlib.sha256(f"{client_id}:{refresh_token}".encode()).hexdigest()
+
+
+def shared_access_token(store: TokenStore, key: str, mint: Callable[[], StoredToken]) -> StoredToken:
+    """
+    Token do store se ainda estiver longe da expiração; senão, renova com
+    mint() sob o lock da chave
+    """
+    token = store.get(key)
+    if token is not None and token.fresh(time.time()):
+        CACHE_REQUESTS.labels("oauth_tokens", "hit").inc()
+        return token
+    CACHE_REQUESTS.labels("oauth_tokens", "miss").inc()
+    with start_span("oauth.token", key=key[:12]) as span:
+        with store.lock(key):
+            # Outro processo pode ter renovado enquanto esperávamos o lock
+            token = store.get(key)
+            if token is not None and token.fresh(time.time()):
+                span.set(refreshed=False)
+                return token
+            token = mint()
+            store.put(key, token)
+            span.set(refreshed=True)
+    return token
+
+
+def _to_epoch(expiry: Optional[datetime]) -> float:
+    # O google-auth usa datetimes UTC sem fuso; sem expiração informada, 1 hora
+    if expiry is None:
+        return time.time() + 3600
+    return expiry.replace(tzinfo=timezone.utc).timestamp()
+
+
+def _from_epoch(expires_at: float) -> datetime:
+    return datetime.fromtimestamp(expires_at, timezone.utc).replace(tzinfo=None)
+
+
+class SharedTokenCredentials(Credentials):
+    """
+    Credenciais OAuth de usuário (refresh_token) que obtêm o access token do
+    TokenStore. Só renovam no endpoint do Google quando o token compartilhado
+    está perto de expirar, e apenas um processo por vez
+    """
+
+    def __init__(self, client_id: str, client_secret: str, refresh_token: str, store: TokenStore):
+        super().__init__(
+            None,
+            refresh_token=refresh_token,
+            client_id=client_id,
+            client_secret=client_secret,
+            token_uri=GOOGLE_TOKEN_URI,
+        )
+        self._store = store
+        self._store_key = token_key(client_id, refresh_token)
+
+    def _mint(self, request) -> StoredToken:
+        Credentials.refresh(self, request)
+        return StoredToken(self.token, _to_epoch(self.expiry))
+
+    def refresh(self, request) -> None:
+        try:
+            token = shared_access_token(self._store, self._store_key, lambda: self._mint(request))
+        except (sqlite3.Error, OSError) as e:
+            # Falha no store (disco, permissões): segue com um token próprio
+            logger.warning(f"Store de tokens OAuth indisponível, renovando sem compartilhar: {e}")
+            if self.token is None or not self.valid:
+                Credentials.refresh(self, request)
+            return
+        self.token = token.access_token
+        self.expiry = _from_epoch(token.expires_at)
@@ -0,0 +1,107 @@
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, List, Optional, Union
+
+# Os ids vêm como inteiros no Google Ads e como strings no Meta Ads
+ExternalId = Union[int, str]
+
+
+# Linhas compactas compartilhadas pelos serviços Google Ads e Meta Ads. As
+# instâncias de uma classe compartilham as chaves dos atributos (key-sharing):
+# bem menos memória que um dict de 15 chaves por linha. Sem __slots__ de
+# propósito: o orjson serializa a dataclass pelo __dict__, na velocidade de um
+# dict, enquanto com __slots__ lê campo a campo, ~4x mais lento
+# (app.core.serialization, sem jsonable_encoder).
+
+@dataclass
+class CampaignData:
+    id: ExternalId
+    name: str
+    status: str
+    channel: str
+    start_date: Optional[str]
+    end_date: Optional[str]
+    impressions: int
+    clicks: int
+    ctr: float
+    conversions: float
+    spend: float
+    cpc: float
+    cpa: float
+    cpm: float
+    roas: float
+
+
+@dataclass
+class AdGroupData:
+    id: ExternalId
+    name: str
+    status: str
+    impressions: int
+    clicks: int
+    ctr: float
+    conversions: float
+    spend: float
+
+
+@dataclass
+class AdData:
+    id: ExternalId
+    name: str
+    status: str
+    impressions: int
+    clicks: int
+    ctr: float
+    conversions: float
+    spend: float
+    thumbnail_url: Optional[str] = None
+    # Google Ads
+    final_url: Optional[str] = None
+    ad_group: Optional[str] = None
+    # Meta Ads
+    campaign_id: Optional[ExternalId] = None
+    adset_id: Optional[ExternalId] = None
+    ad_link: Optional[str] = None
+
+
+@dataclass
+class DailyMetricRow:
+    """
+    Métricas de um dia de uma campanha ou anúncio (consultas por período,
+    base do cache diário), com os atributos vistos naquele dia
+    """
+    entity_id: str
+    date: date
+    impressions: int
+    clicks: int
+    conversions: float
+    spend: float
+    # Receita atribuída às conversões (base do ROAS do período)
+    conversion_value: float
+    attributes: Dict[str, Any]
+
+
+@dataclass
+class CustomerClientData:
+    """
+    Conta na hierarquia de uma conta de administrador (MCC) do Google Ads;
+    level 0 é a própria MCC
+    """
+    id: int
+    name: Optional[str]
+    manager: bool
+    level: int
+    status: str
+    currency_code: Optional[str]
+
+
+@dataclass
+class ClientCampaignsData:
+    """
+    Campanhas de uma conta cliente na consulta de uma MCC. Uma conta com
+    falha não derruba as demais: vem sem campanhas e com o erro
+    """
+    customer_id: int
+    name: Optional[str]
+    campaigns: List[CampaignData]
+    error: Optional[str] = None
@@ -0,0 +1,190 @@
+"""
+Sincronização das contas de anúncios dos usuários
+
+Sincronizar uma conta é atualizar o cache diário de métricas das suas
+campanhas (app/services/metrics_cache.py) na janela dos presets do
+dashboard: só os dias ausentes ou ainda abertos são buscados no provedor.
+Em seguida o catálogo de campanhas e anúncios da conta é atualizado
+(app/services/catalog_sync.py), gravando só as linhas que mudaram.
+Ao fim da sincronização de cada conta, os hooks registrados com
+on_sync_complete recebem o resultado; o primeiro deles regenera os
+snapshots do dashboard do dono da conta e o segundo publica as campanhas
+que mudaram para as conexões SSE (app/services/live_updates.py).
+
+Uso periódico (ex.: cron), todas as contas ou as de um usuário:
+    python -m app.services.sync_service [--user-id 42]
+"""
+import argparse
+import logging
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Callable, List, Optional, Union
+
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.config import settings
+from app.core.tracing import start_span
+from app.db.session import SessionLocal
+from app.models.models import GoogleAdsAccount, MetaAdsAccount, User
+from app.services import anomaly_detection  # noqa: F401 (detecção de anomalias nas linhas ingeridas)
+from app.services import catalog_sync, dashboard_snapshots, live_updates, metrics_cache
+from app.services.catalog_sync import CatalogReport
+from app.services.google_ads_service import GoogleAdsService
+from app.services.meta_ads_service import MetaAdsService
+from app.services.metrics_cache import MetricsScope
+from app.services.rows import DailyMetricRow
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SyncResult:
+    provider: str  # google, meta
+    account_id: int  # id da conta no banco
+    external_id: str  # id da conta no provedor
+    user_id: int
+    start_date: date
+    end_date: date
+    rows: int = 0
+    error: Optional[str] = None
+    # Linhas diárias de campanha da janela antes e depois da sincronização
+    previous_rows: List[DailyMetricRow] = field(default_factory=list, repr=False)
+    current_rows: List[DailyMetricRow] = field(default_factory=list, repr=False)
+    # None se o catálogo estiver desativado ou a atualização falhar
+    catalog: Optional[CatalogReport] = None
+
+
+SyncHook = Callable[[Session, SyncResult], None]
+_hooks: List[SyncHook] = []
+
+
+def on_sync_complete(hook: SyncHook) -> SyncHook:
+    """
+    Registra um hook chamado ao fim de cada sincronização de conta bem-sucedida
+    (pode ser usado como decorador)
+    """
+    _hooks.append(hook)
+    return hook
+
+
+def _google_ads_service(account: GoogleAdsAccount) -> GoogleAdsService:
+    return GoogleAdsService(
+        client_id=settings.GOOGLE_ADS_CLIENT_ID,
+        client_secret=settings.GOOGLE_ADS_CLIENT_SECRET,
+        developer_token=settings.GOOGLE_ADS_DEVELOPER_TOKEN,
+        refresh_token=account.refresh_token,
+        api_url=settings.GOOGLE_ADS_API_URL
+    )
+
+
+def _meta_ads_service(account: MetaAdsAccount) -> MetaAdsService:
+    return MetaAdsService(
+        app_id=settings.META_APP_ID,
+        app_secret=settings.META_APP_SECRET,
+        access_token=account.access_token,
+        graph_url=settings.META_GRAPH_API_URL
+    )
+
+
+def _sync_catalog(db: Session, account: Union[GoogleAdsAccount, MetaAdsAccount], provider: str) -> Optional[CatalogReport]:
+    """
+    Atualiza o catálogo de campanhas e anúncios da conta. Uma falha aqui não
+    invalida a sincronização das métricas
+    """
+    try:
+        if provider == "google":
+            service = _google_ads_service(account)
+            campaigns = service.get_campaigns(account.account_id)
+            ads = service.get_account_ads(account.account_id)
+        else:
+            service = _meta_ads_service(account)
+            campaigns = service.get_campaigns(account.account_id)
+            ads = service.get_ads(account.account_id, wait_seconds=settings.CATALOG_META_WAIT_SECONDS)
+        return catalog_sync.sync_catalog(db, account, campaigns, ads)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Erro ao atualizar o catálogo da conta {provider} {account.account_id}: {e}")
+        return None
+
+
+def sync_account(db: Session, account: Union[GoogleAdsAccount, MetaAdsAccount], today: Optional[date] = None) -> SyncResult:
+    """
+    Atualiza o cache diário das campanhas da conta e chama os hooks. Erros do
+    provedor ficam no resultado (e nos logs), sem interromper as demais contas
+    """
+    provider = "google" if isinstance(account, GoogleAdsAccount) else "meta"
+    start, end = dashboard_snapshots.sync_range(today or metrics_cache.utc_today())
+    result = SyncResult(provider, account.id, account.account_id, account.user_id, start, end)
+    with start_span("sync.account", provider=provider, account_id=account.account_id) as span:
+        try:
+            if provider == "google":
+                fetch = lambda start, end: _google_ads_service(account).get_campaign_daily_metrics(account.account_id, start, end)
+            else:
+                fetch = lambda start, end: _meta_ads_service(account).get_campaign_daily_metrics(account.account_id, start, end)
+            scope = MetricsScope(provider, account.account_id, "campaign")
+            result.previous_rows = metrics_cache.cached_rows(db, scope, start, end)
+            result.current_rows = metrics_cache.daily_rows(db, scope, start, end, fetch)
+            result.rows = len(result.current_rows)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Erro ao sincronizar a conta {provider} {account.account_id}: {e}")
+            result.error = str(e)
+            span.set(error=result.error)
+            return result
+        if settings.CATALOG_SYNC_ENABLED:
+            result.catalog = _sync_catalog(db, account, provider)
+        span.set(rows=result.rows, catalog_rows_written=result.catalog.rows_written if result.catalog else None)
+        for hook in _hooks:
+            try:
+                hook(db, result)
+            except Exception as e:
+                db.rollback()
+                logger.exception(f"Erro no hook de fim de sincronização {getattr(hook, '__name__', hook)}: {e}")
+    return result
+
+
+def sync_user_accounts(db: Session, user_id: int) -> List[SyncResult]:
+    """
+    Sincroniza todas as contas Google Ads e Meta Ads do usuário
+    """
+    accounts = (
+        crud.crud_google_ads.get_google_ads_accounts_by_user(db, user_id)
+        + crud.crud_meta_ads.get_meta_ads_accounts_by_user(db, user_id)
+    )
+    return [sync_account(db, account) for account in accounts]
+
+
+@on_sync_complete
+def refresh_dashboard_snapshots(db: Session, result: SyncResult) -> None:
+    etags = dashboard_snapshots.refresh_user_snapshots(db, result.user_id)
+    live_updates.publish_dashboard(result.user_id, etags)
+
+
+on_sync_complete(live_updates.publish_sync_changes)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sincroniza as contas de anúncios e regenera os snapshots do dashboard")
+    parser.add_argument("--user-id", type=int, help="apenas as contas deste usuário")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    db = SessionLocal()
+    try:
+        if args.user_id is not None:
+            user_ids = [args.user_id]
+        else:
+            user_ids = [user_id for user_id, in db.query(User.id).filter(User.is_active.is_(True)).order_by(User.id)]
+        for user_id in user_ids:
+            for result in sync_user_accounts(db, user_id):
+                status = f"erro: {result.error}" if result.error else f"{result.rows} linhas"
+                if result.catalog is not None:
+                    status += f", catálogo: {result.catalog.rows_written} linhas gravadas"
+                logger.info(f"Usuário {user_id}: {result.provider} {result.external_id} sincronizada ({status})")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+"""
+Proxy das miniaturas dos anúncios
+
+As miniaturas vêm como URLs de terceiros (thumbnail_url/image_url do Meta,
+image_ad.image_url do Google): lentas, às vezes expiram e são imagens
+inteiras para uma célula de tabela de 64px. As respostas de anúncios passam a
+apontar para o proxy (GET /thumbnails/{assinatura}?url=...&w=...), que:
+
+- busca a imagem original uma vez e a grava no disco endereçada pelo
+  conteúdo (sha256), com o mapeamento URL → conteúdo ao lado;
+- gera variantes reduzidas nas larguras de THUMBNAILS_SIZES (com Pillow, se
+  instalado; sem ele, ou se a imagem já for pequena, a variante é a própria
+  imagem original);
+- remove os arquivos usados há mais tempo quando o diretório passa de
+  THUMBNAILS_MAX_BYTES (a data de modificação marca o último uso);
+- recusa (422) imagens acima de THUMBNAILS_MAX_PIXELS antes de decodificá-las.
+
+A imagem é lida do disco enquanto o lock da URL está com a requisição: a
+limpeza pode remover o arquivo logo depois, e o endpoint responde com os
+bytes já lidos.
+
+A assinatura (HMAC com SECRET_KEY) garante que o proxy só busca URLs que a
+própria API devolveu. O endpoint não exige autenticação porque o navegador
+carrega as imagens sem o header Authorization.
+
+A imagem é buscada pelo fetcher do ThumbnailStore (por padrão
+fetch_upstream, com httpx): testes passam outro fetcher ou substituem
+get_thumbnail_store via app.dependency_overrides.
+"""
+import hashlib
+import hmac
+import io
+import logging
+import os
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+from urllib.parse import urlencode
+
+import httpx
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.services.rows import AdData
+
+# Pillow é opcional: sem ele as miniaturas são servidas no tamanho original
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+# (url) -> (conteúdo, content-type)
+Fetcher = Callable[[str], Tuple[bytes, str]]
+
+_VARIANT_TYPES = {"jpg": "image/jpeg", "png": "image/png"}
+# Fração do limite gravada entre duas verificações do tamanho do diretório
+_EVICTION_CHECK_FRACTION = 0.05
+# Após a limpeza o diretório fica com esta fração do limite
+_EVICTION_TARGET_FRACTION = 0.9
+# Locks por URL distribuídos num número fixo de faixas
+_LOCK_STRIPES = 64
+
+
+class ThumbnailError(Exception):
+    """
+    Imagem indisponível no provedor ou inválida
+    """
+
+    def __init__(self, message: str, status_code: int = 502):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def fetch_upstream(url: str) -> Tuple[bytes, str]:
+    """
+    Busca a imagem original, limitada a THUMBNAILS_MAX_SOURCE_BYTES
+    """
+    try:
+        with httpx.stream(
+            "GET", url, timeout=settings.THUMBNAILS_FETCH_TIMEOUT_SECONDS, follow_redirects=True
+        ) as response:
+            if response.status_code in (403, 404, 410):
+                # URLs assinadas do Meta respondem 403 depois de expirar
+                raise ThumbnailError("Imagem não encontrada no provedor", 404)
+            if response.status_code >= 400:
+                raise ThumbnailError(f"Provedor da imagem respondeu {response.status_code}")
+            content_type = response.headers.get("content-type", "").split(";")[0].strip()
+            if not content_type.startswith("image/"):
+                raise ThumbnailError(f"Conteúdo não é uma imagem: {content_type or 'sem content-type'}")
+            chunks: List[bytes] = []
+            size = 0
+            for chunk in response.iter_bytes():
+                size += len(chunk)
+                if size > settings.THUMBNAILS_MAX_SOURCE_BYTES:
+                    raise ThumbnailError("Imagem maior que o limite do proxy")
+                chunks.append(chunk)
+    except httpx.HTTPError as e:
+        raise ThumbnailError(f"Erro ao buscar a imagem: {e}")
+    return b"".join(chunks), content_type
+
+
+def sign(url: str) -> str:
+    return hmac.new(settings.SECRET_KEY.encode(), b"thumbnail:" + url.encode(), hashlib.sha256).hexdigest()[:32]
+
+
+def verify(signature: str, url: str) -> bool:
+    return hmac.compare_digest(sign(url), signature)
+
+
+def _proxy_prefix() -> str:
+    return f"{settings.THUMBNAILS_BASE_URL}{settings.API_V1_STR}/thumbnails/"
+
+
+def proxy_url(url: Optional[str], width: Optional[int] = None) -> Optional[str]:
+    """
+    URL do proxy para a miniatura (ou a própria URL, se não for http(s) ou o
+    proxy estiver desativado)
+    """
+    if not url or not settings.THUMBNAILS_PROXY_ENABLED or not url.startswith(("http://", "https://")):
+        return url
+    if url.startswith(_proxy_prefix()):
+        return url
+    width = width or settings.THUMBNAILS_SIZES[0]
+    return f"{_proxy_prefix()}{sign(url)}?{urlencode({'url': url, 'w': width})}"
+
+
+def proxy_ads(ads: List[AdData]) -> List[AdData]:
+    """
+    Reescreve o thumbnail_url dos anúncios para o proxy
+    """
+    for ad in ads:
+        ad.thumbnail_url = proxy_url(ad.thumbnail_url)
+    return ads
+
+
+def _resize(content: bytes, width: int) -> Optional[Tuple[bytes, str]]:
+    """
+    Variante reduzida para a largura (JPEG, ou PNG se houver transparência);
+    None se não houver Pillow, se a imagem já for estreita ou não puder ser
+    lida. Levanta ThumbnailError (422) se a imagem passar de THUMBNAILS_MAX_PIXELS
+    """
+    if Image is None:
+        return None
+    try:
+        # Image.open só lê o cabeçalho: as dimensões são verificadas antes de decodificar
+        with Image.open(io.BytesIO(content)) as image:
+            if image.width * image.height > settings.THUMBNAILS_MAX_PIXELS:
+                raise ThumbnailError(f"Imagem grande demais: {image.width}x{image.height} pixels", 422)
+            if image.width <= width:
+                return None
+            image.thumbnail((width, max(1, round(image.height * width / image.width))))
+            transparent = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+            output = io.BytesIO()
+            if transparent:
+                image.save(output, "PNG", optimize=True)
+                return output.getvalue(), "png"
+            image.convert("RGB").save(output, "JPEG", quality=82, optimize=True, progressive=True)
+            return output.getvalue(), "jpg"
+    except Image.DecompressionBombError as e:
+        raise ThumbnailError(f"Imagem grande demais: {e}", 422)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Imagem não pôde ser reduzida, servindo o original: {e}")
+        return None
+
+
+@dataclass(frozen=True)
+class Thumbnail:
+    content: bytes
+    content_type: str
+    etag: str
+
+
+class ThumbnailStore:
+    """
+    Imagens originais e variantes no disco, com limite de tamanho (LRU)
+
+    Layout: sources/<sha256 do conteúdo>, variants/<sha256>-<largura>.<ext> e
+    urls/<sha256 da URL> com "<sha256 do conteúdo> <content-type>"
+    """
+
+    def __init__(self, directory: str, max_bytes: int, fetcher: Fetcher = fetch_upstream):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.fetcher = fetcher
+        self._locks = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+        self._guard = threading.Lock()
+        self._written = 0
+        self._checked = False
+        # Falhas recentes: não consultar o provedor a cada carregamento da tabela
+        self._failures = TTLCache(300, 1024, name="thumbnail_failures")
+        if Image is None:
+            logger.info("Pillow não instalado: miniaturas servidas no tamanho original")
+
+    def _path(self, kind: str, name: str) -> str:
+        return os.path.join(self.directory, kind, name[:2], name)
+
+    def _write(self, path: str, content: bytes) -> None:
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, partial = tempfile.mkstemp(dir=directory, suffix=".partial")
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(partial, path)
+        self._account(len(content))
+
+    def _touch(self, path: str) -> bool:
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _read(self, path: str) -> Optional[bytes]:
+        """
+        Conteúdo do arquivo, marcando o uso; None se não existir (ou tiver
+        sido removido pela limpeza)
+        """
+        try:
+            with open(path, "rb") as f:
+                os.utime(f.fileno())
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _lock_for(self, key: str) -> threading.Lock:
+        return self._locks[int(key[:8], 16) % _LOCK_STRIPES]
+
+    def get(self, url: str, width: int) -> Thumbnail:
+        """
+        Variante da imagem na largura, buscando o original se necessário
+        """
+        url_key = hashlib.sha256(url.encode()).hexdigest()
+        failure = self._failures.get(url_key)
+        if failure is not None:
+            raise failure
+        # Uma busca por URL de cada vez no processo
+        with self._lock_for(url_key):
+            try:
+                return self._get(url, url_key, width)
+            except ThumbnailError as e:
+                self._failures.set(url_key, e)
+                raise
+
+    def _get(self, url: str, url_key: str, width: int) -> Thumbnail:
+        mapping_path = self._path("urls", url_key)
+        content: Optional[bytes] = None
+        try:
+            with open(mapping_path) as f:
+                content_hash, content_type = f.read().split(" ", 1)
+        except FileNotFoundError:
+            content_hash = content_type = None
+
+        if content_hash is not None:
+            etag = f'"{content_hash[:32]}-{width}"'
+            for extension, variant_type in _VARIANT_TYPES.items():
+                variant = self._read(self._path("variants", f"{content_hash}-{width}.{extension}"))
+                if variant is not None:
+                    return Thumbnail(variant, variant_type, etag)
+            content = self._read(self._path("sources", content_hash))
+            if content is None:
+                content_hash = None  # Original removido pelo limite de tamanho
+
+        if content_hash is None:
+            content, content_type = self.fetcher(url)
+            content_hash = hashlib.sha256(content).hexdigest()
+            source_path = self._path("sources", content_hash)
+            if not self._touch(source_path):
+                self._write(source_path, content)
+            self._write(mapping_path, f"{content_hash} {content_type}".encode())
+
+        etag = f'"{content_hash[:32]}-{width}"'
+        resized = _resize(content, width)
+        if resized is None:
+            self._touch(self._path("sources", content_hash))
+            return Thumbnail(content, content_type, etag)
+        variant, extension = resized
+        self._write(self._path("variants", f"{content_hash}-{width}.{extension}"), variant)
+        return Thumbnail(variant, _VARIANT_TYPES[extension], etag)
+
+    def _account(self, size: int) -> None:
+        with self._guard:
+            self._written += size
+            if self._checked and self._written < self.max_bytes * _EVICTION_CHECK_FRACTION:
+                return
+            self._written, self._checked = 0, True
+        self.evict()
+
+    def evict(self) -> int:
+        """
+        Remove os arquivos usados há mais tempo até o diretório ficar abaixo
+        do limite. Retorna o número de arquivos removidos
+        """
+        files: List[Tuple[float, int, str]] = []
+        for kind in ("sources", "variants"):
+            for root, _, names in os.walk(os.path.join(self.directory, kind)):
+                for name in names:
+                    if name.endswith(".partial"):
+                        continue  # Gravação em andamento
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        if total <= self.max_bytes:
+            return 0
+        files.sort()
+        removed = 0
+        target = self.max_bytes * _EVICTION_TARGET_FRACTION
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        logger.info(f"Miniaturas: {removed} arquivos removidos pelo limite de {self.max_bytes} bytes")
+        return removed
+
+
+_store: Optional[ThumbnailStore] = None
+_store_lock = threading.Lock()
+
+
+def get_thumbnail_store() -> ThumbnailStore:
+    """
+    Store do processo (dependência do endpoint do proxy)
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ThumbnailStore(settings.THUMBNAILS_DIR, settings.THUMBNAILS_MAX_BYTES)
+    return _store
@@ -0,0 +1,37 @@
+import logging
+import time
+from typing import Any, Callable, TypeVar
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def call_with_throttle_retry(
+    call: Callable[[], T], is_throttled: Callable[[Exception], bool], *spans: Any
+) -> T:
+    """
+    Executa uma chamada a um provedor repetindo-a, com backoff exponencial,
+    quando o erro indica limite de requisições (throttling).
+
+    Throttles e retries são contados nos spans informados.
+    """
+    attempt = 0
+    while True:
+        try:
+            return call()
+        except Exception as e:
+            if not is_throttled(e):
+                raise
+            for span in spans:
+                span.incr("throttles")
+            if attempt >= settings.UPSTREAM_THROTTLE_RETRIES:
+                raise
+            delay = settings.UPSTREAM_THROTTLE_BACKOFF_SECONDS * 2 ** attempt
+            logger.warning(f"Limite de requisições do provedor atingido, nova tentativa em {delay:.1f}s ({type(e).__name__})")
+            time.sleep(delay)
+            attempt += 1
+            for span in spans:
+                span.incr("retries")
@@ -0,0 +1,39 @@
+import importlib
+import logging
+import time
+
+from app.services import google_ads_service, meta_ads_service
+
+logger = logging.getLogger(__name__)
+
+
+def _load_google_ads_protos() -> None:
+    # O GoogleAdsClient só importa a árvore de protos da versão da API no
+    # primeiro get_service; carregá-la aqui tira esse custo da 1ª requisição
+    google_ads_service.load_sdk()
+    from google.ads.googleads import client
+
+    version = getattr(client, "_DEFAULT_VERSION", None)
+    if version:
+        importlib.import_module(f"google.ads.googleads.{version}.services.services.google_ads_service")
+
+
+def warm_up_provider_sdks() -> None:
+    """
+    Pré-carrega os SDKs do Google Ads e do Meta Ads.
+
+    Opcional (PROVIDER_SDK_WARMUP): tira o custo do import da primeira
+    requisição de cada worker. Falhas de import são apenas registradas, já
+    que o serviço tentará carregar o SDK novamente no primeiro uso.
+    """
+    for name, loader in (
+        ("Google Ads", _load_google_ads_protos),
+        ("Meta Ads", meta_ads_service.load_sdk),
+    ):
+        start = time.perf_counter()
+        try:
+            loader()
+        except ImportError as e:
+            logger.warning(f"Não foi possível pré-carregar o SDK do {name}: {e}")
+            continue
+        logger.info(f"SDK do {name} carregado em {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,148 @@
+"""
+Vazão do detector incremental de anomalias (app/services/anomaly_detection.py)
+
+- detector: pontos por minuto aplicados aos estados em memória (observe),
+  para muitas séries com um ponto novo cada, como numa ingestão diária
+- rescan: a alternativa de recalcular média e desvio sobre o histórico
+  inteiro da série a cada ponto, para comparação
+- ingest: caminho completo com o banco (SQLite em memória): carregar os
+  estados, aplicar as linhas diárias ingeridas, gravar estados e anomalias
+
+Uso: python -m benchmarks.bench_anomalies [séries]
+"""
+import math
+import random
+import sys
+from datetime import date, timedelta
+from typing import Dict, List
+
+from app.services.anomaly_detection import DetectorParams, SeriesState, observe
+from app.services.rows import DailyMetricRow
+from benchmarks.common import measure
+
+PARAMS = DetectorParams(alpha=0.1, gamma=0.1, threshold=4.0, warmup=14)
+START = date(2026, 1, 1)
+
+
+def _series_values(rnd: random.Random, days: int) -> List[float]:
+    # Gasto com sazonalidade semanal, ruído e um pico ocasional
+    base = rnd.uniform(50, 5000)
+    values = []
+    for day in range(days):
+        value = base * (1 + 0.2 * math.sin(day * 2 * math.pi / 7)) * rnd.uniform(0.9, 1.1)
+        if rnd.random() < 0.005:
+            value *= 4
+        values.append(value)
+    return values
+
+
+def _warm_states(series: int, history: int, seed: int = 42) -> List[SeriesState]:
+    rnd = random.Random(seed)
+    states = []
+    for _ in range(series):
+        state = SeriesState()
+        for day, value in enumerate(_series_values(rnd, history)):
+            observe(state, value, START + timedelta(days=day), True, "spike", PARAMS)
+        states.append(state)
+    return states
+
+
+def bench_detector(series: int, days: int, repeat: int) -> Dict[str, float]:
+    """
+    Aplica `days` dias novos a `series` séries já aquecidas
+    """
+    rnd = random.Random(7)
+    states = _warm_states(series, 30)
+    new_days = [START + timedelta(days=30 + day) for day in range(days)]
+    values = [_series_values(rnd, days) for _ in range(series)]
+
+    def run():
+        for state, series_values in zip(states, values):
+            # Copiar o estado mantém as repetições comparáveis
+            state = SeriesState(state.points, state.mean, state.variance, list(state.seasonal), state.last_date)
+            for day, value in zip(new_days, series_values):
+                observe(state, value, day, True, "spike", PARAMS)
+
+    timing = measure(run, repeat)
+    points = series * days
+    return {**timing, "points": points, "points_per_minute": points / timing["median_ms"] * 60_000}
+
+
+def bench_rescan(series: int, history: int, repeat: int) -> Dict[str, float]:
+    """
+    Um ponto novo por série, avaliado contra média e desvio recalculados
+    sobre os `history` dias anteriores
+    """
+    rnd = random.Random(7)
+    histories = [_series_values(rnd, history + 1) for _ in range(series)]
+
+    def run():
+        for values in histories:
+            past, value = values[:-1], values[-1]
+            mean = sum(past) / len(past)
+            std = math.sqrt(sum((x - mean) ** 2 for x in past) / len(past))
+            (value - mean) / std > PARAMS.threshold
+
+    timing = measure(run, repeat)
+    return {**timing, "points": series, "points_per_minute": series / timing["median_ms"] * 60_000}
+
+
+def bench_ingest(entities: int, days: int, repeat: int) -> Dict[str, float]:
+    """
+    ingest() de uma conta com `entities` campanhas e `days` dias fechados
+    novos, com os estados já existentes no banco
+    """
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    from app.models import Base
+    from app.services.anomaly_detection import ingest
+    from app.services.metrics_cache import MetricsScope
+
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    scope = MetricsScope("google", "1234567890", "campaign")
+    rnd = random.Random(42)
+    values = {str(entity): _series_values(rnd, 400) for entity in range(entities)}
+    today = START + timedelta(days=400)
+
+    def rows(first_day: int, count: int) -> List[DailyMetricRow]:
+        return [
+            DailyMetricRow(entity_id, START + timedelta(days=day), 10_000, int(series[day]), 1.0, series[day], series[day] * 3, {})
+            for entity_id, series in values.items()
+            for day in range(first_day, first_day + count)
+        ]
+
+    ingest(db, scope, rows(0, 30), today)  # estados aquecidos
+    batches = iter(range(30, 400, days))
+
+    def run():
+        ingest(db, scope, rows(next(batches), days), today)
+        db.expunge_all()
+
+    timing = measure(run, repeat)
+    points = entities * days * 2  # gasto e CTR
+    return {**timing, "points": points, "points_per_minute": points / timing["median_ms"] * 60_000}
+
+
+def run(series: int = 100_000, repeat: int = 5) -> Dict[str, Dict[str, float]]:
+    return {
+        "anomalies.detector": bench_detector(series, 10, repeat),
+        "anomalies.rescan_365d": bench_rescan(series // 10, 365, repeat),
+        "anomalies.ingest": bench_ingest(2_000, 7, repeat),
+    }
+
+
+def main() -> None:
+    series = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    for name, r in run(series).items():
+        print(
+            f"{name:<24} {r['points']:>9} pontos   mediana {r['median_ms']:9.1f} ms   "
+            f"{r['points_per_minute'] / 1e6:8.2f} M pontos/min"
+        )
+
+
+if __name__ == "__main__":
+    main()
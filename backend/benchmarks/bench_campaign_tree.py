@@ -0,0 +1,164 @@
+"""
+Consultas e tempo da árvore campanha → anúncio → métricas (GET /campaigns/tree)
+
+Para árvores de tamanhos diferentes, num SQLite em memória:
+
+- eager: o carregamento do endpoint (app/crud/crud_campaigns.py), que deve
+  fazer o mesmo número de consultas qualquer que seja o tamanho da árvore
+- lazy: percorrer a árvore com lazyload explícito (o padrão dos
+  relacionamentos é lazy="raise"), para comparação: 1 + campanhas + anúncios
+  consultas
+
+Termina com erro se o número de consultas do carregamento do endpoint variar
+com o tamanho da árvore ou se percorrer a árvore sem opções não falhar.
+
+Uso: python -m benchmarks.bench_campaign_tree
+"""
+import random
+import sys
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Tuple
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import Session, lazyload, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.crud import crud_campaigns
+from app.models import Base
+from app.models.models import Ad, AdMetric, Campaign, CampaignMetric, GoogleAdsAccount, User
+from benchmarks.common import measure
+
+SIZES: List[Tuple[int, int]] = [(5, 3), (50, 10), (200, 20)]  # (campanhas, anúncios por campanha)
+DAYS = 30
+START = date(2026, 1, 1)
+
+
+class _QueryCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args) -> None:
+        self.count += 1
+
+
+def _seed(db: Session, campaigns: int, ads_per_campaign: int) -> int:
+    rnd = random.Random(42)
+    user = User(email="arvore@bench.example.com", name="Árvore", hashed_password="x")
+    db.add(user)
+    db.flush()
+    account = GoogleAdsAccount(account_id="1234567890", name="Conta", refresh_token="x", user_id=user.id)
+    db.add(account)
+    db.flush()
+    days = [datetime.combine(START + timedelta(days=day), datetime.min.time()) for day in range(DAYS)]
+
+    def metrics(**key) -> List[dict]:
+        return [
+            {**key, "date": day, "impressions": rnd.randint(0, 10_000), "clicks": rnd.randint(0, 300),
+             "conversions": rnd.randint(0, 20), "spend": rnd.random() * 500, "roas": rnd.random() * 5}
+            for day in days
+        ]
+
+    campaign_metrics, ad_metrics = [], []
+    for c in range(campaigns):
+        campaign = Campaign(
+            campaign_id=str(100 + c), name=f"Campanha {c}", status="active", channel="google",
+            user_id=user.id, google_ads_account_id=account.id,
+        )
+        db.add(campaign)
+        db.flush()
+        campaign_metrics += metrics(campaign_id=campaign.id)
+        ads = [Ad(ad_id=f"{c}-{a}", name=f"Anúncio {a}", campaign_id=campaign.id) for a in range(ads_per_campaign)]
+        db.add_all(ads)
+        db.flush()
+        for ad in ads:
+            ad_metrics += metrics(ad_id=ad.id)
+    db.bulk_insert_mappings(CampaignMetric, campaign_metrics)
+    db.bulk_insert_mappings(AdMetric, ad_metrics)
+    db.commit()
+    return user.id
+
+
+def _eager(db: Session, user_id: int) -> int:
+    criterion = crud_campaigns.campaign_filter(user_id)
+    campaigns = crud_campaigns.get_campaign_tree(db, criterion)
+    totals = crud_campaigns.get_metric_totals(db, criterion, (START, START + timedelta(days=DAYS - 1)))
+    nodes = 0
+    for campaign in campaigns:
+        account = campaign.google_ads_account or campaign.meta_ads_account
+        nodes += 1 + len(campaign.ads) + (account is not None)
+        totals.get(("campaign", campaign.id))
+        for ad in campaign.ads:
+            totals.get(("ad", ad.id))
+    return nodes
+
+
+def _lazy(db: Session, user_id: int) -> int:
+    campaigns = db.query(Campaign).options(
+        lazyload(Campaign.ads).lazyload(Ad.metrics), lazyload(Campaign.google_ads_account)
+    ).filter(Campaign.user_id == user_id).all()
+    nodes = 0
+    for campaign in campaigns:
+        nodes += 1 + (campaign.google_ads_account is not None)
+        for ad in campaign.ads:
+            nodes += 1
+            sum(metric.spend for metric in ad.metrics)
+    return nodes
+
+
+def _raises_without_options(db: Session) -> bool:
+    campaign = db.query(Campaign).first()
+    try:
+        campaign.ads
+    except InvalidRequestError:
+        return True
+    return False
+
+
+def bench_tree(campaigns: int, ads_per_campaign: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)
+    with session() as db:
+        user_id = _seed(db, campaigns, ads_per_campaign)
+    counter = _QueryCounter(engine)
+    results = {}
+    for name, load in (("eager", _eager), ("lazy", _lazy)):
+        queries: List[int] = []
+
+        def run():
+            with session() as db:
+                before = counter.count
+                load(db, user_id)
+                queries.append(counter.count - before)
+
+        timing = measure(run, repeat)
+        results[name] = {**timing, "queries": queries[-1]}
+    with session() as db:
+        results["eager"]["raises_without_options"] = _raises_without_options(db)
+    engine.dispose()
+    return results
+
+
+def run(repeat: int = 5) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for campaigns, ads_per_campaign in SIZES:
+        for name, r in bench_tree(campaigns, ads_per_campaign, repeat).items():
+            results[f"campaign_tree.{name}.{campaigns}x{ads_per_campaign}"] = r
+    return results
+
+
+def main() -> None:
+    results = run()
+    for name, r in results.items():
+        print(f"{name:<32} {r['queries']:>6} consultas   mediana {r['median_ms']:9.1f} ms")
+    eager_queries = {r["queries"] for name, r in results.items() if ".eager." in name}
+    if len(eager_queries) != 1:
+        sys.exit(f"Consultas do carregamento da árvore variam com o tamanho: {sorted(eager_queries)}")
+    if not all(r["raises_without_options"] for name, r in results.items() if ".eager." in name):
+        sys.exit("Percorrer a árvore sem opções de carregamento não falhou (lazy=\"raise\")")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Linhas gravadas pela sincronização do catálogo de campanhas e anúncios
+(app/services/catalog_sync.py) numa conta quase sem mudanças
+
+Num SQLite em memória, uma conta com o catálogo já gravado é sincronizada
+de novo com uma fração das campanhas e dos anúncios alterada:
+
+- hash: a sincronização do catálogo, que grava só as linhas alteradas
+- rewrite: a alternativa ingênua de regravar todas as linhas a cada
+  sincronização (UPDATE em lote de todas), para comparação
+
+Uso: python -m benchmarks.bench_catalog_sync [campanhas] [anúncios por campanha]
+"""
+import random
+import sys
+from typing import Dict, List, Tuple
+
+from sqlalchemy import create_engine, event, update
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models import Base
+from app.models.models import Ad, Campaign, MetaAdsAccount, User
+from app.services import catalog_sync
+from app.services.rows import AdData, CampaignData
+from benchmarks.common import measure
+
+CHANGED_FRACTIONS = (0.0, 0.01, 0.1)
+
+
+def _catalog(campaigns: int, ads_per_campaign: int) -> Tuple[List[CampaignData], List[AdData]]:
+    campaign_rows, ad_rows = [], []
+    for c in range(campaigns):
+        campaign_id = 1_000_000 + c
+        campaign_rows.append(CampaignData(
+            str(campaign_id), f"Campanha {c:04d}", "ACTIVE", "meta", "2025-01-01T00:00:00-0300", None,
+            0, 0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0,
+        ))
+        for a in range(ads_per_campaign):
+            ad_id = campaign_id * 1000 + a
+            ad_rows.append(AdData(
+                str(ad_id), f"Anúncio {a:03d} da campanha {c:04d}", "ACTIVE", 0, 0, 0.0, 0.0, 0.0,
+                # URL assinada: a query string muda a cada busca
+                thumbnail_url=f"https://cdn.example.com/{ad_id}.jpg?oh={random.random()}",
+                campaign_id=str(campaign_id),
+                adset_id=str(campaign_id * 10),
+                ad_link=f"https://loja.example.com/produto/{ad_id}",
+            ))
+    return campaign_rows, ad_rows
+
+
+def _changed(campaigns: List[CampaignData], ads: List[AdData], fraction: float, round_: int, seed: int = 42):
+    """
+    Cópia do catálogo com a fração das campanhas pausada e a dos anúncios renomeada
+    """
+    rnd = random.Random(seed + round_)
+    campaigns = [
+        CampaignData(c.id, c.name, "PAUSED" if rnd.random() < fraction else c.status, c.channel, c.start_date, c.end_date,
+                     0, 0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+        for c in campaigns
+    ]
+    ads = [
+        AdData(
+            a.id, f"{a.name} v{round_}" if rnd.random() < fraction else a.name, a.status, 0, 0, 0.0, 0.0, 0.0,
+            thumbnail_url=f"{a.thumbnail_url.split('?')[0]}?oh={rnd.random()}",
+            campaign_id=a.campaign_id, adset_id=a.adset_id, ad_link=a.ad_link,
+        )
+        for a in ads
+    ]
+    return campaigns, ads
+
+
+def _rewrite(db: Session, account: MetaAdsAccount, campaigns: List[CampaignData], ads: List[AdData], batch_size: int) -> int:
+    """
+    Regrava todas as campanhas e anúncios já existentes, sem comparar hashes
+    """
+    campaign_ids = dict(db.query(Campaign.campaign_id, Campaign.id).filter(Campaign.meta_ads_account_id == account.id))
+    ad_ids = dict(db.query(Ad.ad_id, Ad.id).filter(Ad.campaign_id.in_(list(campaign_ids.values()))))
+    campaign_rows = [
+        {"id": campaign_ids[str(c.id)], "name": c.name, "status": catalog_sync._status(c.status)} for c in campaigns
+    ]
+    ad_rows = [
+        {"id": ad_ids[str(a.id)], "name": a.name, "thumbnail_url": a.thumbnail_url, "ad_link": a.ad_link} for a in ads
+    ]
+    for model, rows in ((Campaign, campaign_rows), (Ad, ad_rows)):
+        for i in range(0, len(rows), batch_size):
+            db.execute(update(model), rows[i:i + batch_size])
+    db.commit()
+    return len(campaign_rows) + len(ad_rows)
+
+
+def bench_catalog(campaigns: int, ads_per_campaign: int, repeat: int, batch_size: int = 500) -> Dict[str, Dict[str, float]]:
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    statements = {"count": 0}
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.__setitem__("count", statements["count"] + 1))
+    db = sessionmaker(bind=engine)()
+    user = User(email="catalogo@bench.example.com", name="Catálogo", hashed_password="x")
+    db.add(user)
+    db.flush()
+    account = MetaAdsAccount(account_id="1234567890", name="Conta", access_token="x", user_id=user.id)
+    db.add(account)
+    db.commit()
+    base_campaigns, base_ads = _catalog(campaigns, ads_per_campaign)
+    initial = catalog_sync.sync_catalog(db, account, base_campaigns, base_ads, batch_size)
+    results: Dict[str, Dict[str, float]] = {
+        "catalog_sync.initial": {"median_ms": 0.0, "rows_written": initial.rows_written, "statements": initial.statements},
+    }
+    for fraction in CHANGED_FRACTIONS:
+        for name in ("hash", "rewrite"):
+            rounds = iter(range(1, 1000))
+            last = {}
+
+            def run():
+                round_ = next(rounds)
+                synced_campaigns, synced_ads = _changed(base_campaigns, base_ads, fraction, round_)
+                before = statements["count"]
+                if name == "hash":
+                    report = catalog_sync.sync_catalog(db, account, synced_campaigns, synced_ads, batch_size)
+                    last["rows_written"] = report.rows_written
+                else:
+                    last["rows_written"] = _rewrite(db, account, synced_campaigns, synced_ads, batch_size)
+                last["statements"] = statements["count"] - before
+
+            timing = measure(run, repeat)
+            results[f"catalog_sync.{name}.{fraction:.0%}"] = {**timing, **last}
+    db.close()
+    engine.dispose()
+    return results
+
+
+def run(campaigns: int = 200, ads_per_campaign: int = 50, repeat: int = 5) -> Dict[str, Dict[str, float]]:
+    return bench_catalog(campaigns, ads_per_campaign, repeat)
+
+
+def main() -> None:
+    campaigns = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    ads_per_campaign = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    for name, r in run(campaigns, ads_per_campaign).items():
+        print(
+            f"{name:<28} {r['rows_written']:>7} linhas gravadas   {r['statements']:>5} comandos SQL   "
+            f"mediana {r['median_ms']:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Custo de CPU x bytes economizados na compressão de payloads de campanhas
+
+Mede, para tamanhos típicos de resposta, o tempo de compressão e a razão
+obtida por cada codec disponível (gzip sempre; brotli e zstd se instalados).
+"""
+import sys
+
+from app.core.compression import _BrotliEncoder, _GzipEncoder, _ZstdEncoder, brotli, zstandard
+from app.core.serialization import dumps
+from benchmarks.common import measure, synthetic_campaign_dicts
+
+ROW_COUNTS = (100, 1_000, 10_000)
+
+
+def _codecs() -> dict:
+    codecs = {
+        "gzip-1": lambda: _GzipEncoder(1),
+        "gzip-6": lambda: _GzipEncoder(6),
+        "gzip-9": lambda: _GzipEncoder(9),
+    }
+    if brotli is not None:
+        codecs["br-4"] = lambda: _BrotliEncoder(4)
+        codecs["br-11"] = lambda: _BrotliEncoder(11)
+    if zstandard is not None:
+        codecs["zstd-3"] = lambda: _ZstdEncoder(3)
+        codecs["zstd-9"] = lambda: _ZstdEncoder(9)
+    return codecs
+
+
+def _compress(factory, payload: bytes) -> bytes:
+    encoder = factory()
+    return encoder.compress(payload) + encoder.finish()
+
+
+def run(row_counts=ROW_COUNTS, repeat: int = 5) -> dict:
+    results = {}
+    for n in row_counts:
+        payload = dumps(synthetic_campaign_dicts(n))
+        results[n] = {"raw_bytes": len(payload), "codecs": {}}
+        for name, factory in _codecs().items():
+            compressed = _compress(factory, payload)
+            timing = measure(lambda: _compress(factory, payload), repeat)
+            results[n]["codecs"][name] = {
+                "bytes": len(compressed),
+                "ratio": len(payload) / len(compressed),
+                "median_ms": timing["median_ms"],
+                "mb_per_s": len(payload) / 1e6 / (timing["median_ms"] / 1000),
+            }
+    return results
+
+
+def main() -> None:
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for n, result in run(repeat=repeat).items():
+        print(f"{n} linhas ({result['raw_bytes'] / 1024:.0f} KiB)")
+        for name, r in result["codecs"].items():
+            print(
+                f"  {name:<7} {r['bytes'] / 1024:8.1f} KiB  {r['ratio']:5.1f}x  "
+                f"{r['median_ms']:8.2f} ms  {r['mb_per_s']:7.1f} MB/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Memória por linha e tempo de conversão das respostas das APIs (100k linhas)
+
+Compara a conversão antiga (um dict de 15 chaves por linha) com as linhas
+compactas de app.services.rows, para o Google Ads e o Meta Ads, incluindo a
+serialização final com orjson.
+"""
+import gc
+import sys
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from app.core.serialization import dumps
+from app.services.google_ads_service import _campaign_from_row
+from app.services.meta_ads_service import _campaign_from_insight
+from benchmarks.common import (
+    measure,
+    synthetic_google_campaign_rows,
+    synthetic_meta_campaign_insights,
+)
+
+
+def _legacy_google_campaign(row: Any) -> Dict[str, Any]:
+    # Conversão anterior de GoogleAdsService.get_campaigns, mantida para comparação
+    campaign = row.campaign
+    metrics = row.metrics
+    cost = metrics.cost_micros / 1000000.0
+    cpc = metrics.average_cpc / 1000000.0 if metrics.average_cpc else 0
+    cpa = metrics.cost_per_conversion / 1000000.0 if metrics.cost_per_conversion else 0
+    cpm = metrics.average_cpm / 1000000.0 if metrics.average_cpm else 0
+    roas = 0
+    if metrics.conversions > 0 and cost > 0:
+        roas = (metrics.conversions * 100) / cost
+    return {
+        "id": campaign.id,
+        "name": campaign.name,
+        "status": campaign.status.name,
+        "channel": campaign.advertising_channel_type.name,
+        "start_date": campaign.start_date_time,
+        "end_date": campaign.end_date_time,
+        "impressions": metrics.impressions,
+        "clicks": metrics.clicks,
+        "ctr": metrics.ctr,
+        "conversions": metrics.conversions,
+        "spend": cost,
+        "cpc": cpc,
+        "cpa": cpa,
+        "cpm": cpm,
+        "roas": roas,
+    }
+
+
+def _legacy_meta_campaign(insight: Dict[str, Any], campaign: Dict[str, Any] = {}) -> Dict[str, Any]:
+    # Conversão anterior de MetaAdsService.get_campaigns, mantida para comparação
+    conversions = 0
+    if insight.get("actions"):
+        for action in insight["actions"]:
+            if action["action_type"] == "purchase":
+                conversions = int(action["value"])
+                break
+    roas_value = 0.0
+    if insight.get("purchase_roas"):
+        for roas_item in insight["purchase_roas"]:
+            if roas_item["action_type"] == "omni_purchase":
+                roas_value = float(roas_item["value"])
+                break
+    return {
+        "id": insight["campaign_id"],
+        "name": insight["campaign_name"],
+        "status": campaign.get("status", "UNKNOWN"),
+        "channel": "meta",
+        "start_date": campaign.get("start_time"),
+        "end_date": campaign.get("stop_time"),
+        "impressions": int(insight.get("impressions", 0)),
+        "clicks": int(insight.get("clicks", 0)),
+        "ctr": float(insight.get("ctr", 0.0)),
+        "conversions": conversions,
+        "spend": float(insight.get("spend", 0.0)),
+        "cpc": float(insight.get("cpc", 0.0)),
+        "cpa": float(insight.get("cpp", 0.0)),
+        "cpm": float(insight.get("cpm", 0.0)),
+        "roas": roas_value,
+    }
+
+
+def bytes_per_row(convert: Callable[[Any], Any], source: List[Any]) -> float:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    converted = [convert(item) for item in source]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del converted
+    return (after - before) / len(source)
+
+
+def run(n: int = 100_000, repeat: int = 3) -> dict:
+    sources = {
+        "google": (synthetic_google_campaign_rows(n), _legacy_google_campaign, _campaign_from_row),
+        "meta": (synthetic_meta_campaign_insights(n), _legacy_meta_campaign, _campaign_from_insight),
+    }
+    results = {}
+    for provider, (source, legacy, compact) in sources.items():
+        results[provider] = {}
+        for name, convert in (("dict", legacy), ("rows", compact)):
+            results[provider][name] = {
+                "bytes_per_row": bytes_per_row(convert, source),
+                "convert": measure(lambda: [convert(item) for item in source], repeat),
+                "convert_and_serialize": measure(lambda: dumps([convert(item) for item in source]), repeat),
+            }
+    return results
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    for provider, variants in run(n).items():
+        print(f"{provider} ({n} linhas)")
+        for name, r in variants.items():
+            print(
+                f"  {name:<6} {r['bytes_per_row']:7.0f} B/linha   "
+                f"conversão {r['convert']['median_ms']:8.1f} ms   "
+                f"conversão+JSON {r['convert_and_serialize']['median_ms']:8.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
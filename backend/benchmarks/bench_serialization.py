@@ -0,0 +1,48 @@
+"""
+Microbenchmark da serialização de payloads de campanhas (10k e 100k linhas)
+
+Compara o caminho padrão do FastAPI (validação pelo response_model +
+jsonable_encoder + json.dumps) com a serialização direta via orjson usada
+pelos endpoints de campanhas e anúncios.
+"""
+import json
+import sys
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.core.serialization import dumps
+from app.schemas.metrics import CampaignRow
+from benchmarks.common import measure, synthetic_campaign_dicts
+
+ROW_COUNTS = (10_000, 100_000)
+
+
+def run(row_counts=ROW_COUNTS, repeat: int = 5) -> dict:
+    adapter = TypeAdapter(List[CampaignRow])
+    results = {}
+    for n in row_counts:
+        rows = synthetic_campaign_dicts(n)
+        results[n] = {
+            "fastapi_default": measure(
+                lambda: json.dumps(jsonable_encoder(adapter.validate_python(rows))).encode(), repeat
+            ),
+            "pydantic_dump_json": measure(
+                lambda: adapter.dump_json(adapter.validate_python(rows)), repeat
+            ),
+            "orjson_fast_path": measure(lambda: dumps(rows), repeat),
+        }
+    return results
+
+
+def main() -> None:
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for n, timings in run(repeat=repeat).items():
+        print(f"{n} linhas")
+        for name, t in timings.items():
+            print(f"  {name:<20} mediana {t['median_ms']:9.1f} ms   min {t['min_ms']:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Tempo de import e RSS por worker no boot da aplicação
+
+Cada cenário roda em um processo Python novo, como um worker do gunicorn:
+  eager - importa os SDKs dos provedores antes do app (comportamento anterior)
+  lazy  - importa apenas app.main (SDKs carregados no primeiro uso)
+  warm  - importa app.main e executa o warm-up opcional dos SDKs
+"""
+import json
+import os
+import subprocess
+import sys
+
+SCENARIOS = {
+    "eager": (
+        "import google.ads.googleads.client, google.ads.googleads.errors\n"
+        "import facebook_business.api, facebook_business.adobjects.adaccount\n"
+        "import app.main\n"
+    ),
+    "lazy": "import app.main\n",
+    "warm": (
+        "import app.main\n"
+        "from app.services.warmup import warm_up_provider_sdks\n"
+        "warm_up_provider_sdks()\n"
+    ),
+}
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+try:
+    exec(compile({code!r}, "<scenario>", "exec"))
+    error = None
+except ImportError as e:
+    error = str(e)
+elapsed = time.perf_counter() - start
+rss_kb = 0
+with open("/proc/self/status") as status:
+    for line in status:
+        if line.startswith("VmRSS:"):
+            rss_kb = int(line.split()[1])
+sdk_modules = sum(1 for m in sys.modules if m.startswith(("google.ads", "facebook_business")))
+print(json.dumps({{"import_s": elapsed, "rss_mb": rss_kb / 1024, "sdk_modules": sdk_modules, "error": error}}))
+"""
+
+
+def run_scenario(code: str) -> dict:
+    env = dict(os.environ)
+    env.setdefault("SQLALCHEMY_DATABASE_URI", "sqlite://")
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(code=code)],
+        capture_output=True, text=True, env=env, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(repeat: int = 3) -> dict:
+    results = {}
+    for name, code in SCENARIOS.items():
+        samples = [run_scenario(code) for _ in range(repeat)]
+        results[name] = {
+            "import_s": min(s["import_s"] for s in samples),
+            "rss_mb": min(s["rss_mb"] for s in samples),
+            "sdk_modules": samples[0]["sdk_modules"],
+            "error": samples[0]["error"],
+        }
+    return results
+
+
+def main() -> None:
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    for name, r in run(repeat).items():
+        line = f"  {name:<6} import {r['import_s']:6.2f} s   RSS {r['rss_mb']:7.1f} MB   módulos de SDK {r['sdk_modules']}"
+        if r["error"]:
+            line += f"   (incompleto: {r['error']})"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
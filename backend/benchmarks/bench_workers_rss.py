@@ -0,0 +1,107 @@
+"""
+RSS/PSS total do gunicorn com N workers, com e sem preload_app
+
+Sobe o gunicorn com gunicorn_conf.py, espera todos os workers atenderem e
+soma a memória do master e dos workers a partir de /proc (Linux). PSS divide
+as páginas compartilhadas entre os processos, então é a medida que mostra o
+ganho do copy-on-write; RSS conta as páginas compartilhadas em todos.
+
+Uso: python -m benchmarks.bench_workers_rss [workers]
+"""
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Dict, List
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _children(pid: int) -> List[int]:
+    children = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{task}/children") as f:
+            children.extend(int(child) for child in f.read().split())
+    return children
+
+
+def _memory_kb(pid: int) -> Dict[str, int]:
+    memory = {"rss": 0, "pss": 0}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                memory[key.lower()] = int(rest.split()[0])
+    return memory
+
+
+def measure(workers: int, preload: bool, settle_s: float = 2.0, timeout_s: float = 120.0) -> Dict[str, float]:
+    port = _free_port()
+    env = dict(os.environ)
+    env.update({
+        "GUNICORN_WORKERS": str(workers),
+        "GUNICORN_PRELOAD": "true" if preload else "false",
+        "GUNICORN_BIND": f"127.0.0.1:{port}",
+        "GUNICORN_LOGLEVEL": "warning",
+    })
+    env.setdefault("SQLALCHEMY_DATABASE_URI", "sqlite://")
+    master = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn_conf.py", "app.main:app"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + timeout_s
+        while len(_children(master.pid)) < workers or not _responds(port):
+            if time.monotonic() > deadline:
+                raise RuntimeError("gunicorn não subiu todos os workers a tempo")
+            time.sleep(0.2)
+        # Exercitar cada worker algumas vezes antes de medir
+        for _ in range(workers * 4):
+            _responds(port)
+        time.sleep(settle_s)
+        pids = [master.pid] + _children(master.pid)
+        totals = {"rss": 0, "pss": 0}
+        for pid in pids:
+            memory = _memory_kb(pid)
+            totals["rss"] += memory["rss"]
+            totals["pss"] += memory["pss"]
+        return {
+            "processes": len(pids),
+            "rss_mb": totals["rss"] / 1024,
+            "pss_mb": totals["pss"] / 1024,
+        }
+    finally:
+        master.send_signal(signal.SIGTERM)
+        master.wait(timeout=30)
+
+
+def _responds(port: int) -> bool:
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=2) as response:
+            return response.status == 200
+    except OSError:
+        return False
+
+
+def run(workers: int = 17) -> dict:
+    return {
+        "no_preload": measure(workers, preload=False),
+        "preload_freeze": measure(workers, preload=True),
+    }
+
+
+def main() -> None:
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 17
+    for name, r in run(workers).items():
+        print(f"  {name:<15} {r['processes']:3d} processos   RSS {r['rss_mb']:8.1f} MB   PSS {r['pss_mb']:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Utilitários compartilhados pelos benchmarks (dados sintéticos e medição de tempo)
+
+Executar a partir do diretório backend/, ex.: python -m benchmarks.bench_serialization
+"""
+import random
+import statistics
+import time
+from typing import Any, Callable, Dict, List
+
+
+def synthetic_campaign_dicts(n: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """
+    Gera n linhas de campanha no formato retornado pelos serviços
+    """
+    rnd = random.Random(seed)
+    rows = []
+    for i in range(n):
+        impressions = rnd.randint(0, 1_000_000)
+        clicks = rnd.randint(0, impressions // 10 + 1)
+        spend = rnd.random() * 5000
+        rows.append({
+            "id": 10_000_000 + i,
+            "name": f"Campanha {i} - Performance",
+            "status": rnd.choice(["ENABLED", "PAUSED"]),
+            "channel": rnd.choice(["SEARCH", "DISPLAY", "meta"]),
+            "start_date": "2025-01-01",
+            "end_date": None,
+            "impressions": impressions,
+            "clicks": clicks,
+            "ctr": clicks / impressions if impressions else 0.0,
+            "conversions": rnd.randint(0, 500),
+            "spend": spend,
+            "cpc": spend / clicks if clicks else 0.0,
+            "cpa": rnd.random() * 50,
+            "cpm": rnd.random() * 20,
+            "roas": rnd.random() * 8,
+        })
+    return rows
+
+
+def measure(fn: Callable[[], Any], repeat: int = 5) -> Dict[str, float]:
+    """
+    Executa fn `repeat` vezes e retorna mediana e mínimo em milissegundos
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": statistics.median(timings), "min_ms": min(timings)}
+
+
+def synthetic_google_campaign_rows(n: int, seed: int = 42) -> List[Any]:
+    """
+    Gera n linhas no formato da resposta de GoogleAdsService.search (acesso por atributo)
+    """
+    from types import SimpleNamespace
+
+    rnd = random.Random(seed)
+    rows = []
+    for i in range(n):
+        impressions = rnd.randint(0, 1_000_000)
+        clicks = rnd.randint(0, impressions // 10 + 1)
+        rows.append(SimpleNamespace(
+            campaign=SimpleNamespace(
+                id=10_000_000 + i,
+                name=f"Campanha {i} - Performance",
+                status=SimpleNamespace(name="ENABLED"),
+                advertising_channel_type=SimpleNamespace(name="SEARCH"),
+                start_date_time="2025-01-01 00:00:00",
+                end_date_time="2037-12-30 23:59:59",
+            ),
+            metrics=SimpleNamespace(
+                impressions=impressions,
+                clicks=clicks,
+                ctr=clicks / impressions if impressions else 0.0,
+                conversions=float(rnd.randint(0, 500)),
+                cost_micros=rnd.randint(0, 5_000_000_000),
+                average_cpc=rnd.randint(0, 5_000_000),
+                average_cpm=rnd.randint(0, 20_000_000),
+                cost_per_conversion=rnd.randint(0, 50_000_000),
+            ),
+        ))
+    return rows
+
+
+def synthetic_meta_campaign_insights(n: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """
+    Gera n insights no nível de campanha no formato retornado pela Graph API
+    """
+    rnd = random.Random(seed)
+    insights = []
+    for i in range(n):
+        impressions = rnd.randint(0, 1_000_000)
+        clicks = rnd.randint(0, impressions // 10 + 1)
+        insights.append({
+            "campaign_id": str(23_000_000_000 + i),
+            "campaign_name": f"Campanha {i} - Conversões",
+            "impressions": str(impressions),
+            "clicks": str(clicks),
+            "ctr": str(clicks / impressions * 100 if impressions else 0.0),
+            "spend": f"{rnd.random() * 5000:.2f}",
+            "cpc": f"{rnd.random() * 3:.4f}",
+            "cpm": f"{rnd.random() * 20:.4f}",
+            "cpp": f"{rnd.random() * 40:.4f}",
+            "actions": [
+                {"action_type": "link_click", "value": str(clicks)},
+                {"action_type": "purchase", "value": str(rnd.randint(0, 300))},
+            ],
+            "purchase_roas": [{"action_type": "omni_purchase", "value": f"{rnd.random() * 8:.3f}"}],
+        })
+    return insights
@@ -0,0 +1,98 @@
+"""
+Compara dois resultados de benchmarks/run.py e aponta regressões
+
+Métricas terminadas em _ms e a contagem de erros são melhores quanto menores;
+rps é melhor quanto maior. Uma variação pior que o limite (em %) é regressão,
+e o processo termina com código 1 (para uso em CI). Para tempos, diferenças
+absolutas abaixo de --min-delta-ms são ruído e não contam.
+
+Uso: python -m benchmarks.compare antes.json depois.json [--threshold 10] [--min-delta-ms 1]
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+LOWER_IS_BETTER = ("_ms", "errors")
+HIGHER_IS_BETTER = ("rps",)
+
+
+def _direction(metric: str) -> Optional[int]:
+    """
+    1 se maior é melhor, -1 se menor é melhor, None se a métrica não é comparada
+    (ex.: quantidade de requisições)
+    """
+    if metric.endswith(HIGHER_IS_BETTER):
+        return 1
+    if metric.endswith(LOWER_IS_BETTER):
+        return -1
+    return None
+
+
+def compare(
+    base: Dict[str, Any], new: Dict[str, Any], threshold_pct: float = 10.0, min_delta_ms: float = 1.0
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Retorna (todas as linhas comparadas, regressões)
+    """
+    rows = []
+    for name, base_metrics in base["results"].items():
+        new_metrics = new["results"].get(name)
+        if new_metrics is None:
+            continue
+        for metric, base_value in base_metrics.items():
+            direction = _direction(metric)
+            new_value = new_metrics.get(metric)
+            if direction is None or new_value is None:
+                continue
+            if base_value:
+                change_pct = (new_value - base_value) / base_value * 100
+            else:
+                # Sem base (ex.: zero erros): qualquer piora é regressão
+                change_pct = 0.0 if new_value == base_value else float("inf") if new_value > base_value else float("-inf")
+            rows.append({
+                "name": name,
+                "metric": metric,
+                "base": base_value,
+                "new": new_value,
+                "change_pct": change_pct,
+                "regression": -direction * change_pct > threshold_pct
+                and not (metric.endswith("_ms") and abs(new_value - base_value) < min_delta_ms),
+            })
+    return rows, [row for row in rows if row["regression"]]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0, help="variação máxima tolerada, em %% (padrão: 10)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="diferença mínima, em ms, para tempos (padrão: 1)")
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    print(f"base:  {base['metadata'].get('commit')}  {base['metadata'].get('timestamp')}")
+    print(f"nova:  {new['metadata'].get('commit')}  {new['metadata'].get('timestamp')}")
+    if base["metadata"].get("quick") != new["metadata"].get("quick"):
+        print("Aviso: uma das execuções usou --quick; os volumes não são comparáveis")
+
+    rows, regressions = compare(base, new, args.threshold, args.min_delta_ms)
+    for row in rows:
+        flag = "REGRESSÃO" if row["regression"] else ""
+        print(
+            f"{row['name']:<34} {row['metric']:<10} {row['base']:12.2f} -> {row['new']:12.2f}"
+            f"  {row['change_pct']:+8.1f}%  {flag}"
+        )
+
+    if regressions:
+        print(f"\n{len(regressions)} regressão(ões) acima de {args.threshold:g}%")
+        sys.exit(1)
+    print(f"\nNenhuma regressão acima de {args.threshold:g}%")
+
+
+if __name__ == "__main__":
+    main()
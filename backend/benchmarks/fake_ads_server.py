@@ -0,0 +1,716 @@
+"""
+Servidor fake das APIs do Google Ads (REST) e do Meta (Graph API)
+
+Responde às chamadas usadas por GoogleAdsService e MetaAdsService com contas
+sintéticas determinísticas (mesma semente, mesmos dados), com latência,
+paginação e erros de throttling configuráveis. Permite medir mudanças de
+desempenho sem consumir cota das APIs reais.
+
+Uso:
+    python -m benchmarks.fake_ads_server --port 8100 --campaigns 200 --latency-ms 80
+
+e no backend:
+    GOOGLE_ADS_API_URL=http://127.0.0.1:8100/google-ads
+    META_GRAPH_API_URL=http://127.0.0.1:8100/graph
+
+Endpoints:
+    POST /google-ads/{versão}/customers/{id}/googleAds:search
+    POST /google-ads/{versão}/customers/{id}/googleAds:searchStream
+    GET  /graph/{versão}/act_{id}/insights
+    POST /graph/{versão}/act_{id}/insights           (job assíncrono, AdReportRun)
+    GET  /graph/{versão}/act_{id}/campaigns
+    GET  /graph/{versão}/act_{id}/ads                (total_count no summary)
+    GET  /graph/{versão}/{id_do_job}[/insights]
+    GET  /graph/{versão}/{id_do_criativo}
+    GET  /_stats
+"""
+import argparse
+import asyncio
+import base64
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+@dataclass
+class FakeAdsConfig:
+    seed: int = 42
+    # Tamanho das contas sintéticas
+    campaigns: int = 50
+    ad_groups_per_campaign: int = 4
+    ads_per_ad_group: int = 3
+    # Paginação: a API do Google Ads usa páginas de 10.000 linhas; a Graph API, 25
+    google_page_size: int = 10000
+    meta_page_size: int = 25
+    # Latência por chamada: base + por linha retornada + variação aleatória
+    latency_ms: float = 0.0
+    latency_per_row_ms: float = 0.0
+    jitter_ms: float = 0.0
+    # A cada N chamadas, uma resposta de throttling (0 desativa)
+    throttle_every: int = 0
+    # Duração dos jobs assíncronos de insights (AdReportRun)
+    report_seconds: float = 2.0
+    # Contas clientes de cada conta de administrador (MCC): ids iniciados por 9
+    manager_clients: int = 500
+
+
+_CHANNELS = ("SEARCH", "DISPLAY", "SHOPPING", "VIDEO", "PERFORMANCE_MAX")
+_OBJECTIVES = ("OUTCOME_SALES", "OUTCOME_TRAFFIC", "OUTCOME_LEADS", "OUTCOME_AWARENESS")
+
+
+def _metrics(rnd: random.Random) -> Dict[str, Any]:
+    impressions = rnd.randint(0, 2_000_000)
+    clicks = rnd.randint(0, impressions // 20 + 1)
+    conversions = rnd.randint(0, clicks // 10 + 1)
+    cost_micros = rnd.randint(0, 20_000) * 1_000_000
+    return {
+        "impressions": impressions,
+        "clicks": clicks,
+        "conversions": conversions,
+        "cost_micros": cost_micros,
+        "ctr": clicks / impressions if impressions else 0.0,
+    }
+
+
+class SyntheticAccount:
+    """
+    Campanhas, grupos de anúncios e anúncios de uma conta, gerados a partir
+    da semente e do id da conta
+    """
+
+    def __init__(self, account_id: str, config: FakeAdsConfig):
+        self.seed = config.seed
+        rnd = random.Random(f"{config.seed}:{account_id}")
+        base = int(re.sub(r"\D", "", account_id) or 0) % 10_000 * 1_000_000
+        self.clients: List[Dict[str, Any]] = []
+        if account_id.startswith("9"):
+            self.clients.append({"id": account_id, "name": f"MCC {account_id}", "manager": True, "level": 0})
+            for i in range(config.manager_clients):
+                # A cada 50 contas, uma sub-MCC; as 9 seguintes ficam abaixo dela
+                self.clients.append({
+                    "id": f"{account_id}{i:04d}",
+                    "name": f"Cliente {i:04d}",
+                    "manager": i % 50 == 0,
+                    "level": 2 if 0 < i % 50 < 10 else 1,
+                })
+        self.campaigns: List[Dict[str, Any]] = []
+        self.ad_groups: List[Dict[str, Any]] = []
+        self.ads: List[Dict[str, Any]] = []
+        for c in range(config.campaigns):
+            campaign_id = base + c + 1
+            self.campaigns.append({
+                "id": campaign_id,
+                "name": f"Campanha {c + 1:04d} - {rnd.choice(_CHANNELS).title()}",
+                "status": rnd.choice(("ENABLED", "ENABLED", "ENABLED", "PAUSED")),
+                "channel": rnd.choice(_CHANNELS),
+                "objective": rnd.choice(_OBJECTIVES),
+                "start": f"2025-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+                "metrics": _metrics(rnd),
+            })
+            for g in range(config.ad_groups_per_campaign):
+                ad_group_id = campaign_id * 100 + g + 1
+                self.ad_groups.append({
+                    "id": ad_group_id,
+                    "campaign_id": campaign_id,
+                    "name": f"Grupo {g + 1:02d} da campanha {c + 1:04d}",
+                    "status": rnd.choice(("ENABLED", "ENABLED", "PAUSED")),
+                    "metrics": _metrics(rnd),
+                })
+                for a in range(config.ads_per_ad_group):
+                    ad_id = ad_group_id * 100 + a + 1
+                    self.ads.append({
+                        "id": ad_id,
+                        "ad_group_id": ad_group_id,
+                        "campaign_id": campaign_id,
+                        "name": f"Anúncio {a + 1:02d} do grupo {ad_group_id}",
+                        "status": rnd.choice(("ENABLED", "ENABLED", "PAUSED")),
+                        "final_url": f"https://loja.example.com/produto/{ad_id}",
+                        "image_url": f"https://cdn.example.com/criativos/{ad_id}.jpg",
+                        "metrics": _metrics(rnd),
+                    })
+
+
+def _day_metrics(seed: int, entity_id: Any, day: str) -> Dict[str, Any]:
+    """
+    Métricas de um dia de uma entidade: determinísticas por semente, id e data
+    """
+    rnd = random.Random(f"{seed}:{entity_id}:{day}")
+    impressions = rnd.randint(0, 70_000)
+    clicks = rnd.randint(0, impressions // 20 + 1)
+    conversions = rnd.randint(0, clicks // 10 + 1)
+    return {
+        "impressions": impressions,
+        "clicks": clicks,
+        "conversions": conversions,
+        "cost_micros": rnd.randint(0, 700) * 1_000_000,
+        "ctr": clicks / impressions if impressions else 0.0,
+    }
+
+
+def _days(since: str, until: str) -> List[str]:
+    start, end = date.fromisoformat(since), date.fromisoformat(until)
+    return [(start + timedelta(days=i)).isoformat() for i in range((end - start).days + 1)]
+
+
+class FakeAdsState:
+    def __init__(self, config: FakeAdsConfig):
+        self.config = config
+        self.stats: Counter = Counter()
+        self._counter = itertools.count(1)
+        self._rnd = random.Random(config.seed)
+        self._lock = threading.Lock()
+        self.account = lru_cache(maxsize=1024)(lambda account_id: SyntheticAccount(account_id, config))
+        # Jobs assíncronos de insights: id -> conta, parâmetros e início
+        self.report_runs: Dict[str, Dict[str, Any]] = {}
+        self._report_ids = itertools.count(1)
+
+    def create_report_run(self, account_id: str, params: Dict[str, str]) -> str:
+        # Ids numéricos como os do Meta, fora da faixa dos criativos
+        report_id = str(9_000_000_000_000 + next(self._report_ids))
+        self.report_runs[report_id] = {"account_id": account_id, "params": params, "started": time.monotonic()}
+        return report_id
+
+    def report_progress(self, report_id: str) -> int:
+        run = self.report_runs[report_id]
+        if self.config.report_seconds <= 0:
+            return 100
+        return min(100, int((time.monotonic() - run["started"]) / self.config.report_seconds * 100))
+
+    def should_throttle(self) -> bool:
+        every = self.config.throttle_every
+        return every > 0 and next(self._counter) % every == 0
+
+    async def delay(self, rows: int) -> None:
+        config = self.config
+        with self._lock:
+            jitter = self._rnd.uniform(0, config.jitter_ms) if config.jitter_ms else 0.0
+        seconds = (config.latency_ms + rows * config.latency_per_row_ms + jitter) / 1000
+        if seconds > 0:
+            await asyncio.sleep(seconds)
+
+
+def _page_token(offset: int) -> str:
+    return base64.urlsafe_b64encode(str(offset).encode()).decode()
+
+
+def _offset(token: Optional[str]) -> int:
+    if not token:
+        return 0
+    try:
+        return int(base64.urlsafe_b64decode(token.encode()).decode())
+    except ValueError:
+        return 0
+
+
+def _page(items: List[Any], offset: int, size: int) -> Tuple[List[Any], Optional[int]]:
+    page = items[offset:offset + size]
+    next_offset = offset + size if offset + size < len(items) else None
+    return page, next_offset
+
+
+# Google Ads (formato JSON da API REST, campos em camelCase)
+
+def _google_metrics(metrics: Dict[str, Any]) -> Dict[str, Any]:
+    clicks, conversions = metrics["clicks"], metrics["conversions"]
+    cost = metrics["cost_micros"]
+    return {
+        "impressions": str(metrics["impressions"]),
+        "clicks": str(clicks),
+        "ctr": metrics["ctr"],
+        "conversions": float(conversions),
+        "costMicros": str(cost),
+        "averageCpc": cost / clicks if clicks else 0.0,
+        "averageCpm": cost / metrics["impressions"] * 1000 if metrics["impressions"] else 0.0,
+        "costPerConversion": cost / conversions if conversions else 0.0,
+    }
+
+
+def _google_rows(account: SyntheticAccount, customer_id: str, query: str) -> List[Dict[str, Any]]:
+    resource = re.search(r"\bFROM\s+(\w+)", query, re.IGNORECASE)
+    resource = resource.group(1).lower() if resource else ""
+    # Com segments.date, uma linha por entidade e dia
+    date_range = re.search(r"segments\.date\s+BETWEEN\s+'([\d-]+)'\s+AND\s+'([\d-]+)'", query, re.IGNORECASE)
+    days = _days(*date_range.groups()) if date_range else [None]
+
+    def with_metrics(row: Dict[str, Any], entity_id: Any, metrics: Dict[str, Any]) -> List[Dict[str, Any]]:
+        if days == [None]:
+            return [{**row, "metrics": _google_metrics(metrics)}]
+        return [
+            {**row, "segments": {"date": day}, "metrics": _google_metrics(_day_metrics(account.seed, entity_id, day))}
+            for day in days
+        ]
+
+    rows: List[Dict[str, Any]] = []
+    if resource == "campaign":
+        for c in sorted(account.campaigns, key=lambda c: c["name"]):
+            rows.extend(with_metrics({
+                "campaign": {
+                    "resourceName": f"customers/{customer_id}/campaigns/{c['id']}",
+                    "id": str(c["id"]),
+                    "name": c["name"],
+                    "status": c["status"],
+                    "advertisingChannelType": c["channel"],
+                    "startDateTime": f"{c['start']} 00:00:00",
+                    "endDateTime": "2037-12-30 23:59:59",
+                },
+            }, c["id"], c["metrics"]))
+    elif resource == "customer_client":
+        for client in account.clients:
+            rows.append({
+                "customerClient": {
+                    "resourceName": f"customers/{customer_id}/customerClients/{client['id']}",
+                    "id": client["id"],
+                    "descriptiveName": client["name"],
+                    "manager": client["manager"],
+                    "level": str(client["level"]),
+                    "status": "ENABLED",
+                    "currencyCode": "BRL",
+                },
+            })
+    elif resource == "ad_group":
+        campaign_filter = re.search(r"ad_group\.campaign\.id\s*=\s*(\d+)", query)
+        for g in account.ad_groups:
+            if campaign_filter is None or g["campaign_id"] == int(campaign_filter.group(1)):
+                rows.extend(with_metrics({
+                    "adGroup": {
+                        "resourceName": f"customers/{customer_id}/adGroups/{g['id']}",
+                        "id": str(g["id"]),
+                        "name": g["name"],
+                        "status": g["status"],
+                    },
+                }, g["id"], g["metrics"]))
+    elif resource == "ad_group_ad":
+        ad_group_filter = re.search(r"ad_group_ad\.ad_group\.id\s*=\s*(\d+)", query)
+        campaign_filter = re.search(r"\bcampaign\.id\s*=\s*(\d+)", query)
+        ad_group_names = {g["id"]: g["name"] for g in account.ad_groups}
+        for a in account.ads:
+            if ad_group_filter is not None and a["ad_group_id"] != int(ad_group_filter.group(1)):
+                continue
+            if campaign_filter is not None and a["campaign_id"] != int(campaign_filter.group(1)):
+                continue
+            rows.extend(with_metrics({
+                "campaign": {"id": str(a["campaign_id"])},
+                "adGroup": {"name": ad_group_names[a["ad_group_id"]]},
+                "adGroupAd": {
+                    "resourceName": f"customers/{customer_id}/adGroupAds/{a['ad_group_id']}~{a['id']}",
+                    "status": a["status"],
+                    "ad": {
+                        "id": str(a["id"]),
+                        "name": a["name"],
+                        "finalUrls": [a["final_url"]],
+                        "imageAd": {"imageUrl": a["image_url"]},
+                    },
+                },
+            }, a["id"], a["metrics"]))
+    return rows
+
+
+def _google_throttle_response(version: str) -> JSONResponse:
+    return JSONResponse(
+        {
+            "error": {
+                "code": 429,
+                "message": "Resource has been exhausted (e.g. check quota).",
+                "status": "RESOURCE_EXHAUSTED",
+                "details": [{
+                    "@type": f"type.googleapis.com/google.ads.googleads.{version}.errors.GoogleAdsFailure",
+                    "errors": [{
+                        "errorCode": {"quotaError": "RESOURCE_EXHAUSTED"},
+                        "message": "Too many requests. Retry in 1 seconds.",
+                    }],
+                    "requestId": "fake-throttle",
+                }],
+            }
+        },
+        status_code=429,
+    )
+
+
+# Graph API (Meta)
+
+def _meta_actions(metrics: Dict[str, Any]) -> List[Dict[str, str]]:
+    return [
+        {"action_type": "link_click", "value": str(metrics["clicks"])},
+        {"action_type": "purchase", "value": str(metrics["conversions"])},
+    ]
+
+
+def _meta_status(entity: Dict[str, Any]) -> str:
+    return "ACTIVE" if entity["status"] == "ENABLED" else "PAUSED"
+
+
+def _meta_campaign(campaign: Dict[str, Any]) -> Dict[str, Any]:
+    # Campanha na aresta /campaigns
+    return {
+        "id": str(campaign["id"]),
+        "name": campaign["name"],
+        "status": _meta_status(campaign),
+        "effective_status": _meta_status(campaign),
+        "objective": campaign["objective"],
+        "start_time": f"{campaign['start']}T00:00:00-0300",
+    }
+
+
+def _meta_ad(ad: Dict[str, Any]) -> Dict[str, Any]:
+    # Anúncio na aresta /ads
+    return {
+        "id": str(ad["id"]),
+        "name": ad["name"],
+        "status": _meta_status(ad),
+        "effective_status": _meta_status(ad),
+        "campaign_id": str(ad["campaign_id"]),
+        "adset_id": str(ad["ad_group_id"]),
+        "creative": _meta_creative(ad["id"]),
+    }
+
+
+def _meta_creative(ad_id: int) -> Dict[str, Any]:
+    # Criativo do anúncio, com id gerado como id do anúncio + 1
+    return {
+        "id": str(ad_id + 1),
+        "name": f"Criativo do anúncio {ad_id}",
+        "thumbnail_url": f"https://cdn.example.com/criativos/{ad_id}_thumb.jpg",
+        "image_url": f"https://cdn.example.com/criativos/{ad_id}.jpg",
+        "object_story_spec": {"link_data": {"link": f"https://loja.example.com/produto/{ad_id}"}},
+    }
+
+
+def _meta_campaign_insight(campaign: Dict[str, Any]) -> Dict[str, Any]:
+    metrics = campaign["metrics"]
+    spend = metrics["cost_micros"] / 1_000_000
+    return {
+        "campaign_id": str(campaign["id"]),
+        "campaign_name": campaign["name"],
+        "objective": campaign["objective"],
+        "impressions": str(metrics["impressions"]),
+        "clicks": str(metrics["clicks"]),
+        "ctr": str(metrics["ctr"] * 100),
+        "spend": f"{spend:.2f}",
+        "cpc": f"{spend / metrics['clicks']:.4f}" if metrics["clicks"] else "0",
+        "cpm": f"{spend / metrics['impressions'] * 1000:.4f}" if metrics["impressions"] else "0",
+        "cpp": f"{spend / metrics['conversions']:.4f}" if metrics["conversions"] else "0",
+        "actions": _meta_actions(metrics),
+        "purchase_roas": [{"action_type": "omni_purchase", "value": f"{metrics['conversions'] * 100 / spend:.3f}" if spend else "0"}],
+        "date_start": "2025-01-01",
+        "date_stop": "2025-01-30",
+    }
+
+
+def _meta_ad_insight(ad: Dict[str, Any]) -> Dict[str, Any]:
+    metrics = ad["metrics"]
+    return {
+        "ad_id": str(ad["id"]),
+        "ad_name": ad["name"],
+        "campaign_id": str(ad["campaign_id"]),
+        "adset_id": str(ad["ad_group_id"]),
+        "impressions": str(metrics["impressions"]),
+        "clicks": str(metrics["clicks"]),
+        "ctr": str(metrics["ctr"] * 100),
+        "spend": f"{metrics['cost_micros'] / 1_000_000:.2f}",
+        "actions": _meta_actions(metrics),
+        "date_start": "2025-01-01",
+        "date_stop": "2025-01-30",
+    }
+
+
+def _meta_throttle_response() -> JSONResponse:
+    return JSONResponse(
+        {
+            "error": {
+                "message": "(#17) User request limit reached",
+                "type": "OAuthException",
+                "is_transient": True,
+                "code": 17,
+                "fbtrace_id": "fake-throttle",
+            }
+        },
+        status_code=400,
+    )
+
+
+def _json_param(value: Optional[str]) -> List[Any]:
+    # O SDK envia listas (fields, filtering) codificadas em JSON
+    if not value:
+        return []
+    try:
+        parsed = json.loads(value)
+    except ValueError:
+        return _field_list(value)
+    return parsed if isinstance(parsed, list) else []
+
+
+def _field_list(value: str) -> List[str]:
+    # Separa "id,creative{id,thumbnail_url}" nas vírgulas fora das chaves
+    fields: List[str] = []
+    depth = start = 0
+    for i, char in enumerate(value):
+        if char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+        elif char == "," and depth == 0:
+            fields.append(value[start:i])
+            start = i + 1
+    fields.append(value[start:])
+    return [field for field in fields if field]
+
+
+# Campos de AdsInsights conhecidos pelo servidor fake (a Graph API aceita
+# mais, mas nenhum campo de Campaign ou Ad como id, status ou creative)
+_INSIGHTS_FIELDS = {
+    "account_id", "campaign_id", "campaign_name", "adset_id", "adset_name", "ad_id", "ad_name", "objective",
+    "impressions", "clicks", "ctr", "spend", "cpc", "cpm", "cpp", "actions", "purchase_roas",
+    "date_start", "date_stop",
+}
+
+
+class GraphAPIError(Exception):
+    def __init__(self, message: str, code: int = 100):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+
+
+def _graph_error_response(error: GraphAPIError) -> JSONResponse:
+    return JSONResponse(
+        {"error": {"message": error.message, "type": "OAuthException", "code": error.code, "fbtrace_id": "fake"}},
+        status_code=400,
+    )
+
+
+def _select_fields(record: Dict[str, Any], fields: Optional[str], allowed: Optional[set] = None) -> Dict[str, Any]:
+    """
+    Campos pedidos do registro. Com allowed, um campo fora dele é rejeitado
+    como na Graph API: erro (#100) com status 400.
+
+    Objetos aninhados (ex.: creative) trazem só o id, ou os subcampos pedidos
+    com a expansão de campos da Graph API: creative{thumbnail_url,image_url}
+    """
+    wanted: Dict[str, Optional[str]] = {}
+    for field in _field_list(fields or ""):
+        name, _, subfields = field.partition("{")
+        wanted[name] = subfields[:-1] or None
+    if allowed is not None:
+        invalid = sorted(set(wanted) - allowed)
+        if invalid:
+            raise GraphAPIError(f"(#100) {', '.join(invalid)} are not valid for fields param")
+    if not fields:
+        return record
+    # Como na Graph API, o período do insight sempre vem na resposta
+    wanted.setdefault("date_start", None)
+    wanted.setdefault("date_stop", None)
+    return {
+        # Como na Graph API, o id do objeto aninhado sempre vem
+        key: _select_fields(value, f"id,{wanted[key] or ''}") if isinstance(value, dict) and "id" in value else value
+        for key, value in record.items()
+        if key in wanted
+    }
+
+
+def _edge_response(request: Request, records: List[Dict[str, Any]], size: int, **extra: Any) -> JSONResponse:
+    """
+    Página de uma aresta (/campaigns, /ads), com os campos pedidos
+    """
+    page, next_offset = _page(records, _offset(request.query_params.get("after")), size)
+    fields = ",".join(_json_param(request.query_params.get("fields"))) or None
+    response: Dict[str, Any] = {
+        "data": [_select_fields(record, fields) for record in page],
+        "paging": {"cursors": {"before": _page_token(0), "after": _page_token(next_offset or len(records))}},
+        **extra,
+    }
+    if next_offset is not None:
+        response["paging"]["next"] = str(request.url.include_query_params(after=_page_token(next_offset)))
+    return JSONResponse(response)
+
+
+def create_app(config: FakeAdsConfig) -> FastAPI:
+    state = FakeAdsState(config)
+    app = FastAPI(title="Fake Ads APIs", openapi_url=None)
+
+    @app.exception_handler(GraphAPIError)
+    async def graph_api_error(request: Request, error: GraphAPIError):
+        return _graph_error_response(error)
+
+    @app.get("/_stats")
+    def read_stats() -> Dict[str, Any]:
+        return {"config": asdict(config), "requests": dict(state.stats)}
+
+    async def google_search(version: str, customer_id: str, request: Request, stream: bool):
+        state.stats["google_ads.search_stream" if stream else "google_ads.search"] += 1
+        if state.should_throttle():
+            state.stats["google_ads.throttled"] += 1
+            await state.delay(0)
+            return _google_throttle_response(version)
+        body = await request.json()
+        rows = _google_rows(state.account(customer_id), customer_id, body.get("query", ""))
+        if stream:
+            await state.delay(len(rows))
+            size = config.google_page_size
+            batches = [{"results": rows[i:i + size]} for i in range(0, len(rows), size)] or [{"results": []}]
+            return JSONResponse(batches)
+        page, next_offset = _page(rows, _offset(body.get("pageToken")), config.google_page_size)
+        await state.delay(len(page))
+        response: Dict[str, Any] = {"results": page}
+        if next_offset is not None:
+            response["nextPageToken"] = _page_token(next_offset)
+        return JSONResponse(response)
+
+    @app.post("/google-ads/{version}/customers/{customer_id}/googleAds:search")
+    async def search(version: str, customer_id: str, request: Request):
+        return await google_search(version, customer_id, request, stream=False)
+
+    @app.post("/google-ads/{version}/customers/{customer_id}/googleAds:searchStream")
+    async def search_stream(version: str, customer_id: str, request: Request):
+        return await google_search(version, customer_id, request, stream=True)
+
+    def insight_records(account_id: str, params: Any) -> List[Dict[str, Any]]:
+        synthetic = state.account(account_id)
+        if params.get("level") == "ad":
+            entities, to_insight = synthetic.ads, _meta_ad_insight
+            for condition in _json_param(params.get("filtering")):
+                if condition.get("field") == "ad.campaign_id":
+                    entities = [ad for ad in entities if str(ad["campaign_id"]) == str(condition.get("value"))]
+        else:
+            entities, to_insight = synthetic.campaigns, _meta_campaign_insight
+        time_range = params.get("time_range")
+        if not time_range or str(params.get("time_increment")) != "1":
+            return [to_insight(entity) for entity in entities]
+        # time_increment=1: uma linha por entidade e dia
+        time_range = json.loads(time_range) if isinstance(time_range, str) else time_range
+        records = []
+        for day in _days(time_range["since"], time_range["until"]):
+            for entity in entities:
+                record = to_insight({**entity, "metrics": _day_metrics(synthetic.seed, entity["id"], day)})
+                records.append({**record, "date_start": day, "date_stop": day})
+        return records
+
+    @app.get("/graph/{version}/{node}/insights")
+    async def insights(version: str, node: str, request: Request):
+        state.stats["meta_ads.insights"] += 1
+        if state.should_throttle():
+            state.stats["meta_ads.throttled"] += 1
+            await state.delay(0)
+            return _meta_throttle_response()
+        params = request.query_params
+        run = state.report_runs.get(node)
+        if run is not None:
+            # Resultado de um job: nível, filtros e campos vêm da criação do job
+            if state.report_progress(node) < 100:
+                return JSONResponse({"error": {"message": "Report not ready", "code": 2601}}, status_code=400)
+            state.stats["meta_ads.report_result"] += 1
+            records = insight_records(run["account_id"], run["params"])
+            fields = ",".join(_json_param(run["params"].get("fields"))) or None
+        else:
+            records = insight_records(node.removeprefix("act_"), params)
+            fields = params.get("fields")
+        size = int(params.get("limit") or config.meta_page_size)
+        page, next_offset = _page(records, _offset(params.get("after")), size)
+        await state.delay(len(page))
+        response: Dict[str, Any] = {
+            "data": [_select_fields(record, fields, _INSIGHTS_FIELDS) for record in page],
+            "paging": {"cursors": {"before": _page_token(0), "after": _page_token(next_offset or len(records))}},
+        }
+        if next_offset is not None:
+            response["paging"]["next"] = str(request.url.include_query_params(after=_page_token(next_offset)))
+        return JSONResponse(response)
+
+    @app.post("/graph/{version}/{account}/insights")
+    async def create_report_run(version: str, account: str, request: Request):
+        state.stats["meta_ads.report_create"] += 1
+        if state.should_throttle():
+            state.stats["meta_ads.throttled"] += 1
+            await state.delay(0)
+            return _meta_throttle_response()
+        await state.delay(0)
+        params = dict(await request.form())
+        # Campos inválidos são rejeitados já na criação do job
+        _select_fields({}, ",".join(_json_param(params.get("fields"))) or None, _INSIGHTS_FIELDS)
+        return JSONResponse({"report_run_id": state.create_report_run(account.removeprefix("act_"), params)})
+
+    @app.get("/graph/{version}/{account}/campaigns")
+    async def campaigns(version: str, account: str, request: Request):
+        state.stats["meta_ads.campaigns"] += 1
+        if state.should_throttle():
+            state.stats["meta_ads.throttled"] += 1
+            await state.delay(0)
+            return _meta_throttle_response()
+        records = [_meta_campaign(campaign) for campaign in state.account(account.removeprefix("act_")).campaigns]
+        size = int(request.query_params.get("limit") or config.meta_page_size)
+        await state.delay(min(size, len(records)))
+        return _edge_response(request, records, size)
+
+    @app.get("/graph/{version}/{account}/ads")
+    async def ads(version: str, account: str, request: Request):
+        state.stats["meta_ads.ads"] += 1
+        if state.should_throttle():
+            state.stats["meta_ads.throttled"] += 1
+            await state.delay(0)
+            return _meta_throttle_response()
+        records = state.account(account.removeprefix("act_")).ads
+        for condition in _json_param(request.query_params.get("filtering")):
+            if condition.get("field") == "campaign.id":
+                records = [ad for ad in records if str(ad["campaign_id"]) == str(condition.get("value"))]
+        size = int(request.query_params.get("limit") or config.meta_page_size)
+        await state.delay(min(size, len(records)))
+        return _edge_response(request, [_meta_ad(ad) for ad in records], size, summary={"total_count": len(records)})
+
+    @app.get("/graph/{version}/{object_id}")
+    async def read_object(version: str, object_id: str, request: Request):
+        run = state.report_runs.get(object_id)
+        if run is not None:
+            state.stats["meta_ads.report_status"] += 1
+            await state.delay(0)
+            progress = state.report_progress(object_id)
+            report = {
+                "id": object_id,
+                "account_id": run["account_id"],
+                "async_status": "Job Completed" if progress == 100 else "Job Running",
+                "async_percent_completion": progress,
+            }
+            time_range = run["params"].get("time_range")
+            if time_range:
+                time_range = json.loads(time_range) if isinstance(time_range, str) else time_range
+                report.update(date_start=time_range["since"], date_stop=time_range["until"])
+            return JSONResponse(_select_fields(report, request.query_params.get("fields")))
+        # Demais objetos: criativos, com ids gerados como id do anúncio + 1
+        if not object_id.isdigit():
+            return JSONResponse({"error": {"message": "Unsupported get request", "code": 100}}, status_code=400)
+        state.stats["meta_ads.creative"] += 1
+        if state.should_throttle():
+            state.stats["meta_ads.throttled"] += 1
+            await state.delay(0)
+            return _meta_throttle_response()
+        await state.delay(1)
+        return JSONResponse(_select_fields(_meta_creative(int(object_id) - 1), request.query_params.get("fields")))
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    defaults = FakeAdsConfig()
+    for name, value in asdict(defaults).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=value)
+    args = vars(parser.parse_args())
+    host, port = args.pop("host"), args.pop("port")
+
+    import uvicorn
+
+    uvicorn.run(create_app(FakeAdsConfig(**args)), host=host, port=port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""
+Testes de carga HTTP contra o backend com as APIs de anúncios simuladas
+
+Sobe o servidor fake (benchmarks/fake_ads_server.py) e o backend (gunicorn
+com gunicorn_conf.py) como subprocessos, com um banco SQLite temporário
+populado com usuários e contas, e executa os cenários:
+
+- dashboard_page_load: cada usuário abre o dashboard (campanhas do Google e
+  do Meta em paralelo, depois os anúncios da primeira campanha de cada)
+- login_storm: muitos logins simultâneos (custo do hash da senha)
+- agency_fanout: um usuário de agência busca as campanhas de todas as suas
+  contas ao mesmo tempo
+- mcc_fanout: campanhas de todas as contas clientes de uma conta de
+  administrador (MCC), numa única requisição
+
+As latências (p50/p95/p99/máx.) são da unidade de trabalho de cada cenário:
+a página, o login ou o fan-out inteiro.
+
+Uso: python -m benchmarks.load [--quick]
+"""
+import asyncio
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Tuple
+
+PASSWORD = "senha-de-carga"
+
+
+@dataclass
+class LoadConfig:
+    workers: int = 4
+    # Usuários do dashboard, cada um com uma conta Google e uma Meta
+    users: int = 20
+    rounds: int = 5
+    logins: int = 200
+    login_concurrency: int = 50
+    agency_accounts: int = 30
+    agency_rounds: int = 5
+    mcc_clients: int = 200
+    mcc_rounds: int = 3
+    # Contas sintéticas e latência do servidor fake
+    campaigns: int = 20
+    ad_groups_per_campaign: int = 2
+    ads_per_ad_group: int = 2
+    latency_ms: float = 30.0
+    latency_per_row_ms: float = 0.01
+    jitter_ms: float = 10.0
+    # 0 desativa o cache do dashboard: toda requisição vai às APIs (fake)
+    cache_ttl_seconds: int = 0
+
+
+QUICK = LoadConfig(
+    workers=2, users=5, rounds=2, logins=40, login_concurrency=20, agency_accounts=10, agency_rounds=2,
+    mcc_clients=50, mcc_rounds=2
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_ready(url: str, process: subprocess.Popen, timeout_s: float = 120.0) -> None:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Processo encerrado antes de responder em {url}")
+        try:
+            with urllib.request.urlopen(url, timeout=2):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} não respondeu a tempo")
+
+
+@contextmanager
+def _process(args: List[str], env: Dict[str, str], ready_url: str) -> Iterator[None]:
+    process = subprocess.Popen(args, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _wait_until_ready(ready_url, process)
+        yield
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def _seed_database(database_uri: str, config: LoadConfig) -> Dict[str, Any]:
+    """
+    Cria as tabelas e os usuários/contas dos cenários. Usa um engine próprio:
+    o app.db.session deste processo pode apontar para outro banco
+    """
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+
+    from app.core.security import get_password_hash
+    from app.models import Base, GoogleAdsAccount, MetaAdsAccount, User
+
+    engine = create_engine(database_uri)
+    Base.metadata.create_all(engine)
+    hashed_password = get_password_hash(PASSWORD)
+    with Session(engine) as db:
+        users = []
+        for i in range(config.users):
+            user = User(email=f"usuario{i}@carga.example.com", name=f"Usuário {i}", hashed_password=hashed_password)
+            user.google_ads_accounts = [GoogleAdsAccount(account_id=f"{1000 + i}", name=f"Google {i}", refresh_token="fake")]
+            user.meta_ads_accounts = [MetaAdsAccount(account_id=f"{1000 + i}", name=f"Meta {i}", access_token="fake")]
+            users.append(user)
+        agency = User(email="agencia@carga.example.com", name="Agência", hashed_password=hashed_password)
+        agency.google_ads_accounts = [
+            GoogleAdsAccount(account_id=f"{5000 + i}", name=f"Cliente {i}", refresh_token="fake")
+            for i in range(config.agency_accounts)
+        ]
+        # Contas iniciadas por 9 são MCCs no servidor fake
+        mcc = User(email="mcc@carga.example.com", name="MCC", hashed_password=hashed_password)
+        mcc.google_ads_accounts = [GoogleAdsAccount(account_id="9000", name="MCC", refresh_token="fake")]
+        db.add_all(users + [agency, mcc])
+        db.flush()
+        seeded = {
+            "users": [
+                (user.email, user.google_ads_accounts[0].id, user.meta_ads_accounts[0].id) for user in users
+            ],
+            "agency": (agency.email, [account.id for account in agency.google_ads_accounts]),
+            "mcc": (mcc.email, mcc.google_ads_accounts[0].id),
+        }
+        db.commit()
+    engine.dispose()
+    return seeded
+
+
+def _summary(durations: List[float], errors: int, requests: int, elapsed: float) -> Dict[str, float]:
+    ordered = sorted(durations) or [0.0]
+
+    def percentile(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    return {
+        "requests": requests,
+        "errors": errors,
+        "rps": requests / elapsed if elapsed else 0.0,
+        "p50_ms": statistics.median(ordered),
+        "p95_ms": percentile(95),
+        "p99_ms": percentile(99),
+        "max_ms": ordered[-1],
+    }
+
+
+class _Recorder:
+    """
+    Conta requisições e erros e mede a duração de cada unidade de trabalho
+    """
+
+    def __init__(self, client: Any):
+        self.client = client
+        self.requests = 0
+        self.errors = 0
+        self.durations: List[float] = []
+        self.started = time.perf_counter()
+
+    def reset(self) -> None:
+        """
+        Descarta o que foi feito na preparação do cenário (ex.: logins)
+        """
+        self.requests = self.errors = 0
+        self.durations.clear()
+        self.started = time.perf_counter()
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> Any:
+        self.requests += 1
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except Exception:
+            self.errors += 1
+            return None
+        if response.status_code >= 400:
+            self.errors += 1
+            return None
+        return response
+
+    async def timed(self, unit: Callable[[], Awaitable[Any]]) -> None:
+        start = time.perf_counter()
+        await unit()
+        self.durations.append((time.perf_counter() - start) * 1000)
+
+
+async def _login(recorder: _Recorder, api: str, email: str) -> Dict[str, str]:
+    response = await recorder.request(
+        "POST", f"{api}/auth/login", data={"username": email, "password": PASSWORD}
+    )
+    token = response.json()["access_token"] if response is not None else ""
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def _first_id(recorder: _Recorder, url: str, headers: Dict[str, str]) -> Any:
+    response = await recorder.request("GET", url, headers=headers)
+    rows = response.json() if response is not None else []
+    return rows[0]["id"] if rows else None
+
+
+async def _dashboard_page_load(client: Any, api: str, seeded: Dict[str, Any], config: LoadConfig) -> _Recorder:
+    recorder = _Recorder(client)
+    sessions = [
+        (await _login(recorder, api, email), google_id, meta_id)
+        for email, google_id, meta_id in seeded["users"]
+    ]
+    recorder.reset()
+
+    async def page(headers: Dict[str, str], google_id: int, meta_id: int) -> None:
+        google_campaign, meta_campaign = await asyncio.gather(
+            _first_id(recorder, f"{api}/google-ads/campaigns/{google_id}", headers),
+            _first_id(recorder, f"{api}/meta-ads/campaigns/{meta_id}", headers),
+        )
+        drill_down = []
+        if google_campaign is not None:
+            drill_down.append(recorder.request("GET", f"{api}/google-ads/ads/{google_id}/{google_campaign}", headers=headers))
+        if meta_campaign is not None:
+            drill_down.append(recorder.request("GET", f"{api}/meta-ads/ads/{meta_id}/{meta_campaign}", headers=headers))
+        await asyncio.gather(*drill_down)
+
+    async def user(session: Tuple[Dict[str, str], int, int]) -> None:
+        for _ in range(config.rounds):
+            await recorder.timed(lambda: page(*session))
+
+    await asyncio.gather(*(user(session) for session in sessions))
+    return recorder
+
+
+async def _login_storm(client: Any, api: str, seeded: Dict[str, Any], config: LoadConfig) -> _Recorder:
+    recorder = _Recorder(client)
+    emails = [email for email, _, _ in seeded["users"]]
+    semaphore = asyncio.Semaphore(config.login_concurrency)
+
+    async def login(i: int) -> None:
+        async with semaphore:
+            await recorder.timed(lambda: _login(recorder, api, emails[i % len(emails)]))
+
+    await asyncio.gather(*(login(i) for i in range(config.logins)))
+    return recorder
+
+
+async def _agency_fanout(client: Any, api: str, seeded: Dict[str, Any], config: LoadConfig) -> _Recorder:
+    recorder = _Recorder(client)
+    email, account_ids = seeded["agency"]
+    headers = await _login(recorder, api, email)
+    recorder.reset()
+
+    async def fanout() -> None:
+        await asyncio.gather(*(
+            recorder.request("GET", f"{api}/google-ads/campaigns/{account_id}", headers=headers)
+            for account_id in account_ids
+        ))
+
+    for _ in range(config.agency_rounds):
+        await recorder.timed(fanout)
+    return recorder
+
+
+async def _mcc_fanout(client: Any, api: str, seeded: Dict[str, Any], config: LoadConfig) -> _Recorder:
+    recorder = _Recorder(client)
+    email, account_id = seeded["mcc"]
+    headers = await _login(recorder, api, email)
+    recorder.reset()
+    for _ in range(config.mcc_rounds):
+        await recorder.timed(lambda: recorder.request("GET", f"{api}/google-ads/clients/{account_id}/campaigns", headers=headers))
+    return recorder
+
+
+SCENARIOS = {
+    "dashboard_page_load": _dashboard_page_load,
+    "login_storm": _login_storm,
+    "agency_fanout": _agency_fanout,
+    "mcc_fanout": _mcc_fanout,
+}
+
+
+async def _run_scenarios(base_url: str, seeded: Dict[str, Any], config: LoadConfig) -> Dict[str, Dict[str, float]]:
+    import httpx
+
+    from app.core.config import settings
+
+    api = f"{base_url}{settings.API_V1_STR}"
+    limits = httpx.Limits(max_connections=200, max_keepalive_connections=200)
+    results = {}
+    async with httpx.AsyncClient(limits=limits, timeout=120) as client:
+        for name, scenario in SCENARIOS.items():
+            recorder = await scenario(client, api, seeded, config)
+            elapsed = time.perf_counter() - recorder.started
+            results[f"load.{name}"] = _summary(recorder.durations, recorder.errors, recorder.requests, elapsed)
+    return results
+
+
+def run(config: LoadConfig = LoadConfig()) -> Dict[str, Dict[str, float]]:
+    fake_port, app_port = _free_port(), _free_port()
+    with tempfile.TemporaryDirectory(prefix="dashboard-load-") as directory:
+        database_uri = f"sqlite:///{os.path.join(directory, 'load.db')}"
+        seeded = _seed_database(database_uri, config)
+
+        fake_args = [
+            sys.executable, "-m", "benchmarks.fake_ads_server", "--port", str(fake_port),
+            "--campaigns", str(config.campaigns),
+            "--ad-groups-per-campaign", str(config.ad_groups_per_campaign),
+            "--ads-per-ad-group", str(config.ads_per_ad_group),
+            "--latency-ms", str(config.latency_ms),
+            "--latency-per-row-ms", str(config.latency_per_row_ms),
+            "--jitter-ms", str(config.jitter_ms),
+            "--manager-clients", str(config.mcc_clients),
+        ]
+        env = dict(os.environ)
+        env.update({
+            "SQLALCHEMY_DATABASE_URI": database_uri,
+            "GOOGLE_ADS_API_URL": f"http://127.0.0.1:{fake_port}/google-ads",
+            "META_GRAPH_API_URL": f"http://127.0.0.1:{fake_port}/graph",
+            "DASHBOARD_CACHE_TTL_SECONDS": str(config.cache_ttl_seconds),
+            "GUNICORN_WORKERS": str(config.workers),
+            "GUNICORN_BIND": f"127.0.0.1:{app_port}",
+            "GUNICORN_LOGLEVEL": "warning",
+            "PROMETHEUS_MULTIPROC_DIR": os.path.join(directory, "prometheus"),
+        })
+        app_args = [sys.executable, "-m", "gunicorn", "-c", "gunicorn_conf.py", "app.main:app"]
+        with _process(fake_args, env, f"http://127.0.0.1:{fake_port}/_stats"), \
+                _process(app_args, env, f"http://127.0.0.1:{app_port}/"):
+            return asyncio.run(_run_scenarios(f"http://127.0.0.1:{app_port}", seeded, config))
+
+
+def main() -> None:
+    config = QUICK if "--quick" in sys.argv[1:] else LoadConfig()
+    print(f"Configuração: {asdict(config)}")
+    for name, r in run(config).items():
+        print(
+            f"{name:<26} {r['requests']:6d} req  {r['errors']:4d} erros  {r['rps']:8.1f} req/s   "
+            f"p50 {r['p50_ms']:8.1f}  p95 {r['p95_ms']:8.1f}  p99 {r['p99_ms']:8.1f}  máx {r['max_ms']:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
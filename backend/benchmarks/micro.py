@@ -0,0 +1,145 @@
+"""
+Microbenchmarks dos caminhos quentes por requisição
+
+- conversão das linhas em GoogleAdsService.get_campaigns / get_ads (linhas
+  proto-plus reais, geradas pelo servidor fake e lidas com from_json)
+- conversão dos insights em MetaAdsService.get_campaigns / get_ads (objetos
+  AdsInsights do SDK, como retornados pelo Cursor)
+- validação do JWT em auth.get_current_user (apenas jwt.decode e a
+  dependência completa, com a consulta do usuário em SQLite em memória)
+- serialização das linhas com orjson
+
+Uso: python -m benchmarks.micro [repetições]
+"""
+import json
+import sys
+from typing import Any, Callable, Dict, List, Tuple
+
+from benchmarks.common import measure
+from benchmarks.fake_ads_server import (
+    FakeAdsConfig,
+    SyntheticAccount,
+    _google_rows,
+    _meta_ad_insight,
+    _meta_campaign_insight,
+)
+
+ROWS = 10_000
+
+
+def _accounts(rows: int) -> Tuple[SyntheticAccount, SyntheticAccount]:
+    """
+    Uma conta com `rows` campanhas e outra com `rows` anúncios
+    (10 por campanha)
+    """
+    campaigns = SyntheticAccount("1234567890", FakeAdsConfig(campaigns=rows, ad_groups_per_campaign=0))
+    ads = SyntheticAccount("1234567890", FakeAdsConfig(campaigns=rows // 10, ad_groups_per_campaign=2, ads_per_ad_group=5))
+    return campaigns, ads
+
+
+def _google_cases(rows: int) -> Dict[str, Callable[[], Any]]:
+    from importlib import import_module
+
+    from google.ads.googleads.client import _DEFAULT_VERSION
+
+    from app.services.google_ads_service import _ad_from_row, _campaign_from_row
+
+    response_type = import_module(
+        f"google.ads.googleads.{_DEFAULT_VERSION}.services.types.google_ads_service"
+    ).SearchGoogleAdsResponse
+    campaigns_account, ads_account = _accounts(rows)
+
+    def parse(account: SyntheticAccount, query: str) -> List[Any]:
+        body = json.dumps({"results": _google_rows(account, "1234567890", query)})
+        return list(response_type.from_json(body).results)
+
+    campaign_rows = parse(campaigns_account, "SELECT campaign.id FROM campaign")
+    ad_rows = parse(ads_account, "SELECT ad_group_ad.ad.id FROM ad_group_ad")
+    return {
+        "google.campaigns.convert": lambda: [_campaign_from_row(row) for row in campaign_rows],
+        "google.ads.convert": lambda: [_ad_from_row(row) for row in ad_rows],
+    }
+
+
+def _meta_cases(rows: int) -> Dict[str, Callable[[], Any]]:
+    from app.services import meta_ads_service
+    from app.services.meta_ads_service import _ad_from_insight, _campaign_from_insight
+
+    meta_ads_service.load_sdk()
+    from facebook_business.adobjects.objectparser import ObjectParser
+
+    parser = ObjectParser(target_class=meta_ads_service.AdsInsights)
+    campaigns_account, ads_account = _accounts(rows)
+    campaign_insights = parser.parse_multiple({"data": [_meta_campaign_insight(c) for c in campaigns_account.campaigns]})
+    ad_insights = parser.parse_multiple({"data": [_meta_ad_insight(a) for a in ads_account.ads]})
+    return {
+        "meta.campaigns.convert": lambda: [_campaign_from_insight(insight) for insight in campaign_insights],
+        "meta.ads.convert": lambda: [_ad_from_insight(insight, {}, None, None) for insight in ad_insights],
+    }
+
+
+def _auth_cases(tokens: int = 1000) -> Dict[str, Callable[[], Any]]:
+    from jose import jwt
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    from app.core.config import settings
+    from app.core.security import ALGORITHM, create_access_token
+    from app.models import Base, User
+    from app.routes.auth import get_current_user
+
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.add(User(email="bench@example.com", name="Bench", hashed_password="x", is_active=True))
+    db.commit()
+    token = create_access_token("bench@example.com")
+
+    def get_current_user_loop():
+        for _ in range(tokens):
+            get_current_user(db=db, token=token)
+            # Cada requisição usa uma sessão nova: sem cache do usuário no identity map
+            db.expunge_all()
+
+    return {
+        f"auth.jwt_decode.x{tokens}": lambda: [
+            jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM]) for _ in range(tokens)
+        ],
+        f"auth.get_current_user.x{tokens}": get_current_user_loop,
+    }
+
+
+def _serialization_cases(rows: int) -> Dict[str, Callable[[], Any]]:
+    from app.core.serialization import dumps
+    from app.services.rows import CampaignData
+    from benchmarks.common import synthetic_campaign_dicts
+
+    dicts = synthetic_campaign_dicts(rows)
+    dataclasses = [CampaignData(*row.values()) for row in dicts]
+    return {
+        "serialization.campaign_dicts": lambda: dumps(dicts),
+        "serialization.campaign_rows": lambda: dumps(dataclasses),
+    }
+
+
+def run(repeat: int = 5, rows: int = ROWS) -> Dict[str, Dict[str, float]]:
+    cases: Dict[str, Callable[[], Any]] = {}
+    for factory in (_google_cases, _meta_cases, _serialization_cases):
+        cases.update(factory(rows))
+    cases.update(_auth_cases())
+    results = {}
+    for name, fn in cases.items():
+        fn()  # aquecimento
+        results[name] = measure(fn, repeat)
+    return results
+
+
+def main() -> None:
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for name, result in run(repeat).items():
+        print(f"{name:<34} mediana {result['median_ms']:9.2f} ms   mínimo {result['min_ms']:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
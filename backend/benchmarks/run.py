@@ -0,0 +1,90 @@
+"""
+Executa os microbenchmarks e/ou os testes de carga e grava o resultado em JSON
+
+O arquivo tem os metadados da execução (commit, data, Python, máquina) e os
+resultados achatados por nome ("google.campaigns.convert",
+"load.login_storm", ...), no formato lido por benchmarks/compare.py.
+
+Uso:
+    python -m benchmarks.run --suite all
+    python -m benchmarks.run --suite micro --quick --output /tmp/antes.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from dataclasses import asdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{commit}-dirty" if dirty.strip() else commit
+
+
+def _metadata(suite: str, quick: bool) -> Dict[str, Any]:
+    return {
+        "suite": suite,
+        "quick": quick,
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def run(suite: str = "all", quick: bool = False) -> Dict[str, Any]:
+    report: Dict[str, Any] = {"metadata": _metadata(suite, quick), "results": {}}
+    if suite in ("micro", "all"):
+        from benchmarks import micro
+
+        repeat, rows = (3, 1_000) if quick else (7, micro.ROWS)
+        report["metadata"]["micro"] = {"repeat": repeat, "rows": rows}
+        report["results"].update(micro.run(repeat, rows))
+    if suite in ("load", "all"):
+        from benchmarks import load
+
+        config = load.QUICK if quick else load.LoadConfig()
+        report["metadata"]["load"] = asdict(config)
+        report["results"].update(load.run(config))
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--suite", choices=("micro", "load", "all"), default="all")
+    parser.add_argument("--quick", action="store_true", help="volumes reduzidos, para validar rapidamente")
+    parser.add_argument("--output", help="arquivo JSON de saída (padrão: benchmarks/results/<data>-<commit>.json)")
+    args = parser.parse_args()
+
+    report = run(args.suite, args.quick)
+    output = args.output
+    if not output:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{report['metadata']['commit'] or 'sem-commit'}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+    for name, metrics in report["results"].items():
+        values = "  ".join(f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}" for key, value in metrics.items())
+        print(f"{name:<34} {values}")
+    print(f"Resultados gravados em {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
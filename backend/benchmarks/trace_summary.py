@@ -0,0 +1,68 @@
+"""
+Resumo dos spans gravados pelo tracing (TRACING_EXPORTER=jsonl)
+
+Agrupa os spans das chamadas aos provedores por operação e conta/cliente e
+mostra latência (p50/p95/máx), linhas, páginas, bytes e throttles, para
+identificar as contas e consultas que dominam a latência e comparar
+execuções antes e depois de mudanças nas consultas.
+
+Uso: python -m benchmarks.trace_summary [arquivo.jsonl]
+"""
+import json
+import sys
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+from app.core.config import settings
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run(path: str) -> List[Dict[str, Any]]:
+    groups: Dict[Tuple[str, str], Dict[str, Any]] = defaultdict(
+        lambda: {"durations": [], "rows": 0, "pages": 0, "bytes": 0, "throttles": 0, "errors": 0}
+    )
+    with open(path, "rb") as f:
+        for line in f:
+            span = json.loads(line)
+            attributes = span["attributes"]
+            if "http.method" in attributes or span["name"].endswith(".page"):
+                # Requisições e páginas: o resumo é por consulta
+                continue
+            target = str(attributes.get("customer_id") or attributes.get("account_id") or attributes.get("creative_id") or "-")
+            group = groups[(span["name"], target)]
+            group["durations"].append(span["duration_ms"])
+            for key in ("rows", "pages", "bytes", "throttles"):
+                group[key] += attributes.get(key) or 0
+            group["errors"] += span["error"] is not None
+
+    summary = []
+    for (name, target), group in groups.items():
+        durations = group.pop("durations")
+        summary.append({
+            "operation": name,
+            "target": target,
+            "calls": len(durations),
+            "total_ms": round(sum(durations), 1),
+            "p50_ms": round(_percentile(durations, 0.5), 1),
+            "p95_ms": round(_percentile(durations, 0.95), 1),
+            "max_ms": round(max(durations), 1),
+            **group,
+        })
+    summary.sort(key=lambda item: item["total_ms"], reverse=True)
+    return summary
+
+
+def main() -> None:
+    path = sys.argv[1] if len(sys.argv) > 1 else settings.TRACING_FILE
+    columns = ["operation", "target", "calls", "total_ms", "p50_ms", "p95_ms", "max_ms", "rows", "pages", "bytes", "throttles", "errors"]
+    print("\t".join(columns))
+    for item in run(path):
+        print("\t".join(str(item[column]) for column in columns))
+
+
+if __name__ == "__main__":
+    main()
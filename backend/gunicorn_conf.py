@@ -1,9 +1,88 @@
+import gc
 import multiprocessing
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
 
 # Configurações do Gunicorn para produção
-bind = "0.0.0.0:8000"
-workers = multiprocessing.cpu_count() * 2 + 1
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = _env_int("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1)
 worker_class = "uvicorn.workers.UvicornWorker"
-loglevel = "info"
+loglevel = os.getenv("GUNICORN_LOGLEVEL", "info")
 accesslog = "-"
 errorlog = "-"
+
+# Reciclagem de workers (0 desativa)
+max_requests = _env_int("GUNICORN_MAX_REQUESTS", 0)
+max_requests_jitter = _env_int("GUNICORN_MAX_REQUESTS_JITTER", 0)
+timeout = _env_int("GUNICORN_TIMEOUT", 30)
+graceful_timeout = _env_int("GUNICORN_GRACEFUL_TIMEOUT", 30)
+
+# Carregar o app no master antes do fork: os workers compartilham (copy-on-write)
+# o código e os módulos já importados em vez de cada um importar tudo de novo
+preload_app = _env_bool("GUNICORN_PRELOAD", True)
+
+# Heartbeat dos workers em memória, evitando bloqueios de I/O em disco
+worker_tmp_dir = os.getenv("GUNICORN_WORKER_TMP_DIR", "/dev/shm" if os.path.isdir("/dev/shm") else None)
+
+
+# Métricas de workers de execuções anteriores não devem ser somadas. A limpeza
+# acontece ao carregar este arquivo, antes do preload do app: no on_starting o
+# master já teria criado os arquivos das próprias métricas
+_metrics_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+if _metrics_dir:
+    os.makedirs(_metrics_dir, exist_ok=True)
+    for _name in os.listdir(_metrics_dir):
+        if _name.endswith(".db"):
+            os.remove(os.path.join(_metrics_dir, _name))
+
+
+def when_ready(server):
+    if not server.cfg.preload_app:
+        return
+    from app.core.config import settings
+
+    if settings.PROVIDER_SDK_WARMUP:
+        # Importar os SDKs no master para que as páginas fiquem compartilhadas
+        from app.services.warmup import warm_up_provider_sdks
+
+        warm_up_provider_sdks()
+    # Mover os objetos do master para a geração permanente: o GC dos workers
+    # deixa de visitá-los e não suja (copia) as páginas compartilhadas
+    gc.collect()
+    gc.freeze()
+
+
+def pre_fork(server, worker):
+    if server.cfg.preload_app:
+        # Inclui objetos criados desde o último fork (ex.: workers reciclados)
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    if not server.cfg.preload_app:
+        return
+    # Recursos que não podem ser compartilhados entre processos são recriados
+    # em cada worker: conexões do pool do banco e caches por processo
+    from app.core.lifecycle import reset_after_fork
+
+    reset_after_fork()
+
+
+def child_exit(server, worker):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        # Remove os gauges "live" do worker que saiu
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,52 @@
+import os
+
+# O app cria o engine ao ser importado: sem banco configurado, usar SQLite em memória
+os.environ.setdefault("SQLALCHEMY_DATABASE_URI", "sqlite://")
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.models import Base  # noqa: E402
+from app.routes import auth  # noqa: E402
+
+
+@pytest.fixture
+def engine():
+    # Um único banco em memória compartilhado pelas threads do TestClient
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine):
+    return sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client(session_factory):
+    """
+    TestClient do app com get_db no banco em memória
+    """
+    def get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[auth.get_db] = get_db
+    yield TestClient(app)
+    app.dependency_overrides.clear()
@@ -0,0 +1,90 @@
+"""
+Número de consultas de GET /campaigns/tree e lazy="raise" na árvore
+campanha → anúncio → métricas
+"""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import InvalidRequestError
+
+from app.main import app
+from app.models.models import Ad, AdMetric, Campaign, CampaignMetric, GoogleAdsAccount, User
+from app.routes import auth
+
+DAYS = [datetime(2026, 1, day) for day in range(1, 8)]
+
+
+@pytest.fixture
+def query_counter(engine):
+    counter = {"count": 0}
+
+    def count(*args):
+        counter["count"] += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    yield counter
+    event.remove(engine, "before_cursor_execute", count)
+
+
+def _seed(db, campaigns: int, ads_per_campaign: int) -> User:
+    user = User(email="arvore@teste.example.com", name="Árvore", hashed_password="x", is_active=True)
+    db.add(user)
+    db.flush()
+    account = GoogleAdsAccount(account_id="1234567890", name="Conta", refresh_token="x", user_id=user.id)
+    db.add(account)
+    db.flush()
+    for c in range(campaigns):
+        campaign = Campaign(
+            campaign_id=str(100 + c), name=f"Campanha {c}", status="active", channel="google",
+            user_id=user.id, google_ads_account_id=account.id,
+        )
+        db.add(campaign)
+        db.flush()
+        db.add_all(
+            CampaignMetric(campaign_id=campaign.id, date=day, impressions=1000, clicks=10, conversions=1, spend=5.0, roas=2.0)
+            for day in DAYS
+        )
+        for a in range(ads_per_campaign):
+            ad = Ad(ad_id=f"{c}-{a}", name=f"Anúncio {a}", campaign_id=campaign.id)
+            db.add(ad)
+            db.flush()
+            db.add_all(
+                AdMetric(ad_id=ad.id, date=day, impressions=100, clicks=1, conversions=0, spend=0.5, roas=1.0)
+                for day in DAYS
+            )
+    db.commit()
+    db.refresh(user)
+    db.expunge(user)
+    return user
+
+
+@pytest.mark.parametrize("campaigns,ads_per_campaign", [(2, 2), (40, 15)])
+def test_tree_query_count_does_not_grow_with_tree(client, session_factory, query_counter, campaigns, ads_per_campaign):
+    with session_factory() as db:
+        user = _seed(db, campaigns, ads_per_campaign)
+    app.dependency_overrides[auth.get_current_user] = lambda: user
+
+    query_counter["count"] = 0
+    response = client.get("/api/v1/campaigns/tree", params={"start_date": "2026-01-01", "end_date": "2026-01-07"})
+
+    assert response.status_code == 200
+    tree = response.json()["campaigns"]
+    assert len(tree) == campaigns
+    assert sum(len(campaign["ads"]) for campaign in tree) == campaigns * ads_per_campaign
+    assert tree[0]["impressions"] == 1000 * len(DAYS)
+    assert tree[0]["ads"][0]["impressions"] == 100 * len(DAYS)
+    # Campanhas com as contas, anúncios e métricas agrupadas
+    assert query_counter["count"] == 3
+
+
+def test_tree_relationships_raise_without_loader_options(session_factory):
+    with session_factory() as db:
+        _seed(db, 1, 1)
+    with session_factory() as db:
+        campaign = db.query(Campaign).first()
+        with pytest.raises(InvalidRequestError):
+            campaign.ads
+        ad = db.query(Ad).first()
+        with pytest.raises(InvalidRequestError):
+            ad.metrics
@@ -0,0 +1,59 @@
+"""
+Renovação das URLs assinadas de miniatura no catálogo (app/services/catalog_sync.py)
+"""
+import time
+
+import pytest
+
+from app.models.models import Ad, MetaAdsAccount, User
+from app.services import catalog_sync
+from app.services.rows import AdData, CampaignData
+
+
+@pytest.fixture
+def account(db):
+    user = User(email="catalogo@test.example.com", name="Catálogo", hashed_password="x")
+    db.add(user)
+    db.flush()
+    account = MetaAdsAccount(account_id="1234567890", name="Conta", access_token="x", user_id=user.id)
+    db.add(account)
+    db.commit()
+    return account
+
+
+def _thumbnail(expires_at: float, signature: str) -> str:
+    return f"https://scontent.xx.fbcdn.net/v/t45/123_n.jpg?oh={signature}&oe={int(expires_at):X}"
+
+
+def _sync(db, account, thumbnail_url: str):
+    campaigns = [CampaignData("100", "Campanha", "ACTIVE", "meta", None, None, 0, 0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)]
+    ads = [AdData("200", "Anúncio", "ACTIVE", 0, 0, 0.0, 0.0, 0.0, thumbnail_url=thumbnail_url, campaign_id="100")]
+    return catalog_sync.sync_catalog(db, account, campaigns, ads)
+
+
+def test_thumbnail_expires_at():
+    assert catalog_sync.thumbnail_expires_at(_thumbnail(0x6700A1B2, "a")) == 0x6700A1B2
+    assert catalog_sync.thumbnail_expires_at("https://cdn.example.com/1.jpg?oh=a") is None
+    assert catalog_sync.thumbnail_expires_at("https://cdn.example.com/1.jpg?oe=zz") is None
+    assert catalog_sync.thumbnail_expires_at(None) is None
+
+
+def test_valid_signed_thumbnail_is_not_rewritten(db, account):
+    now = time.time()
+    stored = _thumbnail(now + 7 * 24 * 3600, "a")
+    _sync(db, account, stored)
+    report = _sync(db, account, _thumbnail(now + 8 * 24 * 3600, "b"))
+    assert report.rows_written == 0
+    assert db.query(Ad.thumbnail_url).scalar() == stored
+
+
+@pytest.mark.parametrize("expires_in", [-3600, catalog_sync.THUMBNAIL_EXPIRY_MARGIN // 2])
+def test_expiring_signed_thumbnail_is_refreshed(db, account, expires_in):
+    now = time.time()
+    _sync(db, account, _thumbnail(now + expires_in, "a"))
+    fresh = _thumbnail(now + 7 * 24 * 3600, "b")
+    report = _sync(db, account, fresh)
+    assert report.thumbnails_refreshed == 1
+    assert report.ads_updated == 0
+    assert report.rows_written == 1
+    assert db.query(Ad.thumbnail_url).scalar() == fresh
@@ -0,0 +1,44 @@
+"""
+POST /dashboard/sync com uma sincronização do usuário já em andamento
+"""
+import pytest
+
+from app.main import app
+from app.models.models import User
+from app.routes import auth, dashboard
+
+
+@pytest.fixture
+def user(session_factory):
+    with session_factory() as db:
+        user = User(email="sync@teste.example.com", name="Sync", hashed_password="x", is_active=True)
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        db.expunge(user)
+    return user
+
+
+@pytest.fixture
+def client(client, session_factory, user, monkeypatch):
+    monkeypatch.setattr(dashboard, "SessionLocal", session_factory)
+    app.dependency_overrides[auth.get_current_user] = lambda: user
+    return client
+
+
+def test_sync_is_skipped_while_one_is_running(client, user, monkeypatch):
+    synced = []
+    monkeypatch.setattr(dashboard.sync_service, "sync_user_accounts", lambda db, user_id: synced.append(user_id))
+
+    monkeypatch.setattr(dashboard, "_syncing_users", {user.id})
+    response = client.post("/api/v1/dashboard/sync")
+    assert response.status_code == 202
+    assert response.json() == {"accounts": 0, "already_running": True}
+    assert synced == []
+
+    dashboard._syncing_users.clear()
+    response = client.post("/api/v1/dashboard/sync")
+    assert response.json() == {"accounts": 0, "already_running": False}
+    assert synced == [user.id]
+    # Terminada a sincronização, o usuário pode sincronizar de novo
+    assert dashboard._syncing_users == set()
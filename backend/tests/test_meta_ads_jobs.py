@@ -0,0 +1,97 @@
+"""
+Jobs assíncronos de anúncios do Meta com período (app/routes/meta_ads.py)
+"""
+from datetime import date, timedelta
+
+import pytest
+
+from app.main import app
+from app.models.models import CachedDailyMetric, MetaAdsAccount, User
+from app.routes import auth, meta_ads
+from app.services.meta_ads_service import ReportPending, ReportRunStatus
+from app.services.rows import DailyMetricRow
+
+START = date(2026, 1, 1)
+END = date(2026, 1, 3)
+DAYS = [START + timedelta(days=i) for i in range((END - START).days + 1)]
+JOB_ID = "9000000000001"
+
+
+class FakeMetaAdsService:
+    """
+    Conta grande: as métricas diárias sempre vão para um job assíncrono
+    """
+
+    def __init__(self, account_id: str):
+        self.account_id = account_id
+        self.calls = []
+
+    def get_ad_daily_metrics(self, ad_account_id, campaign_id, start_date, end_date, wait_seconds=None):
+        self.calls.append(("daily", start_date, end_date))
+        raise ReportPending(ReportRunStatus(JOB_ID, self.account_id, "Job Running", 40, start_date, end_date))
+
+    def report_status(self, report_id):
+        return ReportRunStatus(report_id, self.account_id, "Job Completed", 100, START, END)
+
+    def get_report_ad_daily_metrics(self, status, campaign_id):
+        self.calls.append(("report", status.id))
+        return [
+            DailyMetricRow(ad_id, day, 100, 2, 1, 5.0, 10.0, {"name": f"Anúncio {ad_id}", "status": "ACTIVE", "campaign_id": "300"})
+            for day in DAYS
+            for ad_id in ("1", "2")
+        ]
+
+    def get_report_ads(self, status):
+        raise AssertionError("job diário lido como job sem período")
+
+
+@pytest.fixture
+def account(session_factory):
+    with session_factory() as db:
+        user = User(email="jobs@teste.example.com", name="Jobs", hashed_password="x", is_active=True)
+        db.add(user)
+        db.flush()
+        account = MetaAdsAccount(account_id="555000111", name="Conta", access_token="x", user_id=user.id)
+        db.add(account)
+        db.commit()
+        db.refresh(user)
+        db.refresh(account)
+        db.expunge_all()
+    app.dependency_overrides[auth.get_current_user] = lambda: user
+    return account
+
+
+@pytest.fixture
+def service(monkeypatch, account):
+    service = FakeMetaAdsService(account.account_id)
+    monkeypatch.setattr(meta_ads, "get_meta_ads_service", lambda *args: service)
+    return service
+
+
+def test_daily_job_result_is_cached_and_summed_per_ad(client, session_factory, account, service):
+    params = {"start_date": START.isoformat(), "end_date": END.isoformat()}
+    response = client.get(f"/api/v1/meta-ads/ads/{account.id}", params=params)
+    assert response.status_code == 202
+    poll_url = response.json()["poll_url"]
+    assert f"/jobs/{JOB_ID}?start_date=2026-01-01&end_date=2026-01-03" in poll_url
+
+    response = client.get(poll_url)
+    assert response.status_code == 200
+    ads = response.json()
+    assert [ad["id"] for ad in ads] == ["1", "2"]
+    assert all(ad["impressions"] == 100 * len(DAYS) and ad["spend"] == 5.0 * len(DAYS) for ad in ads)
+    with session_factory() as db:
+        assert db.query(CachedDailyMetric).count() == 2 * len(DAYS)
+
+    # O período agora sai do cache diário, sem novo job
+    calls = list(service.calls)
+    response = client.get(f"/api/v1/meta-ads/ads/{account.id}", params=params)
+    assert response.status_code == 200
+    assert response.json() == ads
+    assert service.calls == calls
+
+
+def test_daily_job_outside_requested_range_is_rejected(client, account, service):
+    params = {"start_date": "2026-01-02", "end_date": END.isoformat()}
+    response = client.get(f"/api/v1/meta-ads/ads/{account.id}/jobs/{JOB_ID}", params=params)
+    assert response.status_code == 400
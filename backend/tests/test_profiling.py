@@ -0,0 +1,49 @@
+"""
+Perfil por requisição (app/core/profiling.py)
+"""
+import threading
+import time
+
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.profiling import ProfiledRoute, ProfileStore, ProfilingMiddleware
+
+
+def slow_endpoint_work():
+    time.sleep(0.1)
+
+
+def other_request_work(stop: threading.Event):
+    while not stop.is_set():
+        time.sleep(0.001)
+
+
+def test_profile_has_only_the_request_threads(tmp_path):
+    router = APIRouter(route_class=ProfiledRoute)
+
+    @router.get("/slow")
+    def slow():
+        slow_endpoint_work()
+        return {}
+
+    app = FastAPI()
+    app.include_router(router)
+    store = ProfileStore(str(tmp_path))
+    app.add_middleware(ProfilingMiddleware, authorize=lambda token: True, store=store, interval_seconds=0.002)
+
+    # Outra "requisição" ocupando uma thread do processo
+    stop = threading.Event()
+    other = threading.Thread(target=other_request_work, args=(stop,))
+    other.start()
+    try:
+        response = TestClient(app).get("/slow", headers={"X-Profile": "collapsed", "Authorization": "Bearer x"})
+    finally:
+        stop.set()
+        other.join()
+
+    path, _ = store.find(response.headers["X-Profile-Id"])
+    with open(path) as f:
+        profile = f.read()
+    assert "slow_endpoint_work" in profile
+    assert "other_request_work" not in profile
@@ -0,0 +1,78 @@
+"""
+Leitura após escrita entre workers pelo cookie last_write (app/db/routing.py)
+"""
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.pool import StaticPool
+
+from app.db.routing import READ_YOUR_WRITES_COOKIE, ReadYourWritesMiddleware, ReplicaSet, RoutingSession, use_replica
+from app.models import Base
+from app.models.models import User
+
+
+def _engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture
+def client():
+    writer, replica = _engine(), _engine()
+
+    class Session(RoutingSession):
+        pass
+
+    Session.writer = writer
+    Session.replicas = ReplicaSet([replica], max_lag_seconds=5.0, check_interval_seconds=60.0)
+
+    def get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware, window_seconds=10.0)
+
+    @app.post("/users")
+    def create_user(email: str, cache: bool = False, db=Depends(get_db)):
+        statement = insert(User).values(email=email, name="Leitura", hashed_password="x")
+        if cache:
+            statement = statement.execution_options(read_your_writes=False)
+        db.execute(statement)
+        db.commit()
+
+    @app.get("/bind")
+    def read_bind(db=Depends(get_db)):
+        return {"replica": use_replica(db).get_bind() is replica}
+
+    yield TestClient(app)
+    writer.dispose()
+    replica.dispose()
+
+
+def test_reads_after_a_write_go_to_the_primary(client):
+    assert client.get("/bind").json() == {"replica": True}
+
+    response = client.post("/users", params={"email": "escrita@teste.example.com"})
+    assert READ_YOUR_WRITES_COOKIE in response.cookies
+    # O cookie vale para qualquer worker que atender a próxima requisição
+    assert client.get("/bind").json() == {"replica": False}
+
+    client.cookies.clear()
+    assert client.get("/bind").json() == {"replica": True}
+
+
+def test_cache_writes_keep_reads_on_the_replica(client):
+    response = client.post("/users", params={"email": "cache@teste.example.com", "cache": True})
+    assert READ_YOUR_WRITES_COOKIE not in response.cookies
+    assert client.get("/bind").json() == {"replica": True}
+
+
+def test_expired_cookie_reads_from_the_replica(client):
+    client.cookies.set(READ_YOUR_WRITES_COOKIE, "1.0")
+    assert client.get("/bind").json() == {"replica": True}
@@ -0,0 +1,29 @@
+"""
+Serialização das linhas compactas (app/core/serialization.py e app/services/rows.py)
+"""
+from datetime import date
+from decimal import Decimal
+
+import orjson
+
+from app.core.serialization import dumps
+from app.services.rows import CampaignData, ClientCampaignsData, DailyMetricRow
+
+
+def _campaign(id: str) -> CampaignData:
+    return CampaignData(id, "Campanha", "ACTIVE", "meta", None, None, 10, 2, 0.2, 1, 5.0, 2.5, 5.0, 500.0, 3.0)
+
+
+def test_rows_serialize_like_orjson_dataclasses():
+    rows = [
+        [_campaign("1"), _campaign("2")],
+        [DailyMetricRow("1", date(2026, 1, 2), 10, 2, 1, 5.0, 15.0, {"cpc": Decimal("2.5")})],
+        {"clients": [ClientCampaignsData(1, "Cliente", [_campaign("3")], None)]},
+    ]
+    for data in rows:
+        assert dumps(data) == orjson.dumps(data, default=str)
+
+
+def test_rows_serialize_like_dicts():
+    campaign = _campaign("1")
+    assert orjson.loads(dumps([campaign])) == [campaign.__dict__]
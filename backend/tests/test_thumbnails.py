@@ -0,0 +1,161 @@
+"""
+Proxy de miniaturas (app/services/thumbnails.py e app/routes/thumbnails.py)
+"""
+import hashlib
+import io
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import app
+from app.services import thumbnails
+from app.services.rows import AdData
+from app.services.thumbnails import ThumbnailError, ThumbnailStore
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# Pillow está em requirements.txt; sem ele só os testes de redução são pulados
+requires_pillow = pytest.mark.skipif(Image is None, reason="Pillow não instalado")
+
+SOURCE_URL = "https://cdn.example.com/criativos/1.png"
+
+
+def _png(width: int, height: int) -> bytes:
+    output = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 30, 30)).save(output, "PNG")
+    return output.getvalue()
+
+
+@pytest.fixture
+def fetched():
+    return []
+
+
+@pytest.fixture
+def store_factory(tmp_path, fetched):
+    def factory(content: bytes) -> ThumbnailStore:
+        def fetcher(url):
+            fetched.append(url)
+            return content, "image/png"
+        return ThumbnailStore(str(tmp_path), 10 * 1024 * 1024, fetcher)
+    return factory
+
+
+@pytest.fixture
+def client():
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def _thumbnail_url(width: int = 64) -> str:
+    return f"{settings.API_V1_STR}/thumbnails/{thumbnails.sign(SOURCE_URL)}?url={SOURCE_URL}&w={width}"
+
+
+def _source_path(store: ThumbnailStore, content: bytes) -> str:
+    return store._path("sources", hashlib.sha256(content).hexdigest())
+
+
+def test_bad_signature_is_rejected(client):
+    app.dependency_overrides[thumbnails.get_thumbnail_store] = lambda: None
+    response = client.get(f"{settings.API_V1_STR}/thumbnails/{'0' * 32}?url={SOURCE_URL}&w=64")
+    assert response.status_code == 403
+
+
+def test_unsupported_width_is_rejected(client):
+    app.dependency_overrides[thumbnails.get_thumbnail_store] = lambda: None
+    response = client.get(_thumbnail_url(100))
+    assert response.status_code == 400
+
+
+def test_second_get_is_served_from_disk(store_factory, fetched):
+    # Conteúdo que não é imagem: servido no tamanho original, com ou sem Pillow
+    store = store_factory(b"imagem original")
+    first = store.get(SOURCE_URL, 64)
+    second = store.get(SOURCE_URL, 64)
+    assert second == first
+    assert first.content == b"imagem original"
+    assert fetched == [SOURCE_URL]
+
+
+def test_evict_removes_least_recently_used_first(tmp_path):
+    sources = {f"https://cdn.example.com/criativos/{i}.png": bytes([i]) * 100 for i in range(3)}
+    store = ThumbnailStore(str(tmp_path), 10 * 1024 * 1024, lambda url: (sources[url], "image/png"))
+    for url in sources:
+        store.get(url, 64)
+    # Último uso: 2 é o mais antigo, depois 0 e 1
+    for mtime, content in zip((200, 300, 100), sources.values()):
+        os.utime(_source_path(store, content), (mtime, mtime))
+
+    store.max_bytes = 250
+    assert store.evict() == 1
+    assert [os.path.exists(_source_path(store, content)) for content in sources.values()] == [True, True, False]
+
+
+def test_proxy_ads_rewrites_thumbnail_urls(monkeypatch):
+    monkeypatch.setattr(settings, "THUMBNAILS_PROXY_ENABLED", True)
+    ads = [
+        AdData("1", "Anúncio", "ACTIVE", 0, 0, 0.0, 0, 0.0, SOURCE_URL),
+        AdData("2", "Sem miniatura", "ACTIVE", 0, 0, 0.0, 0, 0.0, None),
+        AdData("3", "Inline", "ACTIVE", 0, 0, 0.0, 0, 0.0, "data:image/png;base64,AAAA"),
+    ]
+    thumbnails.proxy_ads(ads)
+    proxied = ads[0].thumbnail_url
+    assert proxied.startswith(f"{settings.API_V1_STR}/thumbnails/{thumbnails.sign(SOURCE_URL)}?")
+    assert f"w={settings.THUMBNAILS_SIZES[0]}" in proxied
+    assert [ad.thumbnail_url for ad in ads[1:]] == [None, "data:image/png;base64,AAAA"]
+    # URLs já reescritas não são reescritas de novo
+    assert thumbnails.proxy_url(proxied) == proxied
+
+
+@requires_pillow
+def test_images_over_pixel_cap_are_rejected_and_cached(store_factory, fetched, monkeypatch):
+    monkeypatch.setattr(settings, "THUMBNAILS_MAX_PIXELS", 100 * 100)
+    store = store_factory(_png(200, 200))
+    for _ in range(2):
+        with pytest.raises(ThumbnailError) as error:
+            store.get(SOURCE_URL, 64)
+        assert error.value.status_code == 422
+    assert len(fetched) == 1
+
+
+@requires_pillow
+def test_decompression_bomb_is_rejected(store_factory, monkeypatch):
+    # Acima de 2x MAX_IMAGE_PIXELS o próprio Image.open levanta DecompressionBombError
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 1000)
+    store = store_factory(_png(200, 200))
+    with pytest.raises(ThumbnailError) as error:
+        store.get(SOURCE_URL, 64)
+    assert error.value.status_code == 422
+
+
+@requires_pillow
+def test_thumbnail_served_after_files_are_evicted(store_factory, client, tmp_path):
+    store = store_factory(_png(300, 200))
+    evicted = []
+
+    def get_and_evict(url, width):
+        thumbnail = store.get(url, width)
+        # Limpeza de outra requisição logo após a leitura
+        for root, _, names in os.walk(tmp_path):
+            for name in names:
+                os.unlink(os.path.join(root, name))
+                evicted.append(name)
+        return thumbnail
+
+    app.dependency_overrides[thumbnails.get_thumbnail_store] = lambda: type(
+        "EvictingStore", (), {"get": staticmethod(get_and_evict)}
+    )()
+    response = client.get(_thumbnail_url())
+    assert response.status_code == 200
+    assert evicted
+    assert response.headers["content-type"] == "image/jpeg"
+    with Image.open(io.BytesIO(response.content)) as image:
+        assert image.width == 64
+
+    response = client.get(_thumbnail_url(), headers={"If-None-Match": response.headers["etag"]})
+    assert response.status_code == 304